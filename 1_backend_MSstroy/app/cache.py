@@ -0,0 +1,110 @@
+"""Versioned cache of pre-serialized API responses."""
+
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+CacheKey = Tuple[int, Hashable]
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of encoded response bodies keyed by tree version."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        """Initialize cache.
+
+        Args:
+            max_entries: Maximum number of cached bodies.
+        """
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return number of cached bodies."""
+        return len(self._entries)
+
+    def get(self, version: int, key: Hashable) -> Optional[bytes]:
+        """Get cached body.
+
+        Args:
+            version: Tree version the body was produced for.
+            key: Resource key.
+
+        Returns:
+            Encoded body or None on miss.
+        """
+        with self._lock:
+            body = self._entries.get((version, key))
+            if body is not None:
+                self._entries.move_to_end((version, key))
+            return body
+
+    def put(self, version: int, key: Hashable, body: bytes) -> None:
+        """Store body, evicting least recently used entries over the limit.
+
+        Args:
+            version: Tree version the body was produced for.
+            key: Resource key.
+            body: Encoded body.
+        """
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(version, key)] = body
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached bodies."""
+        with self._lock:
+            self._entries.clear()
+
+
+def encode_result(result: object) -> bytes:
+    """Encode result the same way TreeStoreResponse is serialized.
+
+    Args:
+        result: JSON-compatible result value.
+
+    Returns:
+        UTF-8 JSON body.
+    """
+    return json.dumps({"result": result}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(epoch: str, version: int, key: Hashable) -> str:
+    """Build strong ETag for a resource at a tree version.
+
+    Versions restart with every service instance (process restart, another
+    worker, a named tree deleted and created again), so the ETag also
+    carries the random epoch of the instance that issued it.
+
+    Args:
+        epoch: Random token of the service instance.
+        version: Tree version.
+        key: Resource key.
+
+    Returns:
+        Quoted ETag value.
+    """
+    return f'"{epoch}-{version}-{zlib.crc32(repr(key).encode()):08x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check If-None-Match header against ETag.
+
+    Args:
+        if_none_match: Raw header value.
+        etag: Current ETag.
+
+    Returns:
+        True if the client already has the current representation.
+    """
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
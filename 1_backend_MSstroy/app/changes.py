@@ -0,0 +1,118 @@
+"""In-memory feed of tree changes for watchers."""
+
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+MAX_EVENT_IDS = 1000
+
+
+class ChangeEvent(NamedTuple):
+    """Change that produced a tree version."""
+
+    version: int
+    change: Dict[str, object]
+
+
+def describe_ids(ids: Iterable[int]) -> Dict[str, object]:
+    """Describe affected IDs compactly.
+
+    Args:
+        ids: Affected item IDs.
+
+    Returns:
+        Dictionary with up to MAX_EVENT_IDS IDs and their total count.
+    """
+    ids = list(ids)
+    return {"ids": ids[:MAX_EVENT_IDS], "count": len(ids)}
+
+
+class ChangeFeed:
+    """Bounded ring buffer of change events with sync producers and async consumers.
+
+    Producers append under the service write lock; consumers wait on an
+    asyncio.Event of their own loop, which producers set thread-safely, so
+    an idle watcher holds no thread.
+    """
+
+    def __init__(self, capacity: int = 1024, version: int = 0) -> None:
+        """Initialize empty feed.
+
+        Args:
+            capacity: Maximum number of retained events.
+            version: Current tree version; events before it are unknown.
+        """
+        self._events: Deque[ChangeEvent] = deque(maxlen=capacity)
+        self._latest = version
+        self._forgotten_through = version
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @property
+    def latest_version(self) -> int:
+        """Get version of the latest change."""
+        return self._latest
+
+    def append(self, version: int, change: Dict[str, object]) -> None:
+        """Record change and wake waiters.
+
+        Args:
+            version: Tree version produced by the change.
+            change: Compact change description.
+        """
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self._forgotten_through = self._events[0].version
+            self._events.append(ChangeEvent(version, change))
+            self._latest = version
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed; its waiter is gone.
+                pass
+
+    def since(self, version: int) -> Optional[List[ChangeEvent]]:
+        """Get events newer than version.
+
+        Args:
+            version: Last version the consumer has seen.
+
+        Returns:
+            Events in version order, or None if some events after version
+            were already evicted (or version is unknown) and the consumer
+            must resynchronize from a full read.
+        """
+        with self._lock:
+            if version < self._forgotten_through or version > self._latest:
+                return None
+            return [event for event in self._events if event.version > version]
+
+    async def wait(self, version: int, timeout: float) -> Optional[List[ChangeEvent]]:
+        """Wait until there are events newer than version.
+
+        Args:
+            version: Last version the consumer has seen.
+            timeout: Maximum seconds to wait.
+
+        Returns:
+            Same as since(); an empty list on timeout.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            while True:
+                events = self.since(version)
+                if events is None or events:
+                    return events
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+                except asyncio.TimeoutError:
+                    return []
+                waiter[1].clear()
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
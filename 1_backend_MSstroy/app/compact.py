@@ -0,0 +1,465 @@
+"""Array-backed compact storage engine for TreeStore.
+
+The engine keeps the same read API as ``app.models.TreeStore`` but stores the
+tree in typed arrays instead of dictionaries of Python objects:
+
+* ids and parent ids are ``array('q')`` columns in input order;
+* id lookups go through a sorted id column and binary search;
+* children are kept in CSR form (offsets + child row indexes);
+* payload attributes are dictionary-encoded columns (codes + distinct values).
+
+Items are materialized on demand, so the engine trades a little lookup speed
+(O(log n) instead of O(1)) for a much smaller resident footprint.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.models import ROOT_PARENT
+from app.pagination import page_slice
+
+PARENT_ID = 0
+PARENT_ROOT = 1
+PARENT_NONE = 2
+PARENT_MISSING = 3
+
+MISSING_CODE = -1
+
+ID_TYPECODE = "q"
+ROW_TYPECODE = "i"
+KIND_TYPECODE = "B"
+CODE_TYPECODE = "i"
+
+ARRAY_TYPECODES = {
+    "ids": ID_TYPECODE,
+    "parents": ID_TYPECODE,
+    "parent_kinds": KIND_TYPECODE,
+    "parent_rows": ROW_TYPECODE,
+    "sorted_ids": ID_TYPECODE,
+    "sorted_rows": ROW_TYPECODE,
+    "child_offsets": ROW_TYPECODE,
+    "child_rows": ROW_TYPECODE,
+}
+
+Column = Tuple[Sequence[int], List[object]]
+
+
+class CompactTreeStore:
+    """Tree structure storage backed by typed arrays."""
+
+    def __init__(self, items: Iterable[Dict[str, object]]) -> None:
+        """Build compact store from items.
+
+        Args:
+            items: Iterable of dictionaries with 'id' and 'parent' keys.
+
+        Raises:
+            ValueError: If items contain duplicate IDs or invalid structure.
+        """
+        ids, parents, parent_kinds, columns = encode_items(items)
+        self._attach(ids, parents, parent_kinds, columns, *build_indexes(ids, parents, parent_kinds))
+
+    @classmethod
+    def from_columns(
+        cls,
+        ids: Sequence[int],
+        parents: Sequence[int],
+        parent_kinds: Sequence[int],
+        columns: Dict[str, Column],
+        parent_rows: Sequence[int],
+        sorted_ids: Sequence[int],
+        sorted_rows: Sequence[int],
+        child_offsets: Sequence[int],
+        child_rows: Sequence[int],
+    ) -> "CompactTreeStore":
+        """Create store over prebuilt columns without copying them.
+
+        Columns may be ``array`` objects or ``memoryview`` slices of an
+        external buffer; they are used as is.
+
+        Returns:
+            CompactTreeStore instance.
+        """
+        store = cls.__new__(cls)
+        store._attach(
+            ids, parents, parent_kinds, columns,
+            parent_rows, sorted_ids, sorted_rows, child_offsets, child_rows,
+        )
+        return store
+
+    def _attach(
+        self,
+        ids: Sequence[int],
+        parents: Sequence[int],
+        parent_kinds: Sequence[int],
+        columns: Dict[str, Column],
+        parent_rows: Sequence[int],
+        sorted_ids: Sequence[int],
+        sorted_rows: Sequence[int],
+        child_offsets: Sequence[int],
+        child_rows: Sequence[int],
+    ) -> None:
+        """Bind storage columns to the instance."""
+        self._ids = ids
+        self._parents = parents
+        self._parent_kinds = parent_kinds
+        self._columns = columns
+        self._parent_rows = parent_rows
+        self._sorted_ids = sorted_ids
+        self._sorted_rows = sorted_rows
+        self._child_offsets = child_offsets
+        self._child_rows = child_rows
+
+    def __len__(self) -> int:
+        """Return number of items in the store."""
+        return len(self._ids)
+
+    def export_columns(self) -> Tuple[Dict[str, Sequence[int]], Dict[str, Column]]:
+        """Expose storage columns for serialization.
+
+        Returns:
+            Tuple of (index arrays by name, payload columns by attribute key).
+            Index array names match the keyword arguments of from_columns.
+        """
+        arrays = {
+            "ids": self._ids,
+            "parents": self._parents,
+            "parent_kinds": self._parent_kinds,
+            "parent_rows": self._parent_rows,
+            "sorted_ids": self._sorted_ids,
+            "sorted_rows": self._sorted_rows,
+            "child_offsets": self._child_offsets,
+            "child_rows": self._child_rows,
+        }
+        return arrays, self._columns
+
+    def _find_row(self, item_id: int) -> int:
+        """Find row index of item.
+
+        Args:
+            item_id: ID of the item.
+
+        Returns:
+            Row index or -1 if not found.
+        """
+        position = bisect_left(self._sorted_ids, item_id)
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == item_id:
+            return self._sorted_rows[position]
+        return -1
+
+    def _materialize(self, row: int) -> Dict[str, object]:
+        """Build item dictionary for a row.
+
+        Args:
+            row: Row index.
+
+        Returns:
+            Item dictionary equal to the one the store was built from.
+        """
+        item: Dict[str, object] = {"id": self._ids[row]}
+        kind = self._parent_kinds[row]
+        if kind == PARENT_ID:
+            item["parent"] = self._parents[row]
+        elif kind == PARENT_ROOT:
+            item["parent"] = ROOT_PARENT
+        elif kind == PARENT_NONE:
+            item["parent"] = None
+        for key, (codes, values) in self._columns.items():
+            code = codes[row]
+            if code != MISSING_CODE:
+                item[key] = values[code]
+        return item
+
+    def get_all(self) -> List[Dict[str, object]]:
+        """Get all items in the store.
+
+        Returns:
+            List of all items in input order.
+        """
+        return [self._materialize(row) for row in range(len(self._ids))]
+
+    def get_item(self, item_id: int) -> Optional[Dict[str, object]]:
+        """Get item by ID.
+
+        Args:
+            item_id: ID of the item to retrieve.
+
+        Returns:
+            Item dictionary or None if not found.
+        """
+        row = self._find_row(item_id)
+        if row < 0:
+            return None
+        return self._materialize(row)
+
+    def get_children(self, item_id: int) -> List[Dict[str, object]]:
+        """Get all children of an item.
+
+        Args:
+            item_id: ID of the parent item.
+
+        Returns:
+            List of child items.
+        """
+        row = self._find_row(item_id)
+        if row < 0:
+            return []
+        start = self._child_offsets[row]
+        end = self._child_offsets[row + 1]
+        return [self._materialize(child) for child in self._child_rows[start:end]]
+
+    def get_all_page(self, offset: int, limit: int) -> Tuple[List[Dict[str, object]], Optional[int]]:
+        """Get one page of all items in input order, materializing only the page.
+
+        Args:
+            offset: Position of the first item of the page.
+            limit: Maximum number of items to return.
+
+        Returns:
+            Tuple of (items, next_offset); next_offset is None on the last page.
+        """
+        rows, next_offset = page_slice(range(len(self._ids)), offset, limit)
+        return [self._materialize(row) for row in rows], next_offset
+
+    def get_children_page(
+        self,
+        item_id: int,
+        offset: int,
+        limit: int,
+    ) -> Tuple[List[Dict[str, object]], Optional[int]]:
+        """Get one page of children of an item, materializing only the page.
+
+        Args:
+            item_id: ID of the parent item.
+            offset: Position of the first child of the page.
+            limit: Maximum number of children to return.
+
+        Returns:
+            Tuple of (children, next_offset); next_offset is None on the last page.
+        """
+        row = self._find_row(item_id)
+        if row < 0:
+            return [], None
+        start = self._child_offsets[row]
+        end = self._child_offsets[row + 1]
+        rows, next_offset = page_slice(range(start, end), offset, limit)
+        return [self._materialize(self._child_rows[child]) for child in rows], next_offset
+
+    def get_all_parents(self, item_id: int) -> List[Dict[str, object]]:
+        """Get all parent items up to the root.
+
+        Args:
+            item_id: ID of the item to get parents for.
+
+        Returns:
+            List of parent items from direct parent to root.
+        """
+        row = self._find_row(item_id)
+        if row < 0:
+            return []
+        result = []
+        row = self._parent_rows[row]
+        while row >= 0:
+            result.append(self._materialize(row))
+            row = self._parent_rows[row]
+        return result
+
+
+class _ColumnEncoder:
+    """Dictionary encoder for a single payload attribute."""
+
+    def __init__(self, first_row: int) -> None:
+        self._codes = array(CODE_TYPECODE, [MISSING_CODE]) * first_row
+        self._values: List[object] = []
+        self._lookup: Dict[Tuple[type, object], int] = {}
+
+    def append(self, row: int, value: object) -> None:
+        """Store value for row, padding skipped rows as missing."""
+        missing = row - len(self._codes)
+        if missing > 0:
+            self._codes.extend(array(CODE_TYPECODE, [MISSING_CODE]) * missing)
+        try:
+            key = (type(value), value)
+            code = self._lookup.get(key)
+        except TypeError:
+            key = None
+            code = None
+        if code is None:
+            code = len(self._values)
+            self._values.append(value)
+            if key is not None:
+                self._lookup[key] = code
+        self._codes.append(code)
+
+    def finish(self, row_count: int) -> Column:
+        """Pad column to row_count and return (codes, values)."""
+        missing = row_count - len(self._codes)
+        if missing > 0:
+            self._codes.extend(array(CODE_TYPECODE, [MISSING_CODE]) * missing)
+        return self._codes, self._values
+
+
+def encode_items(items: Iterable[Dict[str, object]]) -> Tuple[array, array, array, Dict[str, Column]]:
+    """Validate items and encode them into storage columns.
+
+    Args:
+        items: Iterable of dictionaries with 'id' and 'parent' keys.
+
+    Returns:
+        Tuple of (ids, parents, parent_kinds, payload columns by attribute key);
+        attribute keys and value codes are numbered in order of first appearance.
+
+    Raises:
+        ValueError: If an item has invalid structure.
+    """
+    ids = array(ID_TYPECODE)
+    parents = array(ID_TYPECODE)
+    parent_kinds = array(KIND_TYPECODE)
+    encoders: Dict[str, _ColumnEncoder] = {}
+
+    for row, item in enumerate(items):
+        item_id = item.get("id")
+        if item_id is None:
+            raise ValueError("Item must have 'id' field")
+        if not isinstance(item_id, int):
+            raise ValueError(f"Item ID must be integer, got {type(item_id)}")
+        ids.append(item_id)
+
+        if "parent" not in item:
+            parent_kinds.append(PARENT_MISSING)
+            parents.append(0)
+        else:
+            parent = item["parent"]
+            if parent == ROOT_PARENT:
+                parent_kinds.append(PARENT_ROOT)
+                parents.append(0)
+            elif parent is None:
+                parent_kinds.append(PARENT_NONE)
+                parents.append(0)
+            elif isinstance(parent, int):
+                parent_kinds.append(PARENT_ID)
+                parents.append(parent)
+            else:
+                raise ValueError(f"Parent must be integer or 'root', got {type(parent)}")
+
+        for key, value in item.items():
+            if key == "id" or key == "parent":
+                continue
+            encoder = encoders.get(key)
+            if encoder is None:
+                encoder = encoders[key] = _ColumnEncoder(row)
+            encoder.append(row, value)
+
+    row_count = len(ids)
+    columns = {key: encoder.finish(row_count) for key, encoder in encoders.items()}
+    return ids, parents, parent_kinds, columns
+
+
+def build_indexes(
+    ids: Sequence[int],
+    parents: Sequence[int],
+    parent_kinds: Sequence[int],
+) -> Tuple[array, array, array, array, array]:
+    """Build lookup and children indexes for id/parent columns.
+
+    Args:
+        ids: Item IDs in row order.
+        parents: Parent IDs in row order (meaningful for PARENT_ID rows).
+        parent_kinds: Parent kind per row.
+
+    Returns:
+        Tuple of (parent_rows, sorted_ids, sorted_rows, child_offsets, child_rows).
+
+    Raises:
+        ValueError: If IDs are duplicated, parents are missing or items form
+            parent cycles.
+    """
+    row_count = len(ids)
+    sorted_rows = array(ROW_TYPECODE, sorted(range(row_count), key=ids.__getitem__))
+    sorted_ids = array(ID_TYPECODE, (ids[row] for row in sorted_rows))
+    for position in range(1, row_count):
+        if sorted_ids[position] == sorted_ids[position - 1]:
+            raise ValueError(f"Duplicate item ID: {sorted_ids[position]}")
+
+    parent_rows = array(ROW_TYPECODE, [-1]) * row_count
+    child_counts = array(ROW_TYPECODE, [0]) * (row_count + 1)
+    for row in range(row_count):
+        if parent_kinds[row] != PARENT_ID:
+            continue
+        parent_id = parents[row]
+        position = bisect_left(sorted_ids, parent_id)
+        if position < row_count and sorted_ids[position] == parent_id:
+            parent_row = sorted_rows[position]
+            parent_rows[row] = parent_row
+            child_counts[parent_row + 1] += 1
+
+    child_offsets = child_counts
+    for row in range(row_count):
+        child_offsets[row + 1] += child_offsets[row]
+
+    child_rows = array(ROW_TYPECODE, [0]) * child_offsets[row_count]
+    cursor = array(ROW_TYPECODE, child_offsets[:row_count])
+    for row in range(row_count):
+        parent_row = parent_rows[row]
+        if parent_row >= 0:
+            child_rows[cursor[parent_row]] = row
+            cursor[parent_row] += 1
+
+    reached = bytearray(row_count)
+    stack = [row for row in range(row_count) if parent_rows[row] < 0]
+    while stack:
+        row = stack.pop()
+        reached[row] = 1
+        stack.extend(child_rows[child_offsets[row]:child_offsets[row + 1]])
+    orphan_rows = [row for row in range(row_count) if parent_kinds[row] == PARENT_ID and parent_rows[row] < 0]
+    unreached_rows = [row for row in range(row_count) if not reached[row]]
+    check_structure(ids, parent_rows, orphan_rows, unreached_rows)
+
+    return parent_rows, sorted_ids, sorted_rows, child_offsets, child_rows
+
+
+def check_structure(
+    ids: Sequence[int],
+    parent_rows: Sequence[int],
+    orphan_rows: Sequence[int],
+    unreached_rows: Sequence[int],
+) -> None:
+    """Reject orphans and parent cycles the way TreeStore does.
+
+    Rows on a parent cycle never reach a root, so they are among the
+    unreached rows; those are walked up with three-colour marking to single
+    out the cycle members from rows merely hanging below a cycle.
+
+    Args:
+        ids: Item IDs in row order.
+        parent_rows: Parent row per row, -1 for roots and orphans.
+        orphan_rows: Rows whose parent ID does not exist.
+        unreached_rows: Rows not reachable from a root or orphan row.
+
+    Raises:
+        ValueError: Listing all orphan IDs and all IDs on parent cycles.
+    """
+    cycle_ids: List[int] = []
+    state: Dict[int, int] = {}
+    for start_row in unreached_rows:
+        if start_row in state:
+            continue
+        path = []
+        row = start_row
+        while row not in state:
+            state[row] = len(path)
+            path.append(row)
+            row = parent_rows[row]
+        if state[row] >= 0:
+            cycle_ids.extend(int(ids[cycle_row]) for cycle_row in path[state[row]:])
+        for path_row in path:
+            state[path_row] = -1
+
+    errors = []
+    if len(orphan_rows):
+        errors.append(f"parents not found for items {[int(ids[row]) for row in orphan_rows]}")
+    if cycle_ids:
+        errors.append(f"parent cycle through items {cycle_ids}")
+    if errors:
+        raise ValueError("Invalid tree structure: " + "; ".join(errors))
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +14,21 @@ class Config(BaseSettings):
     host: str = "127.0.0.1"
     port: int = 8000
     log_level: str = "INFO"
+    response_cache_size: int = 1024
+    snapshot_path: Optional[str] = None
+    shared_memory_name: Optional[str] = None
+    shared_attach_timeout_seconds: float = 10.0
+    ancestor_index: bool = False
+    indexed_attributes: List[str] = ["type"]
+    aggregated_attributes: Optional[List[str]] = []
+    change_feed_size: int = 1024
+    data_dir: Optional[str] = None
+    snapshot_every_records: int = 10_000
+    snapshot_every_bytes: int = 64 * 1024 * 1024
+    spill_dir: Optional[str] = None
+    max_resident_items: int = 5_000_000
+    watch_heartbeat_seconds: float = 15.0
+    reload_poll_seconds: float = 2.0
 
 
 config = Config()
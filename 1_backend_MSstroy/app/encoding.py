@@ -0,0 +1,149 @@
+"""Response encodings negotiated from the Accept header.
+
+* ``application/json`` - default ``{"result": ...}`` document;
+* ``application/msgpack`` - the same document in MessagePack;
+* ``application/vnd.treestore.columns+msgpack`` - MessagePack document where
+  every list of items is replaced with columns (see ``encode_columns``), so
+  clients can load them with ``numpy.frombuffer`` without per-item dicts.
+
+The binary encodings need the optional ``msgpack`` package and are not
+offered without it.
+"""
+
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from app.cache import encode_result
+from app.compact import encode_items
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+COLUMNS_MEDIA_TYPE = "application/vnd.treestore.columns+msgpack"
+
+# Media types that clients commonly send for MessagePack.
+_ALIASES = {"application/x-msgpack": MSGPACK_MEDIA_TYPE}
+
+
+def available_media_types(columns: bool = False) -> List[str]:
+    """List encodings the server can produce, in order of preference on ties.
+
+    Args:
+        columns: Whether the result holds item lists that have a columnar form.
+
+    Returns:
+        Media types; JSON is always available.
+    """
+    if msgpack is None:
+        return [JSON_MEDIA_TYPE]
+    if columns:
+        return [JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, COLUMNS_MEDIA_TYPE]
+    return [JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE]
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """Choose media type for an Accept header.
+
+    Higher quality wins, then the more specific range (``type/subtype`` over
+    ``type/*`` over ``*/*``), then the range listed first.
+
+    Args:
+        accept: Raw Accept header; missing or empty means JSON.
+        offered: Media types the endpoint can produce.
+
+    Returns:
+        Chosen media type, or None if nothing offered is acceptable.
+    """
+    if not accept or not accept.strip():
+        return offered[0]
+    best = None
+    best_score = None
+    for position, part in enumerate(accept.split(",")):
+        media_range, *parameters = [value.strip() for value in part.split(";")]
+        media_range = _ALIASES.get(media_range.lower(), media_range.lower())
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+        range_type, _, range_subtype = media_range.partition("/")
+        for media_type in offered:
+            offered_type, _, offered_subtype = media_type.partition("/")
+            if media_range == media_type:
+                specificity = 2
+            elif range_subtype == "*" and range_type in ("*", offered_type):
+                specificity = 1 if range_type == offered_type else 0
+            else:
+                continue
+            score = (quality, specificity, -position)
+            if best_score is None or score > best_score:
+                best, best_score = media_type, score
+    return best
+
+
+def _little_endian(values: array) -> bytes:
+    """Get raw bytes of a typed array in little-endian byte order."""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_columns(items: List[Dict[str, object]]) -> Dict[str, object]:
+    """Lay out items as columns, the way CompactTreeStore stores them.
+
+    Arrays are little-endian binary strings:
+
+    * ``ids``, ``parents`` - int64; ``parents`` is meaningful where the kind is 0;
+    * ``parent_kinds`` - uint8: 0 parent ID, 1 "root", 2 null, 3 no parent key;
+    * ``columns[key]["codes"]`` - int32 index into ``columns[key]["values"]``
+      (distinct values), -1 where the item has no such key.
+
+    Args:
+        items: Items in result order.
+
+    Returns:
+        Dictionary with ``count`` and the arrays above.
+    """
+    ids, parents, parent_kinds, columns = encode_items(items)
+    return {
+        "count": len(ids),
+        "ids": _little_endian(ids),
+        "parents": _little_endian(parents),
+        "parent_kinds": parent_kinds.tobytes(),
+        "columns": {
+            key: {"codes": _little_endian(codes), "values": values}
+            for key, (codes, values) in columns.items()
+        },
+    }
+
+
+def encode(result: object, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """Encode response document ``{"result": result}``.
+
+    Args:
+        result: JSON-compatible result value. For the columnar encoding it is
+            a list of items or a page dictionary with an "items" list.
+        media_type: One of the media types from available_media_types().
+
+    Returns:
+        Encoded body.
+    """
+    if media_type == JSON_MEDIA_TYPE:
+        return encode_result(result)
+    if media_type == COLUMNS_MEDIA_TYPE:
+        if isinstance(result, dict):
+            result = {**result, "items": encode_columns(result["items"])}
+        else:
+            result = encode_columns(result)
+    return msgpack.packb({"result": result}, use_bin_type=True)
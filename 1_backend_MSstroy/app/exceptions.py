@@ -5,3 +5,21 @@ class ItemNotFoundError(Exception):
     """Raised when item is not found in tree."""
 
     pass
+
+
+class UnsupportedOperationError(Exception):
+    """Raised when the current storage engine does not support an operation."""
+
+    pass
+
+
+class VersionConflictError(Exception):
+    """Raised when a change is based on an outdated tree version."""
+
+    pass
+
+
+class TreeNotFoundError(Exception):
+    """Raised when a named tree does not exist."""
+
+    pass
@@ -0,0 +1,125 @@
+"""Streaming export of a subtree as nested JSON."""
+
+import json
+from typing import Dict, Iterator, List, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+# Key of the nested list of child items; an item attribute of this name would clash with it.
+CHILDREN_KEY = "children"
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+class SubtreeCopy:
+    """Children lists of one subtree, copied at a single point in time.
+
+    Streaming from a store that is changed in place could mix versions, so
+    an export from such a store walks this copy instead. Only list
+    references are copied; item dicts are shared with the store. The copy
+    also checks every exported item for a CHILDREN_KEY attribute before the
+    first byte is streamed.
+    """
+
+    def __init__(self, tree_store: object, item: Dict[str, object], max_depth: Optional[int] = None) -> None:
+        """Copy children lists of the items an export expands, in O(subtree size).
+
+        Args:
+            tree_store: Store to read children from (any engine with get_children).
+            item: Root item of the subtree.
+            max_depth: Number of levels below item to expand; None expands all.
+
+        Raises:
+            ValueError: If an exported item has a CHILDREN_KEY attribute.
+        """
+        self._children_by_id: Dict[int, List[Dict[str, object]]] = {}
+        stack = [(item, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if CHILDREN_KEY in node:
+                raise ValueError(
+                    f"Item {node['id']} has a '{CHILDREN_KEY}' attribute, which is reserved for nested items"
+                )
+            if max_depth is not None and depth >= max_depth:
+                continue
+            children = list(tree_store.get_children(node["id"]))
+            self._children_by_id[node["id"]] = children
+            stack.extend((child, depth + 1) for child in children)
+
+    def get_children(self, item_id: int) -> List[Dict[str, object]]:
+        """Get copied children of an item.
+
+        Args:
+            item_id: ID of the parent item.
+
+        Returns:
+            List of child items.
+        """
+        return self._children_by_id.get(item_id, [])
+
+
+def iter_subtree_json(
+    tree_store: object,
+    item: Dict[str, object],
+    max_depth: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Encode subtree of item as ``{"result": <nested item>}`` in chunks.
+
+    Every expanded item gets a "children" list of nested items. Items at
+    max_depth below the root are emitted without "children". Items must not
+    have a "children" attribute of their own (SubtreeCopy checks this before
+    streaming). The walk keeps
+    one children iterator per level on an explicit stack, so memory is
+    O(depth + chunk_size) and deep trees do not hit the recursion limit.
+
+    Args:
+        tree_store: Store to read children from (any engine with get_children).
+        item: Root item of the subtree.
+        max_depth: Number of levels below item to expand; None expands all.
+        chunk_size: Approximate size of yielded chunks in characters.
+
+    Yields:
+        UTF-8 encoded parts of the JSON document.
+    """
+    parts: List[str] = ['{"result":']
+    buffered = len(parts[0])
+
+    def expand(node: Dict[str, object], depth: int) -> Optional[Iterator[Dict[str, object]]]:
+        nonlocal buffered
+        encoded = _encoder.encode(node)
+        if max_depth is not None and depth >= max_depth:
+            parts.append(encoded)
+            buffered += len(encoded)
+            return None
+        opening = encoded[:-1] + (',"children":[' if len(encoded) > 2 else '"children":[')
+        parts.append(opening)
+        buffered += len(opening)
+        return iter(tree_store.get_children(node["id"]))
+
+    # Frame: [children iterator, depth of the children, no child emitted yet]
+    stack: List[list] = []
+    children = expand(item, 0)
+    if children is not None:
+        stack.append([children, 1, True])
+    while stack:
+        frame = stack[-1]
+        child = next(frame[0], None)
+        if child is None:
+            parts.append("]}")
+            buffered += 2
+            stack.pop()
+            continue
+        if not frame[2]:
+            parts.append(",")
+            buffered += 1
+        frame[2] = False
+        grandchildren = expand(child, frame[1])
+        if grandchildren is not None:
+            stack.append([grandchildren, frame[1] + 1, True])
+        if buffered >= chunk_size:
+            yield "".join(parts).encode("utf-8")
+            parts.clear()
+            buffered = 0
+    parts.append("}")
+    yield "".join(parts).encode("utf-8")
@@ -0,0 +1,69 @@
+"""Streaming NDJSON ingestion for tree initialization."""
+
+import json
+from typing import Optional
+
+from app.models import TreeStore, TreeStoreBuilder
+from app.schemas import validate_item
+
+
+class NdjsonIngestor:
+    """Parses NDJSON body chunks and indexes items as they arrive.
+
+    Only the current incomplete line is buffered, so peak memory is the
+    size of the store being built plus one chunk.
+    """
+
+    def __init__(self, builder: Optional[TreeStoreBuilder] = None) -> None:
+        """Initialize ingestor.
+
+        Args:
+            builder: Builder to feed; a new one is created if not given.
+        """
+        self._builder = builder if builder is not None else TreeStoreBuilder()
+        self._buffer = b""
+        self._line_number = 0
+
+    def __len__(self) -> int:
+        """Return number of items ingested so far."""
+        return len(self._builder)
+
+    def feed(self, chunk: bytes) -> None:
+        """Process a chunk of the request body.
+
+        Args:
+            chunk: Raw bytes; may end in the middle of a line.
+
+        Raises:
+            ValueError: If a complete line is not a valid item.
+        """
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._ingest_line(line)
+
+    def finish(self) -> TreeStore:
+        """Process the trailing line and build the store.
+
+        Returns:
+            TreeStore with all ingested items.
+
+        Raises:
+            ValueError: If the last line is invalid or no items were received.
+        """
+        self._ingest_line(self._buffer)
+        self._buffer = b""
+        if not len(self._builder):
+            raise ValueError("Items list cannot be empty")
+        return self._builder.build()
+
+    def _ingest_line(self, line: bytes) -> None:
+        """Decode, validate and index one NDJSON line."""
+        self._line_number += 1
+        line = line.strip()
+        if not line:
+            return
+        try:
+            self._builder.add(validate_item(json.loads(line)))
+        except ValueError as e:
+            raise ValueError(f"line {self._line_number}: {e}") from e
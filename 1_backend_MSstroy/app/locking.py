@@ -0,0 +1,62 @@
+"""Readers-writer lock for stores that are mutated in place."""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class ReadWriteLock:
+    """Lock shared by any number of readers or held by one writer.
+
+    Writers are preferred: once a writer waits, new readers wait too, so a
+    steady stream of reads cannot starve mutations. The read side is taken
+    on every request, so it is exposed as plain acquire/release methods that
+    cost one uncontended mutex round trip each.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an unlocked lock."""
+        self._mutex = threading.Lock()
+        self._changed = threading.Condition(self._mutex)
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        """Take the lock shared with other readers, waiting for writers first."""
+        with self._mutex:
+            while self._writing or self._waiting_writers:
+                self._changed.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        """Release a shared hold taken with acquire_read."""
+        with self._mutex:
+            self._readers -= 1
+            if not self._readers and self._waiting_writers:
+                self._changed.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock shared with other readers."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively."""
+        with self._mutex:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._changed.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._mutex:
+                self._writing = False
+                self._changed.notify_all()
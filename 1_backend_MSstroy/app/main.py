@@ -4,30 +4,98 @@ This module provides REST API endpoints for tree structure operations.
 Business logic is separated into service layer (app.service).
 """
 
+import asyncio
 import json
-import threading
+import signal
+import tempfile
+import time
+from contextlib import ExitStack, asynccontextmanager
 from pathlib import Path
-from typing import Dict
+from typing import AsyncIterator, Callable, Dict, Hashable, Iterator, List, Optional
 
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from app.exceptions import ItemNotFoundError
+from app.compact import CompactTreeStore
+from app.config import config
+from app.encoding import COLUMNS_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, available_media_types, negotiate
+from app.exceptions import (
+    ItemNotFoundError,
+    TreeNotFoundError,
+    UnsupportedOperationError,
+    VersionConflictError,
+)
+from app.ingest import NdjsonIngestor
 from app.logger import get_logger, setup_logging
-from app.models import TreeStore
-from app.schemas import ItemIdRequest, TreeStoreRequest, TreeStoreResponse
+from app.models import TreeStore, TreeStoreBuilder
+from app.persistence import TreePersistence
+from app.query import Condition
+from app.registry import TreeRegistry
+from app.reload import TreeReloader
+from app.schemas import (
+    AddItemsRequest,
+    ChildrenRequest,
+    DescendantsRequest,
+    FindByAttributeRequest,
+    IsAncestorRequest,
+    ItemIdRequest,
+    ItemIdsRequest,
+    KthAncestorRequest,
+    LevelRequest,
+    LowestCommonAncestorRequest,
+    MoveItemRequest,
+    PatchTreeRequest,
+    QueryRequest,
+    RemoveItemRequest,
+    SubtreeRequest,
+    TreeStoreRequest,
+    TreeStoreResponse,
+    UpdateItemRequest,
+)
 from app.service import TreeStoreService
+from app.shared import SharedTree
+from app.snapshot import open_snapshot
 
 setup_logging()
 logger = get_logger(__name__)
 
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Run the default tree reloader, and reload on SIGHUP, while the application serves requests.
+
+    On shutdown the reloader is stopped and the spill directory of named trees is removed.
+    """
+    # The data file only seeds persistent and shared trees, so it is watched in plain in-memory mode only.
+    _reloader.start(watch=config.reload_poll_seconds > 0 and not config.data_dir and _shared_tree is None)
+    loop = asyncio.get_running_loop()
+    hangup = getattr(signal, "SIGHUP", None)
+    try:
+        loop.add_signal_handler(hangup, _reloader.request_reload, "signal")
+    except (TypeError, ValueError, RuntimeError, NotImplementedError):
+        # No SIGHUP on this platform, or not running in the main thread.
+        hangup = None
+    try:
+        yield
+    finally:
+        if hangup is not None:
+            loop.remove_signal_handler(hangup)
+        _reloader.stop()
+        _trees.close()
+
+
 app = FastAPI(
     title="TreeStore API",
     version="1.0.0",
     description="REST API for tree structure operations with parent-child relationships",
+    lifespan=_lifespan,
 )
 
+# Tree endpoints, mounted for the default tree and for every named tree.
+tree_router = APIRouter()
+
 _DATA_FILE = Path(__file__).parent / "data" / "default_items.json"
-_lock = threading.Lock()
 
 
 def _load_default_items() -> list[Dict[str, object]]:
@@ -51,9 +119,291 @@ def _load_default_items() -> list[Dict[str, object]]:
         raise ValueError(f"Invalid JSON in {_DATA_FILE}: {e}") from e
 
 
-_default_items = _load_default_items()
-_tree_store = TreeStore(_default_items)
-_tree_service = TreeStoreService(_tree_store)
+def _build_tree_store(items: list[Dict[str, object]]) -> TreeStore:
+    """Build TreeStore with the configured ancestor index, attribute indexes and aggregates."""
+    return TreeStore(
+        items,
+        ancestor_index=config.ancestor_index,
+        indexed_attributes=config.indexed_attributes,
+        aggregated_attributes=config.aggregated_attributes,
+    )
+
+
+def _load_default_tree() -> object:
+    """Load default tree.
+
+    Opens the binary snapshot with mmap when SNAPSHOT_PATH is configured,
+    otherwise builds TreeStore from the default JSON file. With DATA_DIR the
+    tree is logged and replayed as a mutable TreeStore, so the snapshot only
+    seeds one and the deployment stays writable from the first start.
+
+    Returns:
+        Store instance to serve.
+    """
+    if config.snapshot_path:
+        logger.info(f"Opening tree snapshot: {config.snapshot_path}")
+        snapshot = open_snapshot(config.snapshot_path)
+        if config.data_dir and not config.shared_memory_name:
+            return _build_tree_store(snapshot.get_all())
+        return snapshot
+    return _build_tree_store(_load_default_items())
+
+
+def _to_compact(tree_store: object) -> CompactTreeStore:
+    """Convert store to the layout shared between workers."""
+    if isinstance(tree_store, CompactTreeStore):
+        return tree_store
+    return CompactTreeStore(tree_store.get_all())
+
+
+def _load_shared_tree(shared_tree: SharedTree) -> TreeStoreService:
+    """Attach to the shared tree, publishing the default tree if it is empty.
+
+    Args:
+        shared_tree: Shared memory tree of this deployment.
+
+    Attaching fails only while other workers keep superseding the
+    generation being attached, so it is retried with exponential backoff.
+
+    Returns:
+        Service serving the latest shared generation.
+
+    Raises:
+        RuntimeError: If no generation could be attached within
+            SHARED_ATTACH_TIMEOUT_SECONDS.
+    """
+    if shared_tree.generation == 0:
+        shared_tree.publish(_to_compact(_load_default_tree()))
+    deadline = time.monotonic() + config.shared_attach_timeout_seconds
+    delay = 0.001
+    loaded = shared_tree.load()
+    while loaded is None:
+        if time.monotonic() >= deadline:
+            raise RuntimeError(
+                f"Could not attach to shared tree {config.shared_memory_name} "
+                f"within {config.shared_attach_timeout_seconds} s (generation {shared_tree.generation})"
+            )
+        time.sleep(delay)
+        delay = min(delay * 2, 0.1)
+        loaded = shared_tree.load()
+    tree_store, generation = loaded
+    return TreeStoreService(
+        tree_store,
+        cache_size=config.response_cache_size,
+        version=generation,
+        change_feed_size=config.change_feed_size,
+    )
+
+
+def _load_persistent_tree(persistence: TreePersistence) -> TreeStoreService:
+    """Recover the tree from the data directory, starting it from the default tree if empty.
+
+    Args:
+        persistence: Persistence of this deployment.
+
+    Returns:
+        Service logging every change to persistence.
+    """
+    recovered = persistence.recover(_build_tree_store)
+    if recovered is None:
+        tree_store, version = _load_default_tree(), 0
+        persistence.write_snapshot(tree_store.get_all(), version)
+    else:
+        tree_store, version = recovered
+    persistence.start(version)
+    return TreeStoreService(
+        tree_store,
+        cache_size=config.response_cache_size,
+        version=version,
+        change_feed_size=config.change_feed_size,
+        persistence=persistence,
+    )
+
+
+_shared_tree = SharedTree(config.shared_memory_name) if config.shared_memory_name else None
+if _shared_tree is not None:
+    if config.data_dir:
+        logger.warning("DATA_DIR is ignored in shared memory mode")
+    _tree_service = _load_shared_tree(_shared_tree)
+elif config.data_dir:
+    _tree_service = _load_persistent_tree(
+        TreePersistence(config.data_dir, config.snapshot_every_records, config.snapshot_every_bytes)
+    )
+else:
+    _tree_service = TreeStoreService(
+        _load_default_tree(),
+        cache_size=config.response_cache_size,
+        change_feed_size=config.change_feed_size,
+    )
+
+_reloader = TreeReloader(
+    config.snapshot_path or str(_DATA_FILE),
+    _load_default_tree,
+    lambda tree_store: _replace_tree(_tree_service, tree_store),
+    config.reload_poll_seconds,
+)
+
+# In shared memory mode other workers publish without waking our watchers,
+# so watchers poll the shared generation this often.
+_SHARED_WATCH_POLL_SECONDS = 1.0
+
+# Page size of getAll/getChildren when a cursor is given without a limit.
+_DEFAULT_PAGE_SIZE = 100
+
+# OpenAPI description of the binary encodings of item list responses.
+_BINARY_CONTENT = {
+    MSGPACK_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+    COLUMNS_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+}
+
+
+_trees = TreeRegistry(
+    config.spill_dir or tempfile.gettempdir(),
+    config.max_resident_items,
+    _build_tree_store,
+    lambda tree_store, version: TreeStoreService(
+        tree_store,
+        cache_size=config.response_cache_size,
+        version=version,
+        change_feed_size=config.change_feed_size,
+    ),
+)
+
+
+def _lease_tree_service(request: Request, create: bool) -> Iterator[TreeStoreService]:
+    """Resolve the tree of a request: the default tree, or the named one in the path."""
+    name = request.path_params.get("name")
+    if name is None:
+        yield _tree_service
+        return
+    with ExitStack() as stack:
+        try:
+            service = stack.enter_context(_trees.lease(name, create))
+        except ValueError as e:
+            logger.warning("Invalid tree name", extra={"tree": name})
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+        except TreeNotFoundError as e:
+            logger.warning("Tree not found", extra={"tree": name})
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+        yield service
+
+
+def _get_tree_service(request: Request) -> Iterator[TreeStoreService]:
+    """Dependency providing the service of an existing tree for the whole request."""
+    yield from _lease_tree_service(request, create=False)
+
+
+def _get_or_create_tree_service(request: Request) -> Iterator[TreeStoreService]:
+    """Dependency providing the service of a tree, creating a named tree if missing."""
+    yield from _lease_tree_service(request, create=True)
+
+
+def _negotiate_media_type(accept: Optional[str] = Header(None)) -> str:
+    """Dependency choosing the encoding of an item list response from the Accept header."""
+    media_type = negotiate(accept, available_media_types(columns=True))
+    if media_type is None:
+        logger.warning("No acceptable media type", extra={"accept": accept})
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=f"Available media types: {', '.join(available_media_types(columns=True))}",
+        )
+    return media_type
+
+
+def _sync_shared_tree() -> None:
+    """Switch to the latest shared generation if another worker published one."""
+    if _shared_tree is None:
+        return
+    loaded = _shared_tree.load()
+    if loaded is not None:
+        tree_store, generation = loaded
+        _tree_service.replace_tree(tree_store, version=generation)
+
+
+def _replace_tree(service: TreeStoreService, tree_store: TreeStore) -> Dict[str, object]:
+    """Publish new tree to this worker, or to all workers in shared memory mode.
+
+    Args:
+        service: Service of the tree to replace.
+        tree_store: Built and validated store.
+
+    Returns:
+        Dictionary with initialization status and items count.
+    """
+    if _shared_tree is None or service is not _tree_service:
+        return service.replace_tree(tree_store)
+    _shared_tree.publish(_to_compact(tree_store))
+    _sync_shared_tree()
+    return {"status": "initialized", "items_count": len(tree_store)}
+
+
+def _cached_response(
+    service: TreeStoreService,
+    key: Hashable,
+    producer: Callable[[TreeStore], object],
+    if_none_match: Optional[str],
+    media_type: str,
+) -> Response:
+    """Build response from the pre-serialized cache with ETag support.
+
+    Args:
+        service: Service of the requested tree.
+        key: Resource key for the cache.
+        producer: Computes the result from the pinned tree snapshot on cache miss.
+        if_none_match: Value of the If-None-Match request header.
+        media_type: Negotiated encoding of the body.
+
+    Returns:
+        200 response with cached body, or 304 if the client's copy is current.
+    """
+    body, etag = service.get_cached_result(key, producer, if_none_match, media_type)
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _cached_page(
+    service: TreeStoreService,
+    key: tuple,
+    producer: Callable[[TreeStore, int, int], tuple],
+    cursor: Optional[str],
+    limit: Optional[int],
+    if_none_match: Optional[str],
+    media_type: str,
+) -> Response:
+    """Build paginated response from the pre-serialized cache with ETag support.
+
+    Args:
+        service: Service of the requested tree.
+        key: Resource key for the cache.
+        producer: Returns (items, next_offset) for an offset and limit on cache miss.
+        cursor: Cursor of the page to fetch; None for the first page.
+        limit: Maximum number of items per page; None for the default.
+        if_none_match: Value of the If-None-Match request header.
+        media_type: Negotiated encoding of the body.
+
+    Returns:
+        200 response with ``{"items", "next_cursor"}`` result, or 304.
+
+    Raises:
+        ValueError: If cursor is malformed.
+        VersionConflictError: If the tree changed since the cursor was issued.
+    """
+    body, etag = service.get_cached_page(
+        key, producer, cursor, limit or _DEFAULT_PAGE_SIZE, if_none_match, media_type
+    )
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+@app.middleware("http")
+async def sync_shared_tree(request: Request, call_next):
+    """Serve the tree generation last published by any worker."""
+    _sync_shared_tree()
+    return await call_next(request)
 
 
 @app.middleware("http")
@@ -91,8 +441,8 @@ async def log_requests(request: Request, call_next):
         raise
 
 
-@app.post(
-    "/api/v1/tree/init",
+@tree_router.post(
+    "/init",
     response_model=TreeStoreResponse,
     tags=["Tree Management"],
     summary="Initialize tree",
@@ -115,11 +465,15 @@ async def log_requests(request: Request, call_next):
         500: {"description": "Internal server error"},
     },
 )
-def init_tree(request: TreeStoreRequest) -> TreeStoreResponse:
+def init_tree(
+    request: TreeStoreRequest,
+    service: TreeStoreService = Depends(_get_or_create_tree_service),
+) -> TreeStoreResponse:
     """Initialize tree with new items.
 
     Args:
         request: TreeStoreRequest with items to initialize.
+        service: Service of the requested tree.
 
     Returns:
         TreeStoreResponse with initialization status and items count.
@@ -129,10 +483,7 @@ def init_tree(request: TreeStoreRequest) -> TreeStoreResponse:
     """
     logger.info("Initializing tree", extra={"items_count": len(request.items)})
     try:
-        with _lock:
-            global _tree_service
-            result = _tree_service.initialize_tree(request.items)
-            _tree_service = TreeStoreService(_tree_service.tree_store)
+        result = _replace_tree(service, _build_tree_store(request.items))
         logger.info("Tree initialized successfully", extra={"items_count": len(request.items)})
         return TreeStoreResponse(result=result)
     except ValueError as e:
@@ -149,85 +500,186 @@ def init_tree(request: TreeStoreRequest) -> TreeStoreResponse:
         ) from e
 
 
-@app.get(
-    "/api/v1/tree/getAll",
+@tree_router.post(
+    "/initStream",
     response_model=TreeStoreResponse,
-    tags=["Tree Operations"],
-    summary="Get all items",
-    description="Retrieve all items from the tree structure",
+    tags=["Tree Management"],
+    summary="Initialize tree from NDJSON stream",
+    description=(
+        "Initialize tree from an `application/x-ndjson` body with one item per line. "
+        "Items are validated and indexed while the body is being received. Replaces existing tree."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {
+                    "schema": {"type": "string"},
+                    "example": '{"id": 1, "parent": "root"}\n{"id": 2, "parent": 1, "type": "test"}\n',
+                }
+            },
+        }
+    },
     responses={
         200: {
-            "description": "List of all items",
+            "description": "Tree initialized successfully",
             "content": {
                 "application/json": {
-                    "example": {
-                        "result": [
-                            {"id": 1, "parent": "root"},
-                            {"id": 2, "parent": 1, "type": "test"},
-                        ]
-                    }
+                    "example": {"result": {"status": "initialized", "items_count": 2}}
                 }
             },
         },
+        400: {"description": "Invalid item line"},
         500: {"description": "Internal server error"},
     },
 )
-def get_all() -> TreeStoreResponse:
-    """Get all items from the tree.
+async def init_tree_stream(
+    request: Request,
+    service: TreeStoreService = Depends(_get_or_create_tree_service),
+) -> TreeStoreResponse:
+    """Initialize tree from NDJSON body without materializing it.
+
+    Args:
+        request: Raw request with NDJSON body.
+        service: Service of the requested tree.
 
     Returns:
-        TreeStoreResponse with all items in the tree.
+        TreeStoreResponse with initialization status and items count.
 
     Raises:
-        HTTPException: If operation fails (500).
+        HTTPException: If a line is invalid (400) or initialization fails (500).
     """
+    logger.info("Initializing tree from stream")
+    ingestor = NdjsonIngestor(
+        TreeStoreBuilder(
+            ancestor_index=config.ancestor_index,
+            indexed_attributes=config.indexed_attributes,
+            aggregated_attributes=config.aggregated_attributes,
+        )
+    )
     try:
-        result = _tree_service.get_all_items()
-        logger.debug("Retrieved all items", extra={"count": len(result)})
+        async for chunk in request.stream():
+            if chunk:
+                await run_in_threadpool(ingestor.feed, chunk)
+        tree_store = await run_in_threadpool(ingestor.finish)
+        result = await run_in_threadpool(_replace_tree, service, tree_store)
+        logger.info("Tree initialized from stream", extra={"items_count": len(tree_store)})
         return TreeStoreResponse(result=result)
+    except ValueError as e:
+        logger.warning("Invalid items stream", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid items structure: {str(e)}",
+        ) from e
     except Exception as e:
-        logger.error("Failed to get all items", extra={"error": str(e)}, exc_info=True)
+        logger.error("Failed to initialize tree from stream", extra={"error": str(e)}, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get all items",
+            detail="Failed to initialize tree",
         ) from e
 
 
-@app.post(
-    "/api/v1/tree/getItem",
+@tree_router.post(
+    "/addItems",
     response_model=TreeStoreResponse,
-    tags=["Tree Operations"],
-    summary="Get item by ID",
-    description="Retrieve a specific item from the tree by its ID",
+    tags=["Tree Management"],
+    summary="Add items",
+    description="Add a single node or a whole subtree without rebuilding the tree",
     responses={
         200: {
-            "description": "Item found",
+            "description": "Items added successfully",
             "content": {
                 "application/json": {
-                    "example": {"result": {"id": 1, "parent": "root"}}
+                    "example": {"result": {"status": "added", "items_count": 2}}
+                }
+            },
+        },
+        400: {"description": "Duplicate ID or unknown parent"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def add_items(
+    request: AddItemsRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Add items to the tree in place.
+
+    Args:
+        request: AddItemsRequest with items to add.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with operation status and added items count.
+
+    Raises:
+        HTTPException: If items are invalid (400) or operation fails (500).
+    """
+    logger.info("Adding items", extra={"items_count": len(request.items)})
+    try:
+        result = service.add_items(request.items)
+        return TreeStoreResponse(result=result)
+    except ValueError as e:
+        logger.warning("Invalid items", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid items: {str(e)}",
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to add items", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to add items",
+        ) from e
+
+
+@tree_router.post(
+    "/removeItem",
+    response_model=TreeStoreResponse,
+    tags=["Tree Management"],
+    summary="Remove item",
+    description="Remove a leaf item, or an item with its whole subtree when recursive is set",
+    responses={
+        200: {
+            "description": "Items removed successfully",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"status": "removed", "items_count": 3}}
                 }
             },
         },
+        400: {"description": "Item has children and recursive is not set"},
         404: {"description": "Item not found"},
         500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
     },
 )
-def get_item(request: ItemIdRequest) -> TreeStoreResponse:
-    """Get item by ID.
+def remove_item(
+    request: RemoveItemRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Remove item from the tree in place.
 
     Args:
-        request: ItemIdRequest with item ID.
+        request: RemoveItemRequest with item ID and recursive flag.
+        service: Service of the requested tree.
 
     Returns:
-        TreeStoreResponse with item data.
+        TreeStoreResponse with operation status and removed items count.
 
     Raises:
-        HTTPException: If item not found (404) or operation fails (500).
+        HTTPException: If item not found (404), removal is invalid (400)
+            or operation fails (500).
     """
-    logger.debug("Getting item by ID", extra={"item_id": request.id})
+    logger.info("Removing item", extra={"item_id": request.id, "recursive": request.recursive})
     try:
-        result = _tree_service.get_item_by_id(request.id)
-        logger.debug("Item found", extra={"item_id": request.id})
+        result = service.remove_item(request.id, request.recursive)
         return TreeStoreResponse(result=result)
     except ItemNotFoundError as e:
         logger.warning("Item not found", extra={"item_id": request.id})
@@ -235,142 +687,1816 @@ def get_item(request: ItemIdRequest) -> TreeStoreResponse:
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e),
         ) from e
+    except ValueError as e:
+        logger.warning("Invalid removal", extra={"item_id": request.id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
     except Exception as e:
-        logger.error("Failed to get item", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        logger.error("Failed to remove item", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get item",
+            detail="Failed to remove item",
         ) from e
 
 
-@app.post(
-    "/api/v1/tree/getChildren",
+@tree_router.post(
+    "/moveItem",
     response_model=TreeStoreResponse,
-    tags=["Tree Operations"],
-    summary="Get children of an item",
-    description="Retrieve all direct children of a specific item",
+    tags=["Tree Management"],
+    summary="Move item",
+    description="Move an item together with its subtree under a new parent",
     responses={
         200: {
-            "description": "List of children items",
+            "description": "Item moved successfully",
             "content": {
                 "application/json": {
                     "example": {
-                        "result": [
-                            {"id": 2, "parent": 1, "type": "test"},
-                            {"id": 3, "parent": 1, "type": "test"},
-                        ]
+                        "result": {
+                            "status": "moved",
+                            "item": {"id": 4, "parent": 3, "type": "test"},
+                        }
                     }
                 }
             },
         },
+        400: {"description": "Unknown parent or move into own subtree"},
+        404: {"description": "Item not found"},
         500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
     },
 )
-def get_children(request: ItemIdRequest) -> TreeStoreResponse:
-    """Get children of an item.
+def move_item(
+    request: MoveItemRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Move item with its subtree in place.
 
     Args:
-        request: ItemIdRequest with parent item ID.
+        request: MoveItemRequest with item ID and new parent.
+        service: Service of the requested tree.
 
     Returns:
-        TreeStoreResponse with children items (empty list if no children).
+        TreeStoreResponse with operation status and moved item.
 
     Raises:
-        HTTPException: If operation fails (500).
+        HTTPException: If item not found (404), move is invalid (400)
+            or operation fails (500).
     """
-    logger.debug("Getting children", extra={"parent_id": request.id})
+    logger.info("Moving item", extra={"item_id": request.id, "parent": request.parent})
     try:
-        result = _tree_service.get_children(request.id)
-        logger.debug("Children retrieved", extra={"parent_id": request.id, "count": len(result)})
+        result = service.move_item(request.id, request.parent)
         return TreeStoreResponse(result=result)
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except ValueError as e:
+        logger.warning("Invalid move", extra={"item_id": request.id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
     except Exception as e:
-        logger.error("Failed to get children", extra={"parent_id": request.id, "error": str(e)}, exc_info=True)
+        logger.error("Failed to move item", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get children",
+            detail="Failed to move item",
         ) from e
 
 
-@app.post(
-    "/api/v1/tree/getAllParents",
+@tree_router.post(
+    "/updateItem",
     response_model=TreeStoreResponse,
-    tags=["Tree Operations"],
-    summary="Get all parents of an item",
-    description="Retrieve all parent items from the given item up to root",
+    tags=["Tree Management"],
+    summary="Update item",
+    description="Update attributes of an item, or of its whole subtree when recursive is set",
     responses={
         200: {
-            "description": "List of parent items",
+            "description": "Items updated successfully",
             "content": {
                 "application/json": {
-                    "example": {
-                        "result": [
-                            {"id": 4, "parent": 2, "type": "test"},
-                            {"id": 2, "parent": 1, "type": "test"},
-                            {"id": 1, "parent": "root"},
-                        ]
-                    }
+                    "example": {"result": {"status": "updated", "items_count": 1}}
                 }
             },
         },
+        404: {"description": "Item not found"},
         500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
     },
 )
-def get_all_parents(request: ItemIdRequest) -> TreeStoreResponse:
-    """Get all parents of an item up to root.
+def update_item(
+    request: UpdateItemRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Update item attributes in place.
 
     Args:
-        request: ItemIdRequest with item ID.
+        request: UpdateItemRequest with item ID, attributes and recursive flag.
+        service: Service of the requested tree.
 
     Returns:
-        TreeStoreResponse with parent items (empty list if item is root).
+        TreeStoreResponse with operation status and updated items count.
 
     Raises:
-        HTTPException: If operation fails (500).
+        HTTPException: If item not found (404) or operation fails (500).
     """
-    logger.debug("Getting all parents", extra={"item_id": request.id})
+    logger.info("Updating item", extra={"item_id": request.id, "recursive": request.recursive})
     try:
-        result = _tree_service.get_all_parents(request.id)
-        logger.debug("Parents retrieved", extra={"item_id": request.id, "count": len(result)})
+        result = service.update_item(request.id, request.attributes, request.recursive)
         return TreeStoreResponse(result=result)
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
     except Exception as e:
-        logger.error("Failed to get all parents", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        logger.error("Failed to update item", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get all parents",
+            detail="Failed to update item",
         ) from e
 
 
-@app.get(
-    "/api/v1/health",
-    tags=["Health"],
-    summary="Health check",
-    description="Check service health and availability",
+@tree_router.post(
+    "/patch",
+    response_model=TreeStoreResponse,
+    tags=["Tree Management"],
+    summary="Apply diff to tree",
+    description=(
+        "Apply added, removed (with subtrees) and changed items to the current tree in time "
+        "proportional to the diff. The diff must be based on the current tree version "
+        "(see health or the previous patch response); otherwise it is rejected with 409."
+    ),
     responses={
         200: {
-            "description": "Service is healthy",
+            "description": "Diff applied successfully",
             "content": {
                 "application/json": {
-                    "example": {"status": "ok"}
+                    "example": {
+                        "result": {"status": "patched", "added": 1, "removed": 3, "changed": 2, "version": 8}
+                    }
+                }
+            },
+        },
+        400: {"description": "Diff does not apply to the current tree"},
+        409: {"description": "Base version does not match the current tree version"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def patch_tree(
+    request: PatchTreeRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Apply a diff to the current tree.
+
+    Args:
+        request: PatchTreeRequest with base version, added, removed and changed items.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with operation status, counts and the new tree version.
+
+    Raises:
+        HTTPException: If the diff is invalid (400), the base version is
+            outdated (409) or operation fails (500).
+    """
+    logger.info(
+        "Patching tree",
+        extra={
+            "base_version": request.base_version,
+            "added": len(request.added),
+            "removed": len(request.removed),
+            "changed": len(request.changed),
+        },
+    )
+    try:
+        result = service.patch_tree(request.base_version, request.added, request.removed, request.changed)
+        return TreeStoreResponse(result=result)
+    except VersionConflictError as e:
+        logger.warning("Patch version conflict", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    except ValueError as e:
+        logger.warning("Invalid patch", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid patch: {str(e)}",
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to patch tree", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to patch tree",
+        ) from e
+
+
+@tree_router.get(
+    "/getAll",
+    response_model=TreeStoreResponse,
+    tags=["Tree Operations"],
+    summary="Get all items",
+    description=(
+        "Retrieve all items from the tree structure. With `limit` or `cursor` the result is one page "
+        "`{items, next_cursor}`; pass `next_cursor` back to get the next page. Cursors are valid "
+        "for the tree version they were issued for: after any change they are rejected with 409 "
+        "and pagination has to restart. `Accept: application/msgpack` returns the same document in "
+        "MessagePack, `Accept: application/vnd.treestore.columns+msgpack` returns items as columns "
+        "(id, parent and attribute arrays) that can be loaded with NumPy."
+    ),
+    responses={
+        200: {
+            "description": "List of all items, or one page of them",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": [
+                            {"id": 1, "parent": "root"},
+                            {"id": 2, "parent": 1, "type": "test"},
+                        ]
+                    }
+                },
+                **_BINARY_CONTENT,
+            },
+        },
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"description": "Invalid cursor"},
+        406: {"description": "None of the media types in Accept is available"},
+        409: {"description": "Tree changed since the cursor was issued"},
+        500: {"description": "Internal server error"},
+    },
+)
+def get_all(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of items per page"),
+    if_none_match: Optional[str] = Header(None),
+    media_type: str = Depends(_negotiate_media_type),
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> Response:
+    """Get all items from the tree.
+
+    Args:
+        cursor: Cursor of the page to fetch.
+        limit: Page size; pagination is used if cursor or limit is given.
+        if_none_match: ETag of the client's cached copy.
+        media_type: Encoding negotiated from the Accept header.
+        service: Service of the requested tree.
+
+    Returns:
+        Response with all items (or one page of them), or 304 if unchanged.
+
+    Raises:
+        HTTPException: If cursor is invalid (400), outdated (409) or operation fails (500).
+    """
+    try:
+        if cursor is None and limit is None:
+            response = _cached_response(
+                service, ("getAll",), lambda tree_store: tree_store.get_all(), if_none_match, media_type
+            )
+        else:
+            response = _cached_page(
+                service,
+                ("getAll",),
+                lambda tree_store, offset, size: tree_store.get_all_page(offset, size),
+                cursor,
+                limit,
+                if_none_match,
+                media_type,
+            )
+        logger.debug("Retrieved all items", extra={"status_code": response.status_code})
+        return response
+    except ValueError as e:
+        logger.warning("Invalid cursor")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except VersionConflictError as e:
+        logger.warning("Outdated cursor", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get all items", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get all items",
+        ) from e
+
+
+@tree_router.post(
+    "/getItem",
+    response_model=TreeStoreResponse,
+    tags=["Tree Operations"],
+    summary="Get item by ID",
+    description="Retrieve a specific item from the tree by its ID",
+    responses={
+        200: {
+            "description": "Item found",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"id": 1, "parent": "root"}}
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+    },
+)
+def get_item(
+    request: ItemIdRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get item by ID.
+
+    Args:
+        request: ItemIdRequest with item ID.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with item data.
+
+    Raises:
+        HTTPException: If item not found (404) or operation fails (500).
+    """
+    logger.debug("Getting item by ID", extra={"item_id": request.id})
+    try:
+        result = service.get_item_by_id(request.id)
+        logger.debug("Item found", extra={"item_id": request.id})
+        return TreeStoreResponse(result=result)
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get item", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get item",
+        ) from e
+
+
+@tree_router.post(
+    "/getChildren",
+    response_model=TreeStoreResponse,
+    tags=["Tree Operations"],
+    summary="Get children of an item",
+    description=(
+        "Retrieve all direct children of a specific item. With `limit` or `cursor` the result is one "
+        "page `{items, next_cursor}` fetched in O(limit) however many children the item has. Cursors "
+        "are valid for the tree version they were issued for and are rejected with 409 after a change. "
+        "Binary encodings are negotiated with the Accept header as in getAll."
+    ),
+    responses={
+        200: {
+            "description": "List of children items, or one page of them",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": [
+                            {"id": 2, "parent": 1, "type": "test"},
+                            {"id": 3, "parent": 1, "type": "test"},
+                        ]
+                    }
+                },
+                **_BINARY_CONTENT,
+            },
+        },
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"description": "Invalid cursor"},
+        406: {"description": "None of the media types in Accept is available"},
+        409: {"description": "Tree changed since the cursor was issued"},
+        500: {"description": "Internal server error"},
+    },
+)
+def get_children(
+    request: ChildrenRequest,
+    if_none_match: Optional[str] = Header(None),
+    media_type: str = Depends(_negotiate_media_type),
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> Response:
+    """Get children of an item.
+
+    Args:
+        request: ChildrenRequest with parent item ID and optional cursor and page size.
+        if_none_match: ETag of the client's cached copy.
+        media_type: Encoding negotiated from the Accept header.
+        service: Service of the requested tree.
+
+    Returns:
+        Response with children items (empty list if no children) or one page
+        of them, or 304 if unchanged.
+
+    Raises:
+        HTTPException: If cursor is invalid (400), outdated (409) or operation fails (500).
+    """
+    logger.debug("Getting children", extra={"parent_id": request.id})
+    try:
+        if request.cursor is None and request.limit is None:
+            response = _cached_response(
+                service,
+                ("getChildren", request.id),
+                lambda tree_store: tree_store.get_children(request.id),
+                if_none_match,
+                media_type,
+            )
+        else:
+            response = _cached_page(
+                service,
+                ("getChildren", request.id),
+                lambda tree_store, offset, size: tree_store.get_children_page(request.id, offset, size),
+                request.cursor,
+                request.limit,
+                if_none_match,
+                media_type,
+            )
+        logger.debug("Children retrieved", extra={"parent_id": request.id})
+        return response
+    except ValueError as e:
+        logger.warning("Invalid cursor", extra={"parent_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except VersionConflictError as e:
+        logger.warning("Outdated cursor", extra={"parent_id": request.id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get children", extra={"parent_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get children",
+        ) from e
+
+
+@tree_router.post(
+    "/getAllParents",
+    response_model=TreeStoreResponse,
+    tags=["Tree Operations"],
+    summary="Get all parents of an item",
+    description=(
+        "Retrieve all parent items from the given item up to root. "
+        "Binary encodings are negotiated with the Accept header as in getAll."
+    ),
+    responses={
+        200: {
+            "description": "List of parent items",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": [
+                            {"id": 4, "parent": 2, "type": "test"},
+                            {"id": 2, "parent": 1, "type": "test"},
+                            {"id": 1, "parent": "root"},
+                        ]
+                    }
+                },
+                **_BINARY_CONTENT,
+            },
+        },
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        406: {"description": "None of the media types in Accept is available"},
+        500: {"description": "Internal server error"},
+    },
+)
+def get_all_parents(
+    request: ItemIdRequest,
+    if_none_match: Optional[str] = Header(None),
+    media_type: str = Depends(_negotiate_media_type),
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> Response:
+    """Get all parents of an item up to root.
+
+    Args:
+        request: ItemIdRequest with item ID.
+        if_none_match: ETag of the client's cached copy.
+        media_type: Encoding negotiated from the Accept header.
+        service: Service of the requested tree.
+
+    Returns:
+        Response with parent items (empty list if item is root), or 304 if unchanged.
+
+    Raises:
+        HTTPException: If operation fails (500).
+    """
+    logger.debug("Getting all parents", extra={"item_id": request.id})
+    try:
+        response = _cached_response(
+            service,
+            ("getAllParents", request.id),
+            lambda tree_store: tree_store.get_all_parents(request.id),
+            if_none_match,
+            media_type,
+        )
+        logger.debug("Parents retrieved", extra={"item_id": request.id})
+        return response
+    except Exception as e:
+        logger.error("Failed to get all parents", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get all parents",
+        ) from e
+
+
+@tree_router.post(
+    "/getItemsBatch",
+    response_model=TreeStoreResponse,
+    tags=["Batch Operations"],
+    summary="Get several items by ID",
+    description="Retrieve several items in one request; missing items map to null",
+    responses={
+        200: {
+            "description": "Map of item ID to item",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"1": {"id": 1, "parent": "root"}, "999": None}}
+                }
+            },
+        },
+        500: {"description": "Internal server error"},
+    },
+)
+def get_items_batch(
+    request: ItemIdsRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get several items by ID.
+
+    Args:
+        request: ItemIdsRequest with item IDs.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with map of item ID to item.
+
+    Raises:
+        HTTPException: If operation fails (500).
+    """
+    logger.debug("Getting items batch", extra={"count": len(request.ids)})
+    try:
+        return TreeStoreResponse(result=service.get_items_batch(request.ids))
+    except Exception as e:
+        logger.error("Failed to get items batch", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get items",
+        ) from e
+
+
+@tree_router.post(
+    "/getChildrenBatch",
+    response_model=TreeStoreResponse,
+    tags=["Batch Operations"],
+    summary="Get children of several items",
+    description="Retrieve direct children of several items in one request",
+    responses={
+        200: {
+            "description": "Map of item ID to list of children",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {
+                            "4": [
+                                {"id": 7, "parent": 4, "type": None},
+                                {"id": 8, "parent": 4, "type": None},
+                            ],
+                            "5": [],
+                        }
+                    }
+                }
+            },
+        },
+        500: {"description": "Internal server error"},
+    },
+)
+def get_children_batch(
+    request: ItemIdsRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get children of several items.
+
+    Args:
+        request: ItemIdsRequest with parent item IDs.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with map of item ID to children.
+
+    Raises:
+        HTTPException: If operation fails (500).
+    """
+    logger.debug("Getting children batch", extra={"count": len(request.ids)})
+    try:
+        return TreeStoreResponse(result=service.get_children_batch(request.ids))
+    except Exception as e:
+        logger.error("Failed to get children batch", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get children",
+        ) from e
+
+
+@tree_router.post(
+    "/getAllParentsBatch",
+    response_model=TreeStoreResponse,
+    tags=["Batch Operations"],
+    summary="Get parents of several items",
+    description="Retrieve parent chains of several items; shared ancestors are walked once",
+    responses={
+        200: {
+            "description": "Map of item ID to list of parents",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {
+                            "4": [
+                                {"id": 2, "parent": 1, "type": "test"},
+                                {"id": 1, "parent": "root"},
+                            ],
+                            "1": [],
+                        }
+                    }
+                }
+            },
+        },
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_all_parents_batch(
+    request: ItemIdsRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get parent chains of several items.
+
+    Args:
+        request: ItemIdsRequest with item IDs.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with map of item ID to parents.
+
+    Raises:
+        HTTPException: If operation fails (500).
+    """
+    logger.debug("Getting parents batch", extra={"count": len(request.ids)})
+    try:
+        return TreeStoreResponse(result=service.get_all_parents_batch(request.ids))
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get parents batch", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get all parents",
+        ) from e
+
+
+@tree_router.post(
+    "/getDepth",
+    response_model=TreeStoreResponse,
+    tags=["Ancestor Queries"],
+    summary="Get item depth",
+    description="Get depth of an item in the tree (root items have depth 0)",
+    responses={
+        200: {
+            "description": "Item depth",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"id": 7, "depth": 3}}
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_depth(
+    request: ItemIdRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get depth of an item.
+
+    Args:
+        request: ItemIdRequest with item ID.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with item ID and depth.
+
+    Raises:
+        HTTPException: If item not found (404) or operation fails (500).
+    """
+    logger.debug("Getting depth", extra={"item_id": request.id})
+    try:
+        return TreeStoreResponse(result=service.get_depth(request.id))
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get depth", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get depth",
+        ) from e
+
+
+@tree_router.post(
+    "/getKthAncestor",
+    response_model=TreeStoreResponse,
+    tags=["Ancestor Queries"],
+    summary="Get k-th ancestor",
+    description="Get the ancestor k levels above an item (null if k exceeds item depth)",
+    responses={
+        200: {
+            "description": "Ancestor item",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"id": 2, "parent": 1, "type": "test"}}
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_kth_ancestor(
+    request: KthAncestorRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get k-th ancestor of an item.
+
+    Args:
+        request: KthAncestorRequest with item ID and k.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with ancestor item or null.
+
+    Raises:
+        HTTPException: If item not found (404) or operation fails (500).
+    """
+    logger.debug("Getting k-th ancestor", extra={"item_id": request.id, "k": request.k})
+    try:
+        return TreeStoreResponse(result=service.get_kth_ancestor(request.id, request.k))
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get k-th ancestor", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get k-th ancestor",
+        ) from e
+
+
+@tree_router.post(
+    "/isAncestor",
+    response_model=TreeStoreResponse,
+    tags=["Ancestor Queries"],
+    summary="Check ancestor",
+    description="Check whether ancestor_id is a proper ancestor of id",
+    responses={
+        200: {
+            "description": "Check result",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"ancestor_id": 2, "id": 7, "is_ancestor": True}}
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def is_ancestor(
+    request: IsAncestorRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Check whether one item is an ancestor of another.
+
+    Args:
+        request: IsAncestorRequest with item ID and candidate ancestor ID.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with check result.
+
+    Raises:
+        HTTPException: If either item not found (404) or operation fails (500).
+    """
+    logger.debug("Checking ancestor", extra={"item_id": request.id, "ancestor_id": request.ancestor_id})
+    try:
+        return TreeStoreResponse(result=service.is_ancestor(request.ancestor_id, request.id))
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id, "ancestor_id": request.ancestor_id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to check ancestor", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to check ancestor",
+        ) from e
+
+
+@tree_router.post(
+    "/getLowestCommonAncestor",
+    response_model=TreeStoreResponse,
+    tags=["Ancestor Queries"],
+    summary="Get lowest common ancestor",
+    description="Get the deepest item that is an ancestor of both items (an item counts as its own ancestor)",
+    responses={
+        200: {
+            "description": "Lowest common ancestor item (null if items are in different trees)",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"id": 2, "parent": 1, "type": "test"}}
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_lowest_common_ancestor(
+    request: LowestCommonAncestorRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get lowest common ancestor of two items.
+
+    Args:
+        request: LowestCommonAncestorRequest with two item IDs.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with ancestor item or null.
+
+    Raises:
+        HTTPException: If either item not found (404) or operation fails (500).
+    """
+    logger.debug("Getting lowest common ancestor", extra={"item_id": request.id, "other_id": request.other_id})
+    try:
+        result = service.get_lowest_common_ancestor(request.id, request.other_id)
+        return TreeStoreResponse(result=result)
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id, "other_id": request.other_id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error(
+            "Failed to get lowest common ancestor",
+            extra={"item_id": request.id, "error": str(e)},
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get lowest common ancestor",
+        ) from e
+
+
+@tree_router.post(
+    "/getDescendants",
+    response_model=TreeStoreResponse,
+    tags=["Subtree Queries"],
+    summary="Get descendants of an item",
+    description=(
+        "Retrieve all descendants of an item in depth-first order with cursor pagination "
+        "and an optional maximum depth. Cursors are valid for the tree version they were issued "
+        "for and are rejected with 409 after a change."
+    ),
+    responses={
+        200: {
+            "description": "Page of descendant items",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {
+                            "items": [
+                                {"id": 4, "parent": 2, "type": "test"},
+                                {"id": 7, "parent": 4, "type": None},
+                            ],
+                            "next_cursor": "eyJvIjoyLCJ2IjowfQ",
+                        }
+                    }
+                }
+            },
+        },
+        400: {"description": "Invalid cursor"},
+        404: {"description": "Item not found"},
+        409: {"description": "Tree changed since the cursor was issued"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_descendants(
+    request: DescendantsRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get one page of descendants of an item.
+
+    Args:
+        request: DescendantsRequest with item ID, cursor, page size and depth limit.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with page items and next cursor.
+
+    Raises:
+        HTTPException: If cursor is invalid (400), item not found (404),
+            cursor is outdated (409) or operation fails (500).
+    """
+    logger.debug("Getting descendants", extra={"item_id": request.id, "limit": request.limit})
+    try:
+        result = service.get_descendants(request.id, request.cursor, request.limit, request.max_depth)
+        return TreeStoreResponse(result=result)
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except ValueError as e:
+        logger.warning("Invalid cursor", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except VersionConflictError as e:
+        logger.warning("Outdated cursor", extra={"item_id": request.id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get descendants", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get descendants",
+        ) from e
+
+
+@tree_router.post(
+    "/getLevel",
+    response_model=TreeStoreResponse,
+    tags=["Subtree Queries"],
+    summary="Get items at a depth below an item",
+    description=(
+        "Retrieve all items exactly `depth` levels below an item, in depth-first order, with cursor "
+        "pagination. Items are found in a per-depth index with two binary searches, so a page costs "
+        "O(log n + limit) however large the subtree is. Cursors are valid for the tree version they "
+        "were issued for and are rejected with 409 after a change."
+    ),
+    responses={
+        200: {
+            "description": "Page of items at the level",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {
+                            "items": [
+                                {"id": 7, "parent": 4, "type": None},
+                                {"id": 8, "parent": 4, "type": None},
+                            ],
+                            "next_cursor": None,
+                            "total": 2,
+                        }
+                    }
+                }
+            },
+        },
+        400: {"description": "Invalid cursor"},
+        404: {"description": "Item not found"},
+        409: {"description": "Tree changed since the cursor was issued"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_level(
+    request: LevelRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get one page of items at a depth below an item.
+
+    Args:
+        request: LevelRequest with item ID, depth, cursor and page size.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with page items, next cursor and total count.
+
+    Raises:
+        HTTPException: If cursor is invalid (400), item not found (404),
+            cursor is outdated (409) or operation fails (500).
+    """
+    logger.debug("Getting level", extra={"item_id": request.id, "depth": request.depth})
+    try:
+        result = service.get_level(request.id, request.depth, request.cursor, request.limit)
+        return TreeStoreResponse(result=result)
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except ValueError as e:
+        logger.warning("Invalid cursor", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except VersionConflictError as e:
+        logger.warning("Outdated cursor", extra={"item_id": request.id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get level", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get level",
+        ) from e
+
+
+@tree_router.post(
+    "/getSubtree",
+    tags=["Subtree Queries"],
+    summary="Export nested subtree",
+    description=(
+        "Get the subtree of an item as nested JSON where every item has a `children` list. "
+        "Items at max_depth levels below the root are returned without `children`. "
+        "The document is streamed while the tree is walked, so large branches are never built in memory. "
+        "Items with their own `children` attribute cannot be exported (400)."
+    ),
+    responses={
+        200: {
+            "description": "Nested subtree",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {
+                            "id": 4,
+                            "parent": 2,
+                            "type": "test",
+                            "children": [
+                                {"id": 7, "parent": 4, "type": None, "children": []},
+                                {"id": 8, "parent": 4, "type": None, "children": []},
+                            ],
+                        }
+                    }
+                }
+            },
+        },
+        400: {
+            "description": "An exported item has a `children` attribute",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Item 7 has a 'children' attribute, which is reserved for nested items"}
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+    },
+)
+def get_subtree(
+    request: SubtreeRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> StreamingResponse:
+    """Stream nested subtree of an item.
+
+    Args:
+        request: SubtreeRequest with item ID and optional depth limit.
+        service: Service of the requested tree.
+
+    Returns:
+        StreamingResponse with ``{"result": <nested item>}`` JSON.
+
+    Raises:
+        HTTPException: If an item has a `children` attribute (400), item not
+            found (404) or export fails to start (500).
+    """
+    logger.debug("Exporting subtree", extra={"item_id": request.id, "max_depth": request.max_depth})
+    try:
+        chunks = service.export_subtree(request.id, request.max_depth)
+        return StreamingResponse(chunks, media_type="application/json")
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except ValueError as e:
+        logger.warning("Subtree cannot be exported", extra={"item_id": request.id, "error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to export subtree", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to export subtree",
+        ) from e
+
+
+@tree_router.post(
+    "/getSubtreeSize",
+    response_model=TreeStoreResponse,
+    tags=["Subtree Queries"],
+    summary="Get subtree size",
+    description="Get number of items in the subtree of an item, including the item itself",
+    responses={
+        200: {
+            "description": "Subtree size",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"id": 2, "subtree_size": 6}}
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_subtree_size(
+    request: ItemIdRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get subtree size of an item.
+
+    Args:
+        request: ItemIdRequest with item ID.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with item ID and subtree size.
+
+    Raises:
+        HTTPException: If item not found (404) or operation fails (500).
+    """
+    logger.debug("Getting subtree size", extra={"item_id": request.id})
+    try:
+        return TreeStoreResponse(result=service.get_subtree_size(request.id))
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get subtree size", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get subtree size",
+        ) from e
+
+
+@tree_router.post(
+    "/getStats",
+    response_model=TreeStoreResponse,
+    tags=["Subtree Queries"],
+    summary="Get subtree aggregates",
+    description=(
+        "Get size, height and sums of numeric attributes (AGGREGATED_ATTRIBUTES) over the subtree "
+        "of an item, including the item itself. Aggregates are maintained on every change."
+    ),
+    responses={
+        200: {
+            "description": "Subtree aggregates",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {"id": 2, "subtree_size": 6, "height": 2, "sums": {"price": 120.5}}
+                    }
+                }
+            },
+        },
+        404: {"description": "Item not found"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def get_stats(
+    request: ItemIdRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get aggregates over the subtree of an item.
+
+    Args:
+        request: ItemIdRequest with item ID.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with subtree size, height and attribute sums.
+
+    Raises:
+        HTTPException: If item not found (404) or operation fails (500).
+    """
+    logger.debug("Getting subtree stats", extra={"item_id": request.id})
+    try:
+        return TreeStoreResponse(result=service.get_subtree_stats(request.id))
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to get subtree stats", extra={"item_id": request.id, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get subtree stats",
+        ) from e
+
+
+@tree_router.post(
+    "/findByAttribute",
+    response_model=TreeStoreResponse,
+    tags=["Tree Operations"],
+    summary="Find items by attribute",
+    description=(
+        "Get all items whose attribute equals the given value, optionally limited to the subtree "
+        "of root_id (the root included). Keys from INDEXED_ATTRIBUTES are served from hash indexes."
+    ),
+    responses={
+        200: {
+            "description": "Matching items",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": [
+                            {"id": 7, "parent": 4, "type": None},
+                            {"id": 8, "parent": 4, "type": None},
+                        ]
+                    }
+                }
+            },
+        },
+        404: {"description": "Root item not found"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def find_by_attribute(
+    request: FindByAttributeRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Find items by attribute value.
+
+    Args:
+        request: FindByAttributeRequest with key, value and optional subtree root.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with matching items.
+
+    Raises:
+        HTTPException: If root item not found (404) or operation fails (500).
+    """
+    logger.debug("Finding items by attribute", extra={"key": request.key, "root_id": request.root_id})
+    try:
+        return TreeStoreResponse(
+            result=service.find_by_attribute(request.key, request.value, request.root_id)
+        )
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.root_id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to find items by attribute", extra={"key": request.key, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to find items by attribute",
+        ) from e
+
+
+@tree_router.post(
+    "/query",
+    response_model=TreeStoreResponse,
+    tags=["Tree Operations"],
+    summary="Query items by attribute filters",
+    description=(
+        "Get items matching all conditions (eq, ne, in, lt, le, gt, ge, between) in depth-first order, "
+        "optionally within the subtree of root_id, with cursor pagination. "
+        "Filters are evaluated as vectorized masks over attribute columns. Cursors are valid for the "
+        "tree version they were issued for and are rejected with 409 after a change."
+    ),
+    responses={
+        200: {
+            "description": "Page of matching items",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {
+                            "ids": [4, 5],
+                            "next_cursor": "eyJvIjoyLCJ2IjowfQ",
+                            "total": 3,
+                        }
+                    }
+                }
+            },
+        },
+        400: {"description": "Invalid condition or cursor"},
+        404: {"description": "Root item not found"},
+        409: {"description": "Tree changed since the cursor was issued"},
+        500: {"description": "Internal server error"},
+        501: {"description": "Not supported by the current storage engine"},
+    },
+)
+def query_items(
+    request: QueryRequest,
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> TreeStoreResponse:
+    """Get one page of items matching attribute filters.
+
+    Args:
+        request: QueryRequest with conditions, subtree root, cursor, page size and fields.
+        service: Service of the requested tree.
+
+    Returns:
+        TreeStoreResponse with page items (or IDs), next cursor and total matches.
+
+    Raises:
+        HTTPException: If a condition or cursor is invalid (400), root item
+            not found (404), cursor is outdated (409) or operation fails (500).
+    """
+    logger.debug("Querying items", extra={"conditions": len(request.conditions), "root_id": request.root_id})
+    conditions = [Condition(condition.key, condition.op, condition.value) for condition in request.conditions]
+    try:
+        result = service.query(conditions, request.root_id, request.cursor, request.limit, request.fields)
+        return TreeStoreResponse(result=result)
+    except ItemNotFoundError as e:
+        logger.warning("Item not found", extra={"item_id": request.root_id})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except ValueError as e:
+        logger.warning("Invalid query", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        ) from e
+    except VersionConflictError as e:
+        logger.warning("Outdated cursor", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        ) from e
+    except UnsupportedOperationError as e:
+        logger.warning("Unsupported operation", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to query items", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to query items",
+        ) from e
+
+
+def _sse_event(event: str, version: int, data: Dict[str, object]) -> str:
+    """Format one Server-Sent Event carrying a tree version."""
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {version}\nevent: {event}\ndata: {payload}\n\n"
+
+
+async def _watch_events(request: Request, service: TreeStoreService, since: int) -> AsyncIterator[str]:
+    """Produce change events after since until the client disconnects.
+
+    Args:
+        request: Streaming request, polled for disconnects.
+        service: Service of the watched tree.
+        since: Last version the client has seen.
+
+    Yields:
+        SSE frames: change events, a reset event when the requested history
+        is no longer retained, and keep-alive comments while idle.
+    """
+    poll = config.watch_heartbeat_seconds
+    shared = _shared_tree is not None and service is _tree_service
+    if shared:
+        poll = min(poll, _SHARED_WATCH_POLL_SECONDS)
+    idle_since = time.monotonic()
+    while not await request.is_disconnected():
+        if shared:
+            await run_in_threadpool(_sync_shared_tree)
+        events = await service.wait_for_changes(since, poll)
+        if events is None:
+            since = service.version
+            yield _sse_event("reset", since, {"type": "reset", "version": since})
+        elif events:
+            for event in events:
+                yield _sse_event("change", event.version, {"version": event.version, **event.change})
+            since = events[-1].version
+        elif time.monotonic() - idle_since < config.watch_heartbeat_seconds:
+            continue
+        else:
+            yield ": keep-alive\n\n"
+        idle_since = time.monotonic()
+
+
+@tree_router.get(
+    "/watch",
+    tags=["Tree Management"],
+    summary="Watch tree changes",
+    description=(
+        "Server-Sent Events stream of tree changes. Every event carries the tree version it produced "
+        "as the SSE id and a compact description of the change (at most 1000 IDs plus a count). "
+        "Clients resume from a version with the `since` parameter or the Last-Event-ID header; "
+        "without either, only changes made after connecting are sent. If the requested version "
+        "is older than the retained history, a `reset` event with the current version is sent "
+        "and the client should reread the tree."
+    ),
+    responses={
+        200: {
+            "description": "Event stream",
+            "content": {
+                "text/event-stream": {
+                    "example": (
+                        'id: 8\nevent: change\ndata: {"version":8,"type":"moved","id":4,"parent":3}\n\n'
+                    )
+                }
+            },
+        },
+        400: {"description": "Invalid Last-Event-ID header"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def watch(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="Last tree version the client has seen"),
+    last_event_id: Optional[str] = Header(None),
+    service: TreeStoreService = Depends(_get_tree_service),
+) -> StreamingResponse:
+    """Stream tree changes as Server-Sent Events.
+
+    Args:
+        request: Incoming request, polled for disconnects.
+        since: Last tree version the client has seen.
+        last_event_id: Value of the Last-Event-ID header sent on reconnect.
+        service: Service of the requested tree.
+
+    Returns:
+        StreamingResponse with text/event-stream body.
+
+    Raises:
+        HTTPException: If Last-Event-ID is not a version (400) or the stream fails to start (500).
+    """
+    if since is None and last_event_id is not None:
+        try:
+            since = int(last_event_id)
+        except ValueError as e:
+            logger.warning("Invalid Last-Event-ID", extra={"last_event_id": last_event_id})
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Last-Event-ID must be a tree version",
+            ) from e
+    logger.debug("Watching tree changes", extra={"since": since})
+    try:
+        if since is None:
+            since = service.version
+        return StreamingResponse(
+            _watch_events(request, service, since),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except Exception as e:
+        logger.error("Failed to start watch stream", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start watch stream",
+        ) from e
+
+
+@app.get(
+    "/api/v1/trees",
+    response_model=TreeStoreResponse,
+    tags=["Named Trees"],
+    summary="List named trees",
+    description=(
+        "List named trees served under `/api/v1/trees/{name}/...`. A tree is created by its first "
+        "`init` or `initStream`. Trees that do not fit into MAX_RESIDENT_ITEMS are spilled to disk "
+        "in least recently used order and loaded back on their next request."
+    ),
+    responses={
+        200: {
+            "description": "Named trees",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": [
+                            {"name": "catalog-a", "resident": True, "version": 3, "items_count": 8},
+                            {"name": "catalog-b", "resident": False, "version": 1},
+                        ]
+                    }
+                }
+            },
+        },
+        500: {"description": "Internal server error"},
+    },
+)
+def list_trees() -> TreeStoreResponse:
+    """List named trees.
+
+    Returns:
+        TreeStoreResponse with name, residency, version and size of every tree.
+
+    Raises:
+        HTTPException: If operation fails (500).
+    """
+    try:
+        return TreeStoreResponse(result=_trees.list_trees())
+    except Exception as e:
+        logger.error("Failed to list trees", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list trees",
+        ) from e
+
+
+@app.delete(
+    "/api/v1/trees/{name}",
+    response_model=TreeStoreResponse,
+    tags=["Named Trees"],
+    summary="Delete named tree",
+    description="Delete a named tree from memory and disk",
+    responses={
+        200: {
+            "description": "Tree deleted",
+            "content": {
+                "application/json": {
+                    "example": {"result": {"status": "deleted", "name": "catalog-a"}}
+                }
+            },
+        },
+        404: {"description": "Tree not found"},
+        500: {"description": "Internal server error"},
+    },
+)
+def delete_tree(name: str) -> TreeStoreResponse:
+    """Delete named tree.
+
+    Args:
+        name: Tree name.
+
+    Returns:
+        TreeStoreResponse with deletion status.
+
+    Raises:
+        HTTPException: If tree not found (404) or operation fails (500).
+    """
+    try:
+        _trees.delete(name)
+        return TreeStoreResponse(result={"status": "deleted", "name": name})
+    except TreeNotFoundError as e:
+        logger.warning("Tree not found", extra={"tree": name})
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to delete tree", extra={"tree": name, "error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete tree",
+        ) from e
+
+
+app.include_router(tree_router, prefix="/api/v1/tree")
+app.include_router(tree_router, prefix="/api/v1/trees/{name}", tags=["Named Trees"])
+
+
+@app.post(
+    "/api/v1/reload",
+    response_model=TreeStoreResponse,
+    tags=["Tree Management"],
+    summary="Reload default tree from its file",
+    description=(
+        "Rebuild the default tree from its source file (`app/data/default_items.json`, or "
+        "SNAPSHOT_PATH) and swap it in atomically; requests keep reading the previous tree until "
+        "the swap, and a file that fails to load leaves it in place. The file is also reloaded "
+        "automatically when it changes (in-memory mode) and on SIGHUP; the state of reloads is "
+        "reported by health."
+    ),
+    responses={
+        200: {
+            "description": "Tree reloaded",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "result": {
+                            "finished_at": "2024-01-01T12:00:00+00:00",
+                            "trigger": "request",
+                            "duration_seconds": 0.012,
+                            "items_count": 8,
+                        }
+                    }
+                }
+            },
+        },
+        422: {"description": "Tree file is missing or invalid"},
+        500: {"description": "Internal server error"},
+    },
+)
+def reload_tree() -> TreeStoreResponse:
+    """Reload the default tree from its source file.
+
+    Returns:
+        TreeStoreResponse with time, duration and items count of the reload.
+
+    Raises:
+        HTTPException: If the file is missing or invalid (422) or reload fails (500).
+    """
+    try:
+        return TreeStoreResponse(result=_reloader.reload())
+    except (FileNotFoundError, ValueError) as e:
+        logger.warning("Invalid tree file", extra={"error": str(e)})
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(e),
+        ) from e
+    except Exception as e:
+        logger.error("Failed to reload tree", extra={"error": str(e)}, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to reload tree",
+        ) from e
+
+
+@app.get(
+    "/api/v1/health",
+    tags=["Health"],
+    summary="Health check",
+    description=(
+        "Check service health and availability. `reload` describes hot reloads of the default tree: "
+        "whether the file is watched, a reload in progress, and the last reload and failure."
+    ),
+    responses={
+        200: {
+            "description": "Service is healthy",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "status": "ok",
+                        "version": 7,
+                        "items_count": 8,
+                        "reload": {
+                            "path": "app/data/default_items.json",
+                            "watching": True,
+                            "running_since": None,
+                            "reloads": 1,
+                            "failures": 0,
+                            "last_reload": {
+                                "finished_at": "2024-01-01T12:00:00+00:00",
+                                "trigger": "file",
+                                "duration_seconds": 0.012,
+                                "items_count": 8,
+                            },
+                            "last_error": None,
+                        },
+                    }
                 }
             },
         },
         503: {"description": "Service unavailable"},
     },
 )
-def health() -> Dict[str, str]:
+def health() -> Dict[str, object]:
     """Health check endpoint.
 
     Returns:
-        Status dictionary indicating service health.
+        Status dictionary with current tree version and size and reload state.
 
     Raises:
         HTTPException: If health check fails (503).
     """
     logger.debug("Health check requested")
     try:
-        _tree_service.get_all_items()
+        snapshot = _tree_service.snapshot
         logger.debug("Health check passed")
-        return {"status": "ok"}
+        return {
+            "status": "ok",
+            "version": snapshot.version,
+            "items_count": len(snapshot.tree_store),
+            "reload": _reloader.status(),
+        }
     except Exception as e:
         logger.error("Health check failed", extra={"error": str(e)}, exc_info=True)
         raise HTTPException(
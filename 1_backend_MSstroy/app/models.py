@@ -1,49 +1,474 @@
-from typing import Dict, List, Optional
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.pagination import page_slice
+from app.query import AttributeColumn, Condition, build_column, evaluate, page
 
 ROOT_PARENT = "root"
 ROOT_ITEM_ID = 1
 
 
+class EulerTour(NamedTuple):
+    """Preorder (Euler tour) layout of the tree.
+
+    Subtree of item X occupies positions tin[X]..tout[X]-1 of the tour.
+    levels[d] lists the positions of items at depth d in increasing order,
+    so items at depth d inside a subtree form one contiguous run of it.
+    """
+
+    order: List[int]
+    tin: Dict[int, int]
+    tout: Dict[int, int]
+    depths: List[int]
+    levels: List[List[int]]
+
+
+class TreeStoreBuilder:
+    """Incremental TreeStore construction from items arriving one at a time.
+
+    Each item is validated and indexed in add(), so the caller does not need
+    to keep the whole input around; derived indexes are built in build().
+    """
+
+    def __init__(
+        self,
+        ancestor_index: bool = False,
+        indexed_attributes: Iterable[str] = (),
+        aggregated_attributes: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Initialize builder with an empty store.
+
+        Args:
+            ancestor_index: Passed through to TreeStore.
+            indexed_attributes: Passed through to TreeStore.
+            aggregated_attributes: Passed through to TreeStore.
+        """
+        self._store = TreeStore(
+            [],
+            ancestor_index=ancestor_index,
+            indexed_attributes=indexed_attributes,
+            aggregated_attributes=aggregated_attributes,
+        )
+
+    def __len__(self) -> int:
+        """Return number of items added so far."""
+        return len(self._store)
+
+    def add(self, item: Dict[str, object]) -> None:
+        """Validate and index one item.
+
+        Args:
+            item: Item dictionary.
+
+        Raises:
+            ValueError: If item has invalid structure or duplicate ID.
+        """
+        self._store._index_item(item)
+        self._store._items.append(item)
+
+    def build(self) -> "TreeStore":
+        """Finish construction.
+
+        Returns:
+            TreeStore with all added items.
+        """
+        self._store._build_indexes()
+        return self._store
+
+
 class TreeStore:
     """Tree structure storage with parent-child relationships."""
 
-    def __init__(self, items: List[Dict[str, object]]) -> None:
+    def __init__(
+        self,
+        items: Iterable[Dict[str, object]],
+        ancestor_index: bool = False,
+        indexed_attributes: Iterable[str] = (),
+        aggregated_attributes: Optional[Iterable[str]] = None,
+    ) -> None:
         """Initialize TreeStore with items.
 
         Args:
-            items: List of dictionaries with 'id' and 'parent' keys.
+            items: Iterable of dictionaries with 'id' and 'parent' keys.
+            ancestor_index: Precompute depths and binary-lifting jump tables
+                for O(log depth) ancestor queries. Off by default: the
+                tables roughly double build time, and without them depth,
+                k-th ancestor and LCA walk the parent chain in O(depth).
+            indexed_attributes: Attribute keys to keep hash indexes for,
+                making find_by_attribute on them O(matches).
+            aggregated_attributes: Numeric attribute keys to sum per subtree.
+                When given (even empty), subtree size, height and these sums
+                are kept for every item and updated on each change, making
+                get_subtree_stats O(1); None computes them on demand.
 
         Raises:
             ValueError: If items contain duplicate IDs or invalid structure.
         """
-        self._items = items
+        self._items: Optional[List[Dict[str, object]]] = []
         self._items_by_id: Dict[int, Dict[str, object]] = {}
         self._children_by_id: Dict[int, List[Dict[str, object]]] = {}
         self._parent_map: Dict[int, Optional[int]] = {}
 
-        seen_ids = set()
+        self._depth: Optional[Dict[int, int]] = {} if ancestor_index else None
+        self._jumps: Optional[Dict[int, List[int]]] = {} if ancestor_index else None
+        self._tour: Optional[EulerTour] = None
+        self._structure_generation = 0
+        self._attribute_indexes: Dict[str, Dict[Tuple[type, object], Dict[int, None]]] = {
+            key: {} for key in indexed_attributes
+        }
+        self._columns: Dict[str, AttributeColumn] = {}
+        self._aggregated_attributes: Tuple[str, ...] = tuple(aggregated_attributes or ())
+        self._aggregates: Optional[Dict[int, List[float]]] = {} if aggregated_attributes is not None else None
+
         for item in items:
-            item_id = item.get("id")
-            if item_id is None:
-                raise ValueError("Item must have 'id' field")
-            if not isinstance(item_id, int):
-                raise ValueError(f"Item ID must be integer, got {type(item_id)}")
-            if item_id in seen_ids:
-                raise ValueError(f"Duplicate item ID: {item_id}")
-            seen_ids.add(item_id)
+            self._index_item(item)
+            self._items.append(item)
+        self._build_indexes()
+
+    def __len__(self) -> int:
+        """Return number of items in the store."""
+        return len(self._items_by_id)
+
+    def _build_indexes(self) -> None:
+        """Validate structure and build derived indexes (Euler tour, ancestor tables).
+
+        Raises:
+            ValueError: If items reference missing parents or form parent cycles.
+        """
+        root_ids = self._get_root_ids()
+        self._tour = self._build_tour(root_ids)
+        self._check_structure(root_ids, self._tour)
+        if self._jumps is not None:
+            self._depth.clear()
+            self._jumps.clear()
+            self._index_ancestors(root_ids)
+        if self._aggregates is not None:
+            self._aggregates.clear()
+            self._aggregate_nodes(self._tour.order, self._aggregates)
+
+    def _check_structure(self, root_ids: List[int], tour: EulerTour) -> None:
+        """Check that every item is reachable from a real root.
+
+        Orphans are roots whose parent ID does not exist. Items in a parent
+        cycle are never reached from a root, so the tour is shorter than the
+        store; only then are the unreached items walked up with three-colour
+        marking to single out the cycle members. O(n) overall, and O(roots)
+        for a valid tree.
+
+        Args:
+            root_ids: IDs the tour was started from.
+            tour: Euler tour built from root_ids.
+
+        Raises:
+            ValueError: Listing all orphan IDs and all IDs on parent cycles.
+        """
+        orphan_ids = [item_id for item_id in root_ids if self._parent_map[item_id] is not None]
+        cycle_ids: List[int] = []
+        if len(tour.order) != len(self._items_by_id):
+            state: Dict[int, int] = {}
+            for start_id in self._items_by_id:
+                if start_id in tour.tin or start_id in state:
+                    continue
+                path = []
+                item_id = start_id
+                while item_id not in tour.tin and item_id not in state:
+                    state[item_id] = len(path)
+                    path.append(item_id)
+                    item_id = self._parent_map[item_id]
+                if state.get(item_id, -1) >= 0:
+                    cycle_ids.extend(path[state[item_id]:])
+                for path_id in path:
+                    state[path_id] = -1
+
+        errors = []
+        if orphan_ids:
+            errors.append(f"parents not found for items {orphan_ids}")
+        if cycle_ids:
+            errors.append(f"parent cycle through items {cycle_ids}")
+        if errors:
+            raise ValueError("Invalid tree structure: " + "; ".join(errors))
+
+    def _index_item(self, item: Dict[str, object]) -> None:
+        """Validate item and add it to id, parent and children indexes.
+
+        Args:
+            item: Item dictionary.
+
+        Raises:
+            ValueError: If item has invalid structure or duplicate ID.
+        """
+        item_id = item.get("id")
+        if item_id is None:
+            raise ValueError("Item must have 'id' field")
+        if not isinstance(item_id, int):
+            raise ValueError(f"Item ID must be integer, got {type(item_id)}")
+        if item_id in self._items_by_id:
+            raise ValueError(f"Duplicate item ID: {item_id}")
+
+        parent = item.get("parent")
+        if parent == ROOT_PARENT:
+            parent = None
+        elif parent is not None and not isinstance(parent, int):
+            raise ValueError(f"Parent must be integer or 'root', got {type(parent)}")
+
+        self._items_by_id[item_id] = item
+        self._attach(item, parent)
+        self._index_attributes(item)
+
+    def _attach(self, item: Dict[str, object], parent: Optional[int]) -> None:
+        """Link item to parent in parent map and children index.
+
+        Args:
+            item: Item dictionary (already present in id index).
+            parent: Parent ID or None for root items.
+        """
+        self._parent_map[item["id"]] = parent
+        if parent is not None or item.get("parent") != ROOT_PARENT:
+            self._children_by_id.setdefault(parent, []).append(item)
+
+    def _detach(self, item: Dict[str, object]) -> None:
+        """Unlink item from its parent's children list.
 
+        Runs in O(number of siblings).
+
+        Args:
+            item: Item dictionary.
+        """
+        parent = self._parent_map.get(item["id"])
+        if parent is None and item.get("parent") == ROOT_PARENT:
+            return
+        siblings = self._children_by_id.get(parent, [])
+        for index, sibling in enumerate(siblings):
+            if sibling is item:
+                del siblings[index]
+                break
+        if not siblings:
+            self._children_by_id.pop(parent, None)
+
+    def _replace_items(self, replacements: Dict[int, Dict[str, object]]) -> None:
+        """Swap stored item dicts for updated copies with the same ID and parent.
+
+        Item dicts are never modified once stored, so an item that a reader
+        already holds stays a consistent version of it. Runs in O(number of
+        replaced items + siblings walked to find them).
+
+        Args:
+            replacements: New item dicts by ID.
+        """
+        by_parent: Dict[Optional[int], Dict[int, Dict[str, object]]] = {}
+        for item_id, item in replacements.items():
             self._items_by_id[item_id] = item
+            by_parent.setdefault(self._parent_map[item_id], {})[item_id] = item
+        for parent, group in by_parent.items():
+            remaining = len(group)
+            siblings = self._children_by_id.get(parent, [])
+            for index, sibling in enumerate(siblings):
+                replacement = group.get(sibling["id"])
+                if replacement is not None:
+                    siblings[index] = replacement
+                    remaining -= 1
+                    if not remaining:
+                        break
+        self._items = None
+
+    def _index_attributes(self, item: Dict[str, object]) -> None:
+        """Add item to attribute indexes.
+
+        Unhashable values are not indexed; lookups for them fall back to a scan.
+
+        Args:
+            item: Item dictionary.
+        """
+        for key, index in self._attribute_indexes.items():
+            if key in item:
+                value_key = _value_key(item[key])
+                if value_key is not None:
+                    index.setdefault(value_key, {})[item["id"]] = None
+
+    def _unindex_attributes(self, item: Dict[str, object]) -> None:
+        """Remove item from attribute indexes.
+
+        Args:
+            item: Item dictionary.
+        """
+        for key, index in self._attribute_indexes.items():
+            if key in item:
+                value_key = _value_key(item[key])
+                bucket = index.get(value_key) if value_key is not None else None
+                if bucket is not None:
+                    bucket.pop(item["id"], None)
+                    if not bucket:
+                        del index[value_key]
+
+    def _aggregate_nodes(self, ids: Sequence[int], aggregates: Dict[int, List[float]]) -> List[float]:
+        """Compute aggregates bottom-up for a preorder sequence of items.
+
+        Each entry is [subtree size, height, *sums of aggregated attributes].
+        Children of an item must either follow it in ids or already have
+        entries in aggregates.
+
+        Args:
+            ids: Item IDs in preorder (e.g. a tour or a subtree).
+            aggregates: Mapping to store entries in.
+
+        Returns:
+            Entry of the first item in ids.
+        """
+        entry: List[float] = []
+        for item_id in reversed(ids):
+            item = self._items_by_id[item_id]
+            entry = [1, 0]
+            for key in self._aggregated_attributes:
+                value = item.get(key)
+                is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                entry.append(value if is_number else 0)
+            for child in self._children_by_id.get(item_id, ()):
+                child_entry = aggregates[child["id"]]
+                entry[0] += child_entry[0]
+                entry[1] = max(entry[1], child_entry[1] + 1)
+                for index in range(2, len(entry)):
+                    entry[index] += child_entry[index]
+            aggregates[item_id] = entry
+        return entry
+
+    def _propagate_aggregates(
+        self,
+        item_id: Optional[int],
+        delta: List[float],
+        sign: int,
+        heights: bool = True,
+    ) -> None:
+        """Apply a subtree entry change to item_id and all its ancestors.
+
+        Sizes and sums are shifted by sign * delta in O(depth). Heights are
+        updated while they keep changing: attaching only raises them, and
+        detaching rescans children only of an ancestor whose height came
+        from the detached branch.
+
+        Args:
+            item_id: First item to update (parent of the changed subtree); None for no-op.
+            delta: Entry of the attached/detached subtree.
+            sign: 1 when attaching, -1 when detaching.
+            heights: Whether the change can affect heights.
+        """
+        child_height = delta[1]
+        while item_id is not None and item_id in self._aggregates:
+            entry = self._aggregates[item_id]
+            entry[0] += sign * delta[0]
+            for index in range(2, len(entry)):
+                entry[index] += sign * delta[index]
+            if heights:
+                height = entry[1]
+                if sign > 0:
+                    entry[1] = max(height, child_height + 1)
+                    child_height = entry[1]
+                elif child_height + 1 >= height:
+                    entry[1] = max(
+                        (self._aggregates[child["id"]][1] + 1 for child in self._children_by_id.get(item_id, ())),
+                        default=0,
+                    )
+                    child_height = height
+                heights = entry[1] != height
+            item_id = self._parent_map.get(item_id)
+
+    def _index_ancestors(self, start_ids: Iterable[int]) -> None:
+        """Compute depth and jump table for subtrees rooted at start_ids.
+
+        jumps[id][k] is the ancestor 2**k levels above id. Parents of start
+        items must already be indexed (or be absent, making the item a root).
 
-            parent = item.get("parent")
-            if parent != ROOT_PARENT:
-                if parent is not None and not isinstance(parent, int):
-                    raise ValueError(f"Parent must be integer or 'root', got {type(parent)}")
-                self._parent_map[item_id] = parent
-                if parent not in self._children_by_id:
-                    self._children_by_id[parent] = []
-                self._children_by_id[parent].append(item)
+        Args:
+            start_ids: IDs of subtree roots to (re)index.
+        """
+        if self._jumps is None:
+            return
+        queue = deque(start_ids)
+        while queue:
+            item_id = queue.popleft()
+            parent = self._parent_map.get(item_id)
+            if parent is None or parent not in self._depth:
+                self._depth[item_id] = 0
+                self._jumps[item_id] = []
             else:
-                self._parent_map[item_id] = None
+                self._depth[item_id] = self._depth[parent] + 1
+                jumps = [parent]
+                while True:
+                    upper = self._jumps[jumps[-1]]
+                    if len(jumps) > len(upper):
+                        break
+                    jumps.append(upper[len(jumps) - 1])
+                self._jumps[item_id] = jumps
+            queue.extend(child["id"] for child in self._children_by_id.get(item_id, []))
+
+    def _get_root_ids(self) -> List[int]:
+        """Get IDs of items without an existing parent.
+
+        Returns:
+            Root item IDs in insertion order.
+        """
+        return [
+            item_id for item_id, parent in self._parent_map.items()
+            if parent is None or parent not in self._items_by_id
+        ]
+
+    def _build_tour(self, root_ids: Optional[List[int]] = None) -> EulerTour:
+        """Build Euler tour with an iterative depth-first traversal.
+
+        Args:
+            root_ids: Precomputed result of _get_root_ids.
+
+        Returns:
+            EulerTour of the whole forest.
+        """
+        if root_ids is None:
+            root_ids = self._get_root_ids()
+        order: List[int] = []
+        tin: Dict[int, int] = {}
+        tout: Dict[int, int] = {}
+        depths: List[int] = []
+        levels: List[List[int]] = []
+        stack: List[Tuple[int, int]] = [(root_id, 0) for root_id in reversed(root_ids)]
+        while stack:
+            item_id, depth = stack.pop()
+            if depth < 0:
+                tout[item_id] = len(order)
+                continue
+            tin[item_id] = len(order)
+            if depth == len(levels):
+                levels.append([])
+            levels[depth].append(len(order))
+            order.append(item_id)
+            depths.append(depth)
+            stack.append((item_id, -1))
+            children = self._children_by_id.get(item_id)
+            if children:
+                stack.extend((child["id"], depth + 1) for child in reversed(children))
+        return EulerTour(order, tin, tout, depths, levels)
+
+    def _get_tour(self) -> EulerTour:
+        """Get Euler tour, rebuilding it if a structural change invalidated it.
+
+        Returns:
+            Current EulerTour.
+        """
+        tour = self._tour
+        if tour is None:
+            generation = self._structure_generation
+            tour = self._build_tour()
+            if generation == self._structure_generation:
+                self._tour = tour
+        return tour
+
+    def _invalidate_tour(self) -> None:
+        """Drop Euler tour after a structural change.
+
+        The generation counter keeps a reader that started rebuilding before
+        the change from publishing its outdated tour.
+        """
+        self._structure_generation += 1
+        self._tour = None
+        self._columns = {}
 
     def get_all(self) -> List[Dict[str, object]]:
         """Get all items in the store.
@@ -51,6 +476,8 @@ class TreeStore:
         Returns:
             List of all items.
         """
+        if self._items is None:
+            self._items = list(self._items_by_id.values())
         return self._items
 
     def get_item(self, item_id: int) -> Optional[Dict[str, object]]:
@@ -75,6 +502,39 @@ class TreeStore:
         """
         return self._children_by_id.get(item_id, [])
 
+    def get_all_page(self, offset: int, limit: int) -> Tuple[List[Dict[str, object]], Optional[int]]:
+        """Get one page of all items.
+
+        The item list is built once per structural version, after that a
+        page costs O(limit).
+
+        Args:
+            offset: Position of the first item of the page.
+            limit: Maximum number of items to return.
+
+        Returns:
+            Tuple of (items, next_offset); next_offset is None on the last page.
+        """
+        return page_slice(self.get_all(), offset, limit)
+
+    def get_children_page(
+        self,
+        item_id: int,
+        offset: int,
+        limit: int,
+    ) -> Tuple[List[Dict[str, object]], Optional[int]]:
+        """Get one page of children of an item in O(limit).
+
+        Args:
+            item_id: ID of the parent item.
+            offset: Position of the first child of the page.
+            limit: Maximum number of children to return.
+
+        Returns:
+            Tuple of (children, next_offset); next_offset is None on the last page.
+        """
+        return page_slice(self._children_by_id.get(item_id, []), offset, limit)
+
     def _get_parent_id(self, item_id: int) -> Optional[int]:
         """Get parent ID for given item.
 
@@ -116,22 +576,772 @@ class TreeStore:
             List of parent items from direct parent to root.
         """
         result = []
-        current_id = item_id
+        if item_id not in self._items_by_id:
+            return result
 
+        current_id = self._get_parent_id(item_id)
         while current_id is not None:
             item = self._items_by_id.get(current_id)
             if item is None:
                 break
+            result.append(item)
+            current_id = self._get_parent_id(current_id)
 
-            if current_id != item_id:
-                result.append(item)
+        return result
 
-            parent = self._get_parent_id(current_id)
-            if parent is None:
-                root_item = self._get_root_item()
-                if root_item:
-                    result.append(root_item)
-                break
-            current_id = parent
+    def get_all_parents_batch(self, item_ids: Iterable[int]) -> Dict[int, List[Dict[str, object]]]:
+        """Get parent chains of several items, walking shared ancestors once.
+
+        Each walk stops at the first ancestor whose chain is already known
+        and reuses it, so overlapping chains cost one traversal in total.
+
+        Args:
+            item_ids: IDs of items to get parents for.
+
+        Returns:
+            Mapping of item ID to its parent items from direct parent to root.
+        """
+        chains: Dict[int, List[Dict[str, object]]] = {}
+        result: Dict[int, List[Dict[str, object]]] = {}
+        for item_id in item_ids:
+            if item_id not in self._items_by_id:
+                result[item_id] = []
+                continue
+            path = []
+            current_id: Optional[int] = item_id
+            while current_id is not None and current_id not in chains and current_id in self._items_by_id:
+                path.append(current_id)
+                current_id = self._parent_map.get(current_id)
+            tail = chains.get(current_id, [])
+            for path_id in reversed(path):
+                parent_id = self._parent_map.get(path_id)
+                if parent_id is None or parent_id not in self._items_by_id:
+                    chains[path_id] = []
+                else:
+                    chains[path_id] = [self._items_by_id[parent_id]] + tail
+                tail = chains[path_id]
+            result[item_id] = chains[item_id]
+        return result
+
+    def _get_subtree_ids(self, item_id: int) -> List[int]:
+        """Collect IDs of item and all its descendants.
+
+        Args:
+            item_id: ID of the subtree root.
+
+        Returns:
+            List of IDs in depth-first order, starting with item_id.
+        """
+        result = []
+        stack = [item_id]
+        while stack:
+            current_id = stack.pop()
+            result.append(current_id)
+            children = self._children_by_id.get(current_id, [])
+            stack.extend(child["id"] for child in reversed(children))
+        return result
+
+    def _resolve_parent(self, parent: object, pending: Dict[int, Dict[str, object]]) -> Optional[int]:
+        """Validate parent reference of a new item.
+
+        Args:
+            parent: Value of the 'parent' field.
+            pending: Items being added in the same batch, by ID.
+
+        Returns:
+            Parent ID or None for root items.
+
+        Raises:
+            ValueError: If parent is neither 'root' nor an existing item ID.
+        """
+        if parent == ROOT_PARENT or parent is None:
+            return None
+        if not isinstance(parent, int):
+            raise ValueError(f"Parent must be integer or 'root', got {type(parent)}")
+        if parent not in self._items_by_id and parent not in pending:
+            raise ValueError(f"Parent item {parent} not found")
+        return parent
+
+    def add_items(self, items: List[Dict[str, object]]) -> int:
+        """Add new items (a single node or a whole subtree) to the tree.
+
+        Items in the batch may reference each other as parents in any order.
+        The batch is validated first, so the store is left unchanged on error.
+        Runs in O(len(items)).
+
+        Args:
+            items: Items with 'id' and 'parent' keys.
+
+        Returns:
+            Number of added items.
+
+        Raises:
+            ValueError: If an ID already exists, a parent cannot be resolved
+                or items of the batch form a parent cycle.
+        """
+        pending: Dict[int, Dict[str, object]] = {}
+        for item in items:
+            item_id = item.get("id")
+            if not isinstance(item_id, int):
+                raise ValueError(f"Item ID must be integer, got {type(item_id)}")
+            if item_id in self._items_by_id or item_id in pending:
+                raise ValueError(f"Duplicate item ID: {item_id}")
+            pending[item_id] = item
+        for item in items:
+            self._resolve_parent(item.get("parent"), pending)
+        _check_batch_acyclic(pending)
+
+        for item in items:
+            self._index_item(item)
+            if self._items is not None:
+                self._items.append(item)
+        attached_ids = [item["id"] for item in items if self._parent_map[item["id"]] not in pending]
+        self._index_ancestors(attached_ids)
+        if self._aggregates is not None:
+            for item_id in attached_ids:
+                entry = self._aggregate_nodes(self._get_subtree_ids(item_id), self._aggregates)
+                self._propagate_aggregates(self._parent_map[item_id], entry, 1)
+        self._invalidate_tour()
+        return len(items)
+
+    def remove_item(self, item_id: int, recursive: bool = False) -> List[int]:
+        """Remove item, optionally together with its subtree.
+
+        Runs in O(size of removed subtree + number of siblings).
+
+        Args:
+            item_id: ID of the item to remove.
+            recursive: Remove all descendants too. If False, the item must be a leaf.
+
+        Returns:
+            IDs of removed items.
+
+        Raises:
+            KeyError: If item not found.
+            ValueError: If item has children and recursive is False.
+        """
+        item = self._items_by_id.get(item_id)
+        if item is None:
+            raise KeyError(item_id)
+        if not recursive and self._children_by_id.get(item_id):
+            raise ValueError(f"Item {item_id} has children, use recursive removal")
+
+        removed_ids = self._get_subtree_ids(item_id)
+        self._detach(item)
+        if self._aggregates is not None:
+            self._propagate_aggregates(self._parent_map[item_id], self._aggregates[item_id], -1)
+        for removed_id in removed_ids:
+            self._unindex_attributes(self._items_by_id.pop(removed_id))
+            self._parent_map.pop(removed_id)
+            self._children_by_id.pop(removed_id, None)
+            if self._jumps is not None:
+                self._depth.pop(removed_id, None)
+                self._jumps.pop(removed_id, None)
+            if self._aggregates is not None:
+                self._aggregates.pop(removed_id, None)
+        self._items = None
+        self._invalidate_tour()
+        return removed_ids
 
+    def move_item(self, item_id: int, parent: object) -> None:
+        """Move item with its whole subtree under a new parent.
+
+        Runs in O(depth of new parent + number of siblings), plus
+        O(subtree size * log depth) to reindex ancestors of the moved subtree.
+
+        Args:
+            item_id: ID of the item to move.
+            parent: New parent ID or 'root'.
+
+        Raises:
+            KeyError: If item not found.
+            ValueError: If new parent is missing or lies inside the moved subtree.
+        """
+        item = self._items_by_id.get(item_id)
+        if item is None:
+            raise KeyError(item_id)
+        new_parent = self._resolve_parent(parent, {})
+
+        ancestor_id = new_parent
+        while ancestor_id is not None:
+            if ancestor_id == item_id:
+                raise ValueError(f"Cannot move item {item_id} into its own subtree")
+            ancestor_id = self._parent_map.get(ancestor_id)
+
+        self._detach(item)
+        if self._aggregates is not None:
+            self._propagate_aggregates(self._parent_map[item_id], self._aggregates[item_id], -1)
+        item = {**item, "parent": ROOT_PARENT if new_parent is None else new_parent}
+        self._items_by_id[item_id] = item
+        self._items = None
+        self._attach(item, new_parent)
+        self._index_ancestors([item_id])
+        if self._aggregates is not None:
+            self._propagate_aggregates(new_parent, self._aggregates[item_id], 1)
+        self._invalidate_tour()
+
+    def update_item(self, item_id: int, attributes: Dict[str, object], recursive: bool = False) -> List[int]:
+        """Update non-structural attributes of item, optionally of its subtree.
+
+        Structure indexes are untouched, so this runs in O(updated items),
+        plus the siblings walked to swap in the updated copies.
+
+        Args:
+            item_id: ID of the item to update.
+            attributes: Attributes to set; 'id' and 'parent' are not allowed.
+            recursive: Apply attributes to all descendants too.
+
+        Returns:
+            IDs of updated items.
+
+        Raises:
+            KeyError: If item not found.
+            ValueError: If attributes contain 'id' or 'parent'.
+        """
+        if item_id not in self._items_by_id:
+            raise KeyError(item_id)
+        if "id" in attributes or "parent" in attributes:
+            raise ValueError("Use move_item to change 'parent'; 'id' cannot be changed")
+
+        updated_ids = self._get_subtree_ids(item_id) if recursive else [item_id]
+        self._apply_attributes(updated_ids, attributes)
+        self._columns = {}
+        return updated_ids
+
+    def _apply_attributes(self, updated_ids: List[int], attributes: Dict[str, object], replace: bool = False) -> None:
+        """Set attributes of items and refresh attribute indexes and aggregates.
+
+        Args:
+            updated_ids: Item IDs in preorder; the first one is the root of
+                the updated part, the rest (if any) its whole subtree.
+            attributes: Non-structural attributes to set.
+            replace: Drop attributes that are not in attributes.
+        """
+        previous = None if self._aggregates is None else list(self._aggregates[updated_ids[0]])
+        replacements = {}
+        for updated_id in updated_ids:
+            item = self._items_by_id[updated_id]
+            self._unindex_attributes(item)
+            if replace:
+                item = {key: value for key, value in item.items() if key == "id" or key == "parent"}
+            replacements[updated_id] = {**item, **attributes}
+            self._index_attributes(replacements[updated_id])
+        self._replace_items(replacements)
+        if previous is not None:
+            current = self._aggregate_nodes(updated_ids, self._aggregates)
+            delta = [new - old for new, old in zip(current, previous)]
+            self._propagate_aggregates(self._parent_map[updated_ids[0]], delta, 1, heights=False)
+
+    def apply_patch(
+        self,
+        added: List[Dict[str, object]],
+        removed: List[int],
+        changed: List[Dict[str, object]],
+    ) -> Dict[str, int]:
+        """Apply a diff against the current tree in O(diff * depth).
+
+        The whole diff is validated before anything is changed, so the store
+        is left untouched on error. Then it is applied in this order:
+
+        1. removed items are removed with their subtrees;
+        2. added items are added (they may reference each other);
+        3. changed items get their new parent. Moves are ordered so that the
+           final ancestors of an item are placed before the item itself, so
+           no intermediate step creates a cycle;
+        4. changed items get their new attributes (the changed item replaces
+           the stored one, so omitted attributes are dropped).
+
+        Args:
+            added: New items.
+            removed: IDs of items to remove together with their subtrees.
+            changed: New versions of existing items (matched by 'id'). They
+                must state 'parent', since a missing key would read as a
+                move to the root.
+
+        Returns:
+            Dictionary with counts of added, removed (including descendants)
+            and changed items.
+
+        Raises:
+            ValueError: If the diff does not apply to the current tree or the
+                result would contain a parent cycle.
+        """
+        removed_ids = set()
+        for item_id in removed:
+            if item_id not in self._items_by_id:
+                raise ValueError(f"Removed item {item_id} not found")
+            if item_id not in removed_ids:
+                removed_ids.update(self._get_subtree_ids(item_id))
+
+        added_by_id: Dict[int, Dict[str, object]] = {}
+        for item in added:
+            item_id = item.get("id")
+            if not isinstance(item_id, int):
+                raise ValueError(f"Item ID must be integer, got {type(item_id)}")
+            if (item_id in self._items_by_id and item_id not in removed_ids) or item_id in added_by_id:
+                raise ValueError(f"Duplicate item ID: {item_id}")
+            added_by_id[item_id] = item
+
+        def resolve(parent: object) -> Optional[int]:
+            parent_id = self._resolve_parent(parent, added_by_id)
+            if parent_id in removed_ids and parent_id not in added_by_id:
+                raise ValueError(f"Parent item {parent_id} is removed by the patch")
+            return parent_id
+
+        for item in added:
+            resolve(item.get("parent"))
+        _check_batch_acyclic(added_by_id)
+
+        moves: Dict[int, Optional[int]] = {}
+        for item in changed:
+            item_id = item.get("id")
+            if item_id not in self._items_by_id or item_id in removed_ids:
+                raise ValueError(f"Changed item {item_id} not found")
+            if "parent" not in item:
+                raise ValueError(f"Changed item {item_id} must have 'parent'")
+            parent_id = resolve(item.get("parent"))
+            if parent_id != self._parent_map[item_id]:
+                moves[item_id] = parent_id
+
+        def final_parent(item_id: int) -> Optional[int]:
+            if item_id in moves:
+                return moves[item_id]
+            if item_id in added_by_id:
+                return self._resolve_parent(added_by_id[item_id].get("parent"), added_by_id)
+            return self._parent_map.get(item_id)
+
+        moved_above: Dict[int, int] = {}
+        for item_id in moves:
+            seen = {item_id}
+            count = 0
+            ancestor_id = final_parent(item_id)
+            while ancestor_id is not None:
+                if ancestor_id in seen:
+                    raise ValueError(f"Patch creates a parent cycle through item {ancestor_id}")
+                seen.add(ancestor_id)
+                count += ancestor_id in moves
+                ancestor_id = final_parent(ancestor_id)
+            moved_above[item_id] = count
+
+        removed_count = 0
+        for item_id in removed:
+            if item_id in self._items_by_id:
+                removed_count += len(self.remove_item(item_id, recursive=True))
+        if added:
+            self.add_items(added)
+        for item_id in sorted(moves, key=moved_above.__getitem__):
+            self.move_item(item_id, ROOT_PARENT if moves[item_id] is None else moves[item_id])
+        for item in changed:
+            attributes = {key: value for key, value in item.items() if key != "id" and key != "parent"}
+            self._apply_attributes([item["id"]], attributes, replace=True)
+        if changed:
+            self._columns = {}
+        return {"added": len(added), "removed": removed_count, "changed": len(changed)}
+
+    def _get_ancestor_ids(self, item_id: int) -> List[int]:
+        """Collect ancestor IDs by walking the parent chain.
+
+        Args:
+            item_id: ID of the item.
+
+        Returns:
+            Ancestor IDs from direct parent to root.
+        """
+        result = []
+        current_id = self._parent_map.get(item_id)
+        while current_id is not None and current_id in self._items_by_id:
+            result.append(current_id)
+            current_id = self._parent_map.get(current_id)
         return result
+
+    def get_depth(self, item_id: int) -> int:
+        """Get depth of item (root items have depth 0).
+
+        Args:
+            item_id: ID of the item.
+
+        Returns:
+            Number of ancestors of the item.
+
+        Raises:
+            KeyError: If item not found.
+        """
+        if item_id not in self._items_by_id:
+            raise KeyError(item_id)
+        if self._depth is not None:
+            return self._depth[item_id]
+        return len(self._get_ancestor_ids(item_id))
+
+    def _lift(self, item_id: int, k: int) -> int:
+        """Get ID of the ancestor k levels above item using jump tables.
+
+        k must not exceed the depth of the item.
+        """
+        bit = 0
+        while k:
+            if k & 1:
+                item_id = self._jumps[item_id][bit]
+            k >>= 1
+            bit += 1
+        return item_id
+
+    def get_kth_ancestor(self, item_id: int, k: int) -> Optional[Dict[str, object]]:
+        """Get ancestor k levels above item in O(log depth) with the ancestor index, else O(depth).
+
+        Args:
+            item_id: ID of the item.
+            k: Number of levels to go up; 0 returns the item itself.
+
+        Returns:
+            Ancestor item or None if k exceeds item depth.
+
+        Raises:
+            KeyError: If item not found.
+            ValueError: If k is negative.
+        """
+        if k < 0:
+            raise ValueError("k must be non-negative")
+        depth = self.get_depth(item_id)
+        if k > depth:
+            return None
+        if self._jumps is not None:
+            return self._items_by_id[self._lift(item_id, k)]
+        if k == 0:
+            return self._items_by_id[item_id]
+        return self._items_by_id[self._get_ancestor_ids(item_id)[k - 1]]
+
+    def is_ancestor(self, ancestor_id: int, item_id: int) -> bool:
+        """Check whether ancestor_id is a proper ancestor of item_id (O(log depth) or O(depth)).
+
+        Args:
+            ancestor_id: ID of the candidate ancestor.
+            item_id: ID of the item.
+
+        Returns:
+            True if ancestor_id lies on the path from item's parent to root.
+
+        Raises:
+            KeyError: If either item not found.
+        """
+        difference = self.get_depth(item_id) - self.get_depth(ancestor_id)
+        if difference <= 0:
+            return False
+        return self.get_kth_ancestor(item_id, difference)["id"] == ancestor_id
+
+    def get_lowest_common_ancestor(self, first_id: int, second_id: int) -> Optional[Dict[str, object]]:
+        """Get lowest common ancestor of two items (O(log depth) or O(depth)).
+
+        An item is considered its own ancestor here, so the LCA of an item
+        and its descendant is the item itself.
+
+        Args:
+            first_id: ID of the first item.
+            second_id: ID of the second item.
+
+        Returns:
+            Lowest common ancestor item or None if items are in different trees.
+
+        Raises:
+            KeyError: If either item not found.
+        """
+        first_depth = self.get_depth(first_id)
+        second_depth = self.get_depth(second_id)
+        if self._jumps is None:
+            first_path = [first_id] + self._get_ancestor_ids(first_id)
+            second_path = set([second_id] + self._get_ancestor_ids(second_id))
+            for ancestor_id in first_path:
+                if ancestor_id in second_path:
+                    return self._items_by_id[ancestor_id]
+            return None
+
+        if first_depth > second_depth:
+            first_id = self._lift(first_id, first_depth - second_depth)
+        elif second_depth > first_depth:
+            second_id = self._lift(second_id, second_depth - first_depth)
+        if first_id == second_id:
+            return self._items_by_id[first_id]
+
+        for bit in range(len(self._jumps[first_id]) - 1, -1, -1):
+            first_jumps = self._jumps[first_id]
+            second_jumps = self._jumps[second_id]
+            if bit < len(first_jumps) and first_jumps[bit] != second_jumps[bit]:
+                first_id = first_jumps[bit]
+                second_id = second_jumps[bit]
+        first_parent = self._jumps[first_id][:1]
+        if not first_parent or first_parent != self._jumps[second_id][:1]:
+            return None
+        return self._items_by_id[first_parent[0]]
+
+    def get_subtree_size(self, item_id: int) -> int:
+        """Get number of items in subtree of item, including the item.
+
+        O(1) while the Euler tour is current; the first call after a
+        structural change rebuilds the tour in O(n).
+
+        Args:
+            item_id: ID of the subtree root.
+
+        Returns:
+            Subtree size.
+
+        Raises:
+            KeyError: If item not found.
+        """
+        if self._aggregates is not None:
+            return self._aggregates[item_id][0]
+        tour = self._get_tour()
+        return tour.tout[item_id] - tour.tin[item_id]
+
+    def get_subtree_stats(self, item_id: int) -> Dict[str, object]:
+        """Get aggregates over the subtree of item, including the item.
+
+        O(1) when aggregates are maintained, otherwise O(subtree size).
+
+        Args:
+            item_id: ID of the subtree root.
+
+        Returns:
+            Dictionary with subtree size, height (levels below the item) and
+            sums of aggregated numeric attributes.
+
+        Raises:
+            KeyError: If item not found.
+        """
+        if self._aggregates is not None:
+            entry = self._aggregates[item_id]
+        else:
+            entry = self._aggregate_nodes(self._get_subtree_ids(item_id), {})
+        return {
+            "subtree_size": entry[0],
+            "height": entry[1],
+            "sums": dict(zip(self._aggregated_attributes, entry[2:])),
+        }
+
+    def get_descendants(
+        self,
+        item_id: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        max_depth: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, object]], Optional[int]]:
+        """Get descendants of item in preorder as a contiguous tour slice.
+
+        Subtrees below max_depth are skipped as whole tour ranges, so a page
+        costs O(limit) regardless of how deep the skipped part is.
+
+        Args:
+            item_id: ID of the subtree root.
+            offset: Position inside the subtree to continue from (0 = first descendant).
+            limit: Maximum number of items to return; None returns all.
+            max_depth: Only return descendants at most this many levels below item.
+
+        Returns:
+            Tuple of (items, next_offset); next_offset is None when the
+            subtree is exhausted.
+
+        Raises:
+            KeyError: If item not found.
+        """
+        tour = self._get_tour()
+        start = tour.tin[item_id] + 1 + offset
+        end = tour.tout[item_id]
+        depth_limit = None if max_depth is None else tour.depths[tour.tin[item_id]] + max_depth
+
+        result = []
+        position = start
+        while position < end and (limit is None or len(result) < limit):
+            descendant_id = tour.order[position]
+            result.append(self._items_by_id[descendant_id])
+            if depth_limit is not None and tour.depths[position] >= depth_limit:
+                position = tour.tout[descendant_id]
+            else:
+                position += 1
+
+        next_offset = position - tour.tin[item_id] - 1 if position < end else None
+        return result, next_offset
+
+    def get_level(
+        self,
+        item_id: int,
+        depth: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, object]], Optional[int], int]:
+        """Get items exactly depth levels below item, in preorder.
+
+        The level index holds tour positions per depth, so the items of the
+        subtree at that depth are found with two binary searches and a page
+        costs O(log n + limit).
+
+        Args:
+            item_id: ID of the subtree root.
+            depth: Levels below the item (0 = the item itself).
+            offset: Position inside the level run to continue from.
+            limit: Maximum number of items to return; None returns all.
+
+        Returns:
+            Tuple of (items, next_offset, total items at that level).
+
+        Raises:
+            KeyError: If item not found.
+        """
+        tour = self._get_tour()
+        start = tour.tin[item_id]
+        level = tour.depths[start] + depth
+        if level >= len(tour.levels):
+            return [], None, 0
+        positions = tour.levels[level]
+        first = bisect_left(positions, start)
+        last = bisect_left(positions, tour.tout[item_id], first)
+        total = last - first
+        stop = total if limit is None else min(offset + limit, total)
+        items = [self._items_by_id[tour.order[position]] for position in positions[first + offset:first + stop]]
+        return items, stop if stop < total else None, total
+
+    def find_by_attribute(
+        self,
+        key: str,
+        value: object,
+        root_id: Optional[int] = None,
+    ) -> List[Dict[str, object]]:
+        """Find items whose attribute key equals value.
+
+        Indexed keys are answered in O(matches); other keys scan all items.
+        With root_id, the search is limited to that item's subtree (the item
+        included): the smaller of the match set and the subtree is walked, and
+        subtree membership is checked against the Euler tour.
+
+        Args:
+            key: Attribute key.
+            value: Attribute value to match (compared by type and value).
+            root_id: ID of the subtree root to search in; None searches the whole tree.
+
+        Returns:
+            Matching items; subtree results are in preorder, otherwise in
+            indexing order.
+
+        Raises:
+            KeyError: If root item not found.
+        """
+        index = self._attribute_indexes.get(key)
+        value_key = _value_key(value)
+        if index is not None and value_key is not None:
+            candidate_ids: Optional[Iterable[int]] = index.get(value_key, {})
+        else:
+            candidate_ids = None
+
+        if root_id is None:
+            if candidate_ids is None:
+                return [item for item in self.get_all() if _matches(item, key, value)]
+            return [self._items_by_id[item_id] for item_id in candidate_ids]
+
+        tour = self._get_tour()
+        start = tour.tin[root_id]
+        end = tour.tout[root_id]
+        if candidate_ids is None or len(candidate_ids) >= end - start:
+            items = (self._items_by_id[item_id] for item_id in tour.order[start:end])
+            return [item for item in items if _matches(item, key, value)]
+        positions = sorted(tour.tin[item_id] for item_id in candidate_ids if start <= tour.tin[item_id] < end)
+        return [self._items_by_id[tour.order[position]] for position in positions]
+
+    def _get_columns(self, keys: Iterable[str], tour: EulerTour) -> Dict[str, AttributeColumn]:
+        """Get attribute columns in tour order, projecting missing ones.
+
+        Columns are cached until the next mutation. Mutations replace the
+        cache dict instead of clearing it, so a reader that projected
+        outdated values stores them in a dict nobody looks at anymore.
+
+        Args:
+            keys: Attribute keys.
+            tour: Euler tour the columns must be aligned with.
+
+        Returns:
+            Columns by key.
+        """
+        cache = self._columns
+        result = {}
+        for key in keys:
+            column = cache.get(key)
+            if column is None:
+                items = [self._items_by_id[item_id] for item_id in tour.order]
+                column = cache[key] = build_column(items, key)
+            result[key] = column
+        return result
+
+    def query(
+        self,
+        conditions: Sequence[Condition],
+        root_id: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, object]], Optional[int], int]:
+        """Find items satisfying all conditions with vectorized column filters.
+
+        The first query on a key after a mutation projects it into a column
+        in O(n); subsequent queries cost O(range) NumPy operations plus
+        O(limit) to materialize the page.
+
+        Args:
+            conditions: Conditions to satisfy (see app.query.Condition).
+            root_id: Limit search to the subtree of this item (the item included).
+            offset: Number of matches to skip.
+            limit: Maximum number of items to return; None returns all.
+
+        Returns:
+            Tuple of (items in preorder, next_offset or None, total matches).
+
+        Raises:
+            KeyError: If root item not found.
+            ValueError: If a condition is invalid.
+        """
+        tour = self._get_tour()
+        if root_id is None:
+            start, end = 0, len(tour.order)
+        else:
+            start, end = tour.tin[root_id], tour.tout[root_id]
+        columns = self._get_columns({condition.key for condition in conditions}, tour)
+        positions = evaluate(columns, conditions, start, end)
+        selected, next_offset = page(positions, offset, limit)
+        items = [self._items_by_id[tour.order[position]] for position in selected]
+        return items, next_offset, len(positions)
+
+
+def _check_batch_acyclic(pending: Dict[int, Dict[str, object]]) -> None:
+    """Check that parent references inside a batch of new items form no cycle.
+
+    Args:
+        pending: New items by ID, with already validated parents.
+
+    Raises:
+        ValueError: If some items of the batch are each other's ancestors.
+    """
+    done = set()
+    for start_id in pending:
+        path = set()
+        item_id = start_id
+        while item_id in pending and item_id not in done:
+            if item_id in path:
+                raise ValueError(f"Items form a parent cycle through item {item_id}")
+            path.add(item_id)
+            item_id = pending[item_id].get("parent")
+        done |= path
+
+
+def _value_key(value: object) -> Optional[Tuple[type, object]]:
+    """Build hash index key for an attribute value.
+
+    The type is part of the key so that 1, 1.0 and True stay distinct.
+
+    Returns:
+        Index key or None if value is unhashable.
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return type(value), value
+
+
+def _matches(item: Dict[str, object], key: str, value: object) -> bool:
+    """Check attribute equality with the same semantics as the index."""
+    return key in item and type(item[key]) is type(value) and item[key] == value
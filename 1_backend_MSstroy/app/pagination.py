@@ -0,0 +1,61 @@
+"""Opaque cursor helpers for paginated endpoints."""
+
+import base64
+import binascii
+import json
+from typing import List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def encode_cursor(offset: int, version: int) -> str:
+    """Encode pagination position into an opaque cursor.
+
+    Args:
+        offset: Position to continue from.
+        version: Tree version the position refers to; the cursor is only
+            valid for that version.
+
+    Returns:
+        URL-safe cursor string.
+    """
+    payload = json.dumps({"o": offset, "v": version}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_versioned_cursor(cursor: str) -> Tuple[int, int]:
+    """Decode cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string.
+
+    Returns:
+        Tuple of (position to continue from, tree version of the position).
+
+    Raises:
+        ValueError: If cursor is malformed or carries no version.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        offset, version = state["o"], state["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(offset, int) or offset < 0 or not isinstance(version, int) or version < 0:
+        raise ValueError("Invalid cursor")
+    return offset, version
+
+
+def page_slice(items: Sequence[T], offset: int, limit: int) -> Tuple[List[T], Optional[int]]:
+    """Cut one page out of a sequence.
+
+    Args:
+        items: Sequence supporting O(1) slicing by position.
+        offset: Position of the first element of the page.
+        limit: Maximum page size.
+
+    Returns:
+        Tuple of (page, offset of the next page or None).
+    """
+    stop = offset + limit
+    return list(items[offset:stop]), stop if stop < len(items) else None
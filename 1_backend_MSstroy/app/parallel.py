@@ -0,0 +1,338 @@
+"""Parallel CompactTreeStore construction from large NDJSON files.
+
+The file is split into byte ranges aligned to line starts, one shard per
+worker process. A worker parses and validates its lines with the same rules
+as ``CompactTreeStore`` (see ``app.compact.encode_items``), dictionary-encodes
+payload attributes with shard-local codes, sorts its ids and writes the
+resulting columns into a shared memory segment. Only the distinct attribute
+values travel back through the result pipe.
+
+The parent copies the shard columns into the final arrays in shard order,
+maps local value codes to global ones (walking shards in order keeps the
+first-appearance numbering of the serial build), merges the per-shard sorted
+runs into the id index and derives the children index with NumPy. The
+resulting store is identical, column by column, to ``CompactTreeStore`` built
+from the same items one by one.
+"""
+
+import json
+import os
+import uuid
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.compact import (
+    CODE_TYPECODE,
+    ID_TYPECODE,
+    KIND_TYPECODE,
+    MISSING_CODE,
+    PARENT_ID,
+    ROW_TYPECODE,
+    Column,
+    CompactTreeStore,
+    check_structure,
+    encode_items,
+)
+from app.logger import get_logger
+from app.shared import open_segment, unlink_segment
+
+logger = get_logger(__name__)
+
+ID_DTYPE = np.int64
+ROW_DTYPE = np.int32
+KIND_DTYPE = np.uint8
+CODE_DTYPE = np.int32
+
+# Smaller files are not worth the process start-up cost.
+MIN_SHARD_BYTES = 1024 * 1024
+
+
+class _Shard(NamedTuple):
+    """Parsed shard: columns in a shared memory segment, values inline."""
+
+    rows: int
+    lines: int
+    segment: Optional[str]
+    columns: List[Tuple[str, List[object]]]
+    error: Optional[Tuple[int, str]]
+
+
+def _read_lines(path: str, start: int, end: int) -> List[bytes]:
+    """Read lines of a byte range."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start).split(b"\n")
+
+
+def _parse_shard(path: str, start: int, end: int) -> _Shard:
+    """Parse one byte range of an NDJSON file in a worker process.
+
+    Segment layout: ids, parents (int64), locally sorted rows, one code
+    column per attribute (int32), parent kinds (uint8).
+
+    Returns:
+        Parsed shard; on invalid input only the line count and the error
+        (line number within the shard, message) are set.
+    """
+    lines = _read_lines(path, start, end)
+    line_count = len(lines) - 1
+    current = 0
+
+    def items():
+        nonlocal current
+        for current, line in enumerate(lines, 1):
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+    try:
+        ids, parents, parent_kinds, columns = encode_items(items())
+    except ValueError as e:
+        return _Shard(0, line_count, None, [], (current, str(e)))
+
+    rows = len(ids)
+    if not rows:
+        return _Shard(0, line_count, None, [], None)
+    order = np.argsort(np.frombuffer(ids, dtype=ID_DTYPE), kind="stable").astype(ROW_DTYPE)
+    parts = [memoryview(ids), memoryview(parents), memoryview(order)]
+    parts += [memoryview(codes) for codes, _ in columns.values()]
+    parts.append(memoryview(parent_kinds))
+
+    name = f"treestore-build-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+    segment = open_segment(name, create=True, size=sum(part.nbytes for part in parts))
+    offset = 0
+    for part in parts:
+        segment.buf[offset:offset + part.nbytes] = part.cast("B")
+        offset += part.nbytes
+    return _Shard(rows, line_count, name, [(key, values) for key, (_, values) in columns.items()], None)
+
+
+def _split(path: str, shards: int) -> List[Tuple[int, int]]:
+    """Split file into at most shards byte ranges that start at line starts."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for index in range(1, shards):
+            f.seek(max(size * index // shards, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+class _ValueMerger:
+    """Global dictionary of one attribute; codes compare values like the serial encoder."""
+
+    def __init__(self) -> None:
+        self.values: List[object] = []
+        self._lookup: Dict[Tuple[type, object], int] = {}
+
+    def remap(self, values: List[object]) -> np.ndarray:
+        """Get global codes of shard-local values, plus MISSING_CODE for local code -1."""
+        codes = np.empty(len(values) + 1, dtype=CODE_DTYPE)
+        for local_code, value in enumerate(values):
+            try:
+                key = (type(value), value)
+                code = self._lookup.get(key)
+            except TypeError:
+                key = None
+                code = None
+            if code is None:
+                code = len(self.values)
+                self.values.append(value)
+                if key is not None:
+                    self._lookup[key] = code
+            codes[local_code] = code
+        codes[-1] = MISSING_CODE
+        return codes
+
+
+def _as_array(typecode: str, values: np.ndarray) -> array:
+    """Copy NumPy array into a typed array of the compact store."""
+    result = array(typecode)
+    result.frombytes(values.tobytes())
+    return result
+
+
+def _copy_shard(
+    shard: _Shard,
+    start: int,
+    ids: np.ndarray,
+    parents: np.ndarray,
+    runs: np.ndarray,
+    parent_kinds: np.ndarray,
+    codes: List[Tuple[np.ndarray, np.ndarray]],
+) -> None:
+    """Copy shard columns from its segment into rows start.. of the final columns.
+
+    Args:
+        codes: (final code column, local-to-global code map) per shard attribute.
+    """
+    segment = open_segment(shard.segment)
+    end = start + shard.rows
+    offset = 0
+
+    def take(dtype: type) -> np.ndarray:
+        nonlocal offset
+        values = np.frombuffer(segment.buf, dtype=dtype, count=shard.rows, offset=offset)
+        offset += values.nbytes
+        return values
+
+    ids[start:end] = take(ID_DTYPE)
+    parents[start:end] = take(ID_DTYPE)
+    runs[start:end] = take(ROW_DTYPE) + start
+    for target, remap in codes:
+        target[start:end] = remap[take(CODE_DTYPE)]
+    parent_kinds[start:end] = take(KIND_DTYPE)
+
+
+def _build_indexes(
+    ids: np.ndarray,
+    parents: np.ndarray,
+    parent_kinds: np.ndarray,
+    runs: np.ndarray,
+) -> Tuple[array, array, array, array, array]:
+    """Vectorized equivalent of ``app.compact.build_indexes``.
+
+    Args:
+        runs: Row indexes where each shard's rows are sorted by id; a stable
+            sort of these runs orders equal ids by row, like the serial sort.
+
+    Reachability from the roots is found by pointer doubling over parent
+    rows: after k rounds every row points 2^k levels up, so rows that reach
+    a root are resolved in O(log depth) vectorized rounds and the rows still
+    pointing at a parent are exactly those on or below a parent cycle.
+
+    Raises:
+        ValueError: If IDs are duplicated, parents are missing or items form
+            parent cycles.
+    """
+    row_count = len(ids)
+    sorted_rows = runs[np.argsort(ids[runs], kind="stable")]
+    sorted_ids = ids[sorted_rows]
+    duplicates = np.flatnonzero(sorted_ids[1:] == sorted_ids[:-1])
+    if duplicates.size:
+        raise ValueError(f"Duplicate item ID: {sorted_ids[duplicates[0] + 1]}")
+
+    parent_rows = np.full(row_count, -1, dtype=ROW_DTYPE)
+    linked = np.flatnonzero(parent_kinds == PARENT_ID)
+    orphan_rows = linked
+    if linked.size:
+        parent_ids = parents[linked]
+        positions = np.minimum(np.searchsorted(sorted_ids, parent_ids), row_count - 1)
+        found = sorted_ids[positions] == parent_ids
+        parent_rows[linked[found]] = sorted_rows[positions[found]]
+        orphan_rows = linked[~found]
+
+    ancestors = parent_rows.copy()
+    active = np.flatnonzero(ancestors >= 0)
+    for _ in range(row_count.bit_length() + 1):
+        if not active.size:
+            break
+        ancestors[active] = ancestors[ancestors[active]]
+        active = active[ancestors[active] >= 0]
+    if orphan_rows.size or active.size:
+        check_structure(ids, parent_rows, orphan_rows.tolist(), active.tolist())
+
+    child_offsets = np.zeros(row_count + 1, dtype=ROW_DTYPE)
+    child_offsets[1:] = np.cumsum(np.bincount(parent_rows[parent_rows >= 0], minlength=row_count))
+    children = np.flatnonzero(parent_rows >= 0)
+    child_rows = children[np.argsort(parent_rows[children], kind="stable")]
+
+    return (
+        _as_array(ROW_TYPECODE, parent_rows),
+        _as_array(ID_TYPECODE, sorted_ids),
+        _as_array(ROW_TYPECODE, sorted_rows),
+        _as_array(ROW_TYPECODE, child_offsets),
+        _as_array(ROW_TYPECODE, child_rows.astype(ROW_DTYPE)),
+    )
+
+
+def _merge(shards: List[_Shard]) -> CompactTreeStore:
+    """Merge parsed shards, in file order, into the final store.
+
+    Raises:
+        ValueError: With the first invalid line of the file, or on duplicate IDs.
+    """
+    first_line = 0
+    for shard in shards:
+        if shard.error is not None:
+            line, message = shard.error
+            raise ValueError(f"line {first_line + line}: {message}")
+        first_line += shard.lines
+
+    row_count = sum(shard.rows for shard in shards)
+    ids = np.empty(row_count, dtype=ID_DTYPE)
+    parents = np.empty(row_count, dtype=ID_DTYPE)
+    parent_kinds = np.empty(row_count, dtype=KIND_DTYPE)
+    runs = np.empty(row_count, dtype=ROW_DTYPE)
+    mergers: Dict[str, _ValueMerger] = {}
+    codes: Dict[str, np.ndarray] = {}
+    start = 0
+    for shard in shards:
+        if not shard.rows:
+            continue
+        for key, _ in shard.columns:
+            if key not in mergers:
+                mergers[key] = _ValueMerger()
+                codes[key] = np.full(row_count, MISSING_CODE, dtype=CODE_DTYPE)
+        shard_codes = [(codes[key], mergers[key].remap(values)) for key, values in shard.columns]
+        _copy_shard(shard, start, ids, parents, runs, parent_kinds, shard_codes)
+        start += shard.rows
+
+    columns: Dict[str, Column] = {
+        key: (_as_array(CODE_TYPECODE, codes[key]), merger.values) for key, merger in mergers.items()
+    }
+    return CompactTreeStore.from_columns(
+        _as_array(ID_TYPECODE, ids),
+        _as_array(ID_TYPECODE, parents),
+        _as_array(KIND_TYPECODE, parent_kinds),
+        columns,
+        *_build_indexes(ids, parents, parent_kinds, runs),
+    )
+
+
+def build_compact(path: str, workers: Optional[int] = None) -> CompactTreeStore:
+    """Build CompactTreeStore from an NDJSON file using a process pool.
+
+    Args:
+        path: NDJSON file with one item per line; empty lines are skipped.
+        workers: Number of worker processes; defaults to the CPU count.
+            Files smaller than MIN_SHARD_BYTES per worker use fewer workers,
+            and a single shard is parsed in the calling process.
+
+    Returns:
+        CompactTreeStore equal to ``CompactTreeStore`` built from the items
+        in file order.
+
+    Raises:
+        ValueError: If a line is not a valid item ("line N: ..." with the
+            first invalid line) or IDs are duplicated.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = _split(path, max(1, min(workers, os.path.getsize(path) // MIN_SHARD_BYTES)))
+    if len(ranges) <= 1:
+        shards = [_parse_shard(path, *byte_range) for byte_range in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            futures = [executor.submit(_parse_shard, path, *byte_range) for byte_range in ranges]
+        shards = [future.result() for future in futures if future.exception() is None]
+        if len(shards) < len(futures):
+            _release(shards)
+            raise next(future.exception() for future in futures if future.exception() is not None)
+    try:
+        store = _merge(shards)
+    finally:
+        _release(shards)
+    logger.info("Compact tree built", extra={"path": path, "items_count": len(store), "shards": len(shards)})
+    return store
+
+
+def _release(shards: List[_Shard]) -> None:
+    """Unlink shared memory segments of shards."""
+    for shard in shards:
+        if shard.segment:
+            unlink_segment(shard.segment)
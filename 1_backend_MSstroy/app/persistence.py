@@ -0,0 +1,386 @@
+"""Durable tree state: write-ahead log with group commit plus compacted snapshots.
+
+Layout of the data directory:
+
+    snapshot-<version>.snap   tree at version, in the binary snapshot format
+    wal-<version>.log         operations producing versions after <version>
+
+Every log record is one line ``<crc32 hex> <json>`` where the JSON holds the
+version the operation produced, the TreeStore method name and its keyword
+arguments. A record is appended under the service write lock before the
+operation touches the tree, so no reader can see a change that is not in the
+log yet. An operation the tree then rejects stays in the log; replaying it
+from the same state rejects it again, and recovery skips it.
+
+Records are made durable outside of the write lock: a writer waiting for its
+record either runs fsync for every record written so far or waits for the
+fsync already in progress, so concurrent writers share one fsync (group
+commit). The writer returns only after that, but readers may see the change
+while its fsync is still running; a crash at that moment loses a change that
+was never acknowledged to its writer.
+
+Once the log grows past a record or byte threshold, a new segment is started
+and the tree is compacted into a new snapshot; older segments and snapshots
+are then deleted. Recovery opens the latest snapshot and replays at most the
+segments written since, so it takes time proportional to the threshold, not
+to the uptime.
+"""
+
+import json
+import os
+import threading
+import zlib
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from app.compact import CompactTreeStore
+from app.logger import get_logger
+from app.snapshot import open_snapshot, write_snapshot
+
+logger = get_logger(__name__)
+
+SNAPSHOT_PREFIX = "snapshot-"
+SNAPSHOT_SUFFIX = ".snap"
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+# Operation that replaces the whole tree; every other one names a TreeStore method.
+INIT_OPERATION = "init"
+# Marks the operation logged under the same version as rejected, so replay skips it.
+ABORT_OPERATION = "abort"
+OPERATIONS = (INIT_OPERATION, "add_items", "remove_item", "move_item", "update_item", "apply_patch")
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_arguments(arguments: Dict[str, object]) -> bytes:
+    """Encode operation arguments ahead of logging them.
+
+    Large arguments (a whole tree for init) can be encoded before the
+    service write lock is taken and passed to TreePersistence.log as bytes.
+
+    Args:
+        arguments: Keyword arguments of the operation.
+
+    Returns:
+        JSON encoding of arguments.
+    """
+    return _encoder.encode(arguments).encode("utf-8")
+
+
+def _encode_record(record: Dict[str, object]) -> bytes:
+    """Encode record as a checksummed log line."""
+    arguments = record["args"]
+    if isinstance(arguments, bytes):
+        head = _encoder.encode({"v": record["v"], "op": record["op"]}).encode("utf-8")
+        payload = b'%s,"args":%s}' % (head[:-1], arguments)
+    else:
+        payload = _encoder.encode(record).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def _replay(
+    tree_store: object,
+    record: Dict[str, object],
+    build: Callable[[List[Dict[str, object]]], object],
+) -> object:
+    """Apply a logged operation to tree_store and return the resulting store."""
+    if record["op"] == INIT_OPERATION:
+        return build(record["args"]["items"])
+    getattr(tree_store, record["op"])(**record["args"])
+    return tree_store
+
+
+def _decode_record(line: bytes) -> Optional[Dict[str, object]]:
+    """Decode log line, or return None if it is torn or corrupted."""
+    if len(line) < 10 or not line.endswith(b"\n") or line[8:9] != b" ":
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def _file_name(prefix: str, version: int, suffix: str) -> str:
+    """Build file name that sorts by version."""
+    return f"{prefix}{version:020d}{suffix}"
+
+
+def _fsync_directory(path: str) -> None:
+    """Make renames and deletions in a directory durable."""
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class WriteAheadLog:
+    """Append-only log segment with group commit."""
+
+    def __init__(self, path: str) -> None:
+        """Open segment for appending.
+
+        Args:
+            path: Segment file path; created if missing.
+        """
+        self.path = path
+        self._file: BinaryIO = open(path, "ab")
+        self._written = self._file.tell()
+        self._synced = self._written
+        self._syncing = False
+        self._condition = threading.Condition()
+
+    def append(self, record: Dict[str, object]) -> int:
+        """Write record to the OS-level buffer without waiting for the disk.
+
+        Args:
+            record: JSON-serializable record.
+
+        Returns:
+            Log position to pass to sync().
+        """
+        line = _encode_record(record)
+        with self._condition:
+            self._file.write(line)
+            self._written += len(line)
+            return self._written
+
+    def sync(self, position: int) -> None:
+        """Wait until the log is durable up to position.
+
+        The caller either performs one fsync covering every record appended
+        so far or waits for the fsync in progress.
+
+        Args:
+            position: Position returned by append().
+        """
+        with self._condition:
+            while self._synced < position:
+                if self._syncing:
+                    self._condition.wait()
+                    continue
+                self._syncing = True
+                self._file.flush()
+                target = self._written
+                self._condition.release()
+                try:
+                    os.fsync(self._file.fileno())
+                finally:
+                    self._condition.acquire()
+                    self._syncing = False
+                    self._condition.notify_all()
+                self._synced = max(self._synced, target)
+
+    @property
+    def size(self) -> int:
+        """Get number of bytes written to the segment."""
+        return self._written
+
+    def close(self) -> None:
+        """Make the whole segment durable and close it."""
+        self.sync(self._written)
+        with self._condition:
+            self._file.close()
+
+
+class TreePersistence:
+    """Snapshots and write-ahead log segments of one tree in a directory."""
+
+    def __init__(
+        self,
+        data_dir: str,
+        snapshot_records: int = 10_000,
+        snapshot_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        """Initialize persistence; the directory is created if missing.
+
+        Args:
+            data_dir: Directory holding snapshots and log segments.
+            snapshot_records: Log records after which a snapshot is due.
+            snapshot_bytes: Log size after which a snapshot is due.
+        """
+        os.makedirs(data_dir, exist_ok=True)
+        self.data_dir = data_dir
+        self.snapshot_records = snapshot_records
+        self.snapshot_bytes = snapshot_bytes
+        self._log: Optional[WriteAheadLog] = None
+        self._records = 0
+        self._log_bytes = 0
+
+    def _list(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        """List (version, path) of files of one kind, oldest first."""
+        found = []
+        for name in os.listdir(self.data_dir):
+            if name.startswith(prefix) and name.endswith(suffix):
+                version = name[len(prefix):-len(suffix)]
+                if version.isdigit():
+                    found.append((int(version), os.path.join(self.data_dir, name)))
+        return sorted(found)
+
+    def _read_segment(self, path: str, last: bool) -> Iterator[Tuple[int, Dict[str, object]]]:
+        """Read (offset, record) pairs of a segment.
+
+        A torn record at the end of the last segment (crash during append)
+        is truncated away; damage anywhere else is an error.
+        """
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                record = _decode_record(line)
+                if record is None:
+                    if not last or f.read(1):
+                        raise ValueError(f"Corrupted log record in {path} at byte {offset}")
+                    logger.warning("Truncating torn log record", extra={"path": path, "offset": offset})
+                    break
+                yield offset, record
+                offset += len(line)
+        if offset < os.path.getsize(path):
+            os.truncate(path, offset)
+
+    def recover(self, build: Callable[[List[Dict[str, object]]], object]) -> Optional[Tuple[object, int]]:
+        """Restore the latest durable tree.
+
+        Args:
+            build: Builds a mutable store from items.
+
+        Returns:
+            Tuple of (store, version), or None if the directory holds no snapshot.
+
+        Raises:
+            ValueError: If the log is corrupted or has a gap.
+        """
+        snapshots = self._list(SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)
+        if not snapshots:
+            return None
+        version, path = snapshots[-1]
+        tree_store = build(open_snapshot(path).get_all())
+        segments = [segment for segment in self._list(SEGMENT_PREFIX, SEGMENT_SUFFIX) if segment[0] >= version]
+        replayed = 0
+        pending: Optional[Dict[str, object]] = None
+        for index, (_, segment_path) in enumerate(segments):
+            for offset, record in self._read_segment(segment_path, last=index == len(segments) - 1):
+                if record["op"] == ABORT_OPERATION:
+                    if pending is not None and pending["v"] == record["v"]:
+                        pending = None
+                    elif record["v"] > version:
+                        raise ValueError(f"Abort of unlogged version {record['v']} in {segment_path}")
+                    continue
+                if pending is not None:
+                    tree_store = _replay(tree_store, pending, build)
+                    version, pending = pending["v"], None
+                    replayed += 1
+                if record["v"] <= version:
+                    continue
+                if record["v"] != version + 1:
+                    raise ValueError(f"Log gap: version {record['v']} follows {version} in {segment_path}")
+                pending, pending_end = record, (segment_path, offset)
+        if pending is not None:
+            try:
+                tree_store = _replay(tree_store, pending, build)
+            except Exception as e:
+                # The writer stopped between logging and aborting; it was never acknowledged.
+                logger.warning("Dropping unfinished last log record", extra={"version": pending["v"], "error": str(e)})
+                os.truncate(*pending_end)
+            else:
+                version = pending["v"]
+                replayed += 1
+        logger.info(
+            "Tree recovered",
+            extra={"snapshot": path, "replayed_records": replayed, "version": version},
+        )
+        return tree_store, version
+
+    def start(self, version: int) -> None:
+        """Start appending to a new segment after version.
+
+        Args:
+            version: Current tree version.
+        """
+        if self._log is not None:
+            self._log.close()
+        self._log = WriteAheadLog(os.path.join(self.data_dir, _file_name(SEGMENT_PREFIX, version, SEGMENT_SUFFIX)))
+        self._records = 0
+        self._log_bytes = 0
+
+    def log(
+        self,
+        version: int,
+        operation: str,
+        arguments: Union[Dict[str, object], bytes],
+    ) -> Tuple[WriteAheadLog, int]:
+        """Append operation to the log before it is applied.
+
+        Caller holds the service write lock.
+
+        Args:
+            version: Version the operation will produce.
+            operation: Name from OPERATIONS.
+            arguments: Keyword arguments of the operation, or their
+                encode_arguments() result.
+
+        Returns:
+            Ticket to pass to commit().
+        """
+        position = self._log.append({"v": version, "op": operation, "args": arguments})
+        self._records += 1
+        self._log_bytes = self._log.size
+        return self._log, position
+
+    def abort(self, version: int) -> None:
+        """Mark the operation logged under version as rejected.
+
+        Caller holds the service write lock. The abort record needs no fsync
+        of its own: if it is lost, the rejected record is the last one and is
+        dropped on recovery.
+
+        Args:
+            version: Version passed to log() for the rejected operation.
+        """
+        self._log.append({"v": version, "op": ABORT_OPERATION, "args": {}})
+        self._records += 1
+        self._log_bytes = self._log.size
+
+    @staticmethod
+    def commit(ticket: Tuple[WriteAheadLog, int]) -> None:
+        """Wait until the logged operation is durable.
+
+        Args:
+            ticket: Value returned by log().
+        """
+        log, position = ticket
+        log.sync(position)
+
+    @property
+    def needs_snapshot(self) -> bool:
+        """Check whether the current segment outgrew the snapshot thresholds."""
+        return self._records >= self.snapshot_records or self._log_bytes >= self.snapshot_bytes
+
+    def write_snapshot(self, items: List[Dict[str, object]], version: int) -> None:
+        """Persist tree at version and drop files it supersedes.
+
+        The log must already continue in a segment started at version
+        (see start()), so nothing after version is deleted.
+
+        Args:
+            items: Items of the tree at version.
+            version: Tree version of items.
+        """
+        path = os.path.join(self.data_dir, _file_name(SNAPSHOT_PREFIX, version, SNAPSHOT_SUFFIX))
+        write_snapshot(CompactTreeStore(items), path, meta={"version": version})
+        _fsync_directory(self.data_dir)
+        for old_version, old_path in self._list(SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX):
+            if old_version < version:
+                os.remove(old_path)
+        for old_version, old_path in self._list(SEGMENT_PREFIX, SEGMENT_SUFFIX):
+            if old_version < version:
+                os.remove(old_path)
+        logger.info("Snapshot written", extra={"path": path, "version": version, "items_count": len(items)})
+
+    def close(self) -> None:
+        """Make the log durable and close it."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,163 @@
+"""Vectorized attribute filtering.
+
+Attribute values are projected into NumPy columns laid out in Euler tour
+order, so the subtree of any item is a contiguous slice and a filter over it
+is a handful of array operations instead of a Python loop over dicts.
+
+Each column keeps two projections of the same values:
+
+* ``numbers`` - float64 value for int/float attributes, NaN otherwise
+  (missing, bool, string...), used by range operators;
+* ``codes`` - dictionary code of the value (compared by type and value like
+  the attribute hash indexes), ``MISSING_CODE`` if the item lacks the key and
+  ``UNHASHABLE_CODE`` for list and object values, used by equality.
+
+Equality operands must be scalars: list or object operands are rejected
+rather than matched against the shared ``UNHASHABLE_CODE``.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+MISSING_CODE = -1
+UNHASHABLE_CODE = -2
+NO_MATCH_CODE = -3
+
+EQUALITY_OPERATORS = ("eq", "ne", "in")
+RANGE_OPERATORS = ("lt", "le", "gt", "ge", "between")
+OPERATORS = EQUALITY_OPERATORS + RANGE_OPERATORS
+
+
+class Condition(NamedTuple):
+    """Single filter condition; a query matches items satisfying all of them.
+
+    ``value`` is a scalar for eq/ne/lt/le/gt/ge, a list of scalars for in and
+    a [low, high] pair (inclusive) for between.
+    """
+
+    key: str
+    op: str
+    value: object
+
+
+class AttributeColumn(NamedTuple):
+    """Projection of one attribute key over items in tour order."""
+
+    numbers: np.ndarray
+    codes: np.ndarray
+    lookup: Dict[Tuple[type, object], int]
+
+
+def build_column(items: Sequence[Dict[str, object]], key: str) -> AttributeColumn:
+    """Project attribute key of items into arrays.
+
+    Args:
+        items: Items in tour order.
+        key: Attribute key.
+
+    Returns:
+        AttributeColumn aligned with items.
+    """
+    numbers = np.full(len(items), np.nan, dtype=np.float64)
+    codes = np.full(len(items), MISSING_CODE, dtype=np.int32)
+    lookup: Dict[Tuple[type, object], int] = {}
+    for position, item in enumerate(items):
+        if key not in item:
+            continue
+        value = item[key]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers[position] = value
+        try:
+            codes[position] = lookup.setdefault((type(value), value), len(lookup))
+        except TypeError:
+            codes[position] = UNHASHABLE_CODE
+    return AttributeColumn(numbers, codes, lookup)
+
+
+def _code_of(column: AttributeColumn, value: object) -> int:
+    """Get dictionary code of a scalar operand, or a code no item has.
+
+    Raises:
+        ValueError: If value is unhashable (a list or an object).
+    """
+    try:
+        return column.lookup.get((type(value), value), NO_MATCH_CODE)
+    except TypeError as e:
+        raise ValueError(f"Equality operators expect scalar values, got {type(value)}") from e
+
+
+def evaluate(
+    columns: Dict[str, AttributeColumn],
+    conditions: Sequence[Condition],
+    start: int,
+    end: int,
+) -> np.ndarray:
+    """Evaluate conjunction of conditions over tour positions start..end-1.
+
+    Args:
+        columns: Columns for every key used by the conditions.
+        conditions: Conditions to satisfy.
+        start: First tour position.
+        end: Position after the last one.
+
+    Returns:
+        Sorted array of matching tour positions.
+
+    Raises:
+        ValueError: If an operator or its value is invalid.
+    """
+    mask = np.ones(end - start, dtype=bool)
+    for condition in conditions:
+        column = columns[condition.key]
+        numbers = column.numbers[start:end]
+        codes = column.codes[start:end]
+        op, value = condition.op, condition.value
+        if op == "eq":
+            mask &= codes == _code_of(column, value)
+        elif op == "ne":
+            mask &= (codes != _code_of(column, value)) & (codes != MISSING_CODE)
+        elif op == "in":
+            if not isinstance(value, list):
+                raise ValueError("Operator 'in' expects a list of values")
+            mask &= np.isin(codes, [_code_of(column, element) for element in value])
+        elif op in RANGE_OPERATORS:
+            mask &= _compare(numbers, op, value)
+        else:
+            raise ValueError(f"Unknown operator: {op}")
+    return np.flatnonzero(mask) + start
+
+
+def _compare(numbers: np.ndarray, op: str, value: object) -> np.ndarray:
+    """Evaluate range operator; NaN (non-numeric or missing) never matches."""
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("Operator 'between' expects [low, high]")
+        low, high = (_number(bound) for bound in value)
+        return (numbers >= low) & (numbers <= high)
+    number = _number(value)
+    if op == "lt":
+        return numbers < number
+    if op == "le":
+        return numbers <= number
+    if op == "gt":
+        return numbers > number
+    return numbers >= number
+
+
+def _number(value: object) -> float:
+    """Validate numeric operand of a range operator."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Range operators expect numbers, got {type(value)}")
+    return float(value)
+
+
+def page(positions: np.ndarray, offset: int, limit: Optional[int]) -> Tuple[List[int], Optional[int]]:
+    """Cut one page out of matching positions.
+
+    Returns:
+        Tuple of (positions of the page, offset of the next page or None).
+    """
+    stop = len(positions) if limit is None else min(offset + limit, len(positions))
+    next_offset = stop if stop < len(positions) else None
+    return positions[offset:stop].tolist(), next_offset
@@ -0,0 +1,252 @@
+"""Registry of named trees with LRU spill to disk.
+
+Each named tree is served by its own TreeStoreService. Resident trees are
+kept in LRU order; once they hold more items than the budget, the least
+recently used trees that no request is using are written to a compact
+snapshot and dropped from memory. The next request for a spilled tree
+loads it back and continues from the same version.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.compact import CompactTreeStore
+from app.exceptions import TreeNotFoundError
+from app.logger import get_logger
+from app.models import TreeStore
+from app.service import TreeStoreService
+from app.snapshot import open_snapshot, write_snapshot
+
+logger = get_logger(__name__)
+
+TREE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+SPILL_SUFFIX = ".snap"
+
+
+class _ResidentTree:
+    """Tree held in memory, with the number of requests using it."""
+
+    __slots__ = ("service", "leases", "spilled_version")
+
+    def __init__(self, service: TreeStoreService, spilled_version: Optional[int] = None) -> None:
+        self.service = service
+        self.leases = 0
+        # Version of the tree's spill file, if that file is still current.
+        self.spilled_version = spilled_version
+
+
+class TreeRegistry:
+    """Named trees sharing a memory budget.
+
+    The budget is measured in items, the unit every store is sized in.
+    A tree in use by a request (leased) is never spilled, so a request
+    always finishes on the live instance; the budget may be exceeded while
+    all resident trees are leased.
+    """
+
+    def __init__(
+        self,
+        spill_dir: str,
+        max_resident_items: int,
+        build: Callable[[List[Dict[str, object]]], TreeStore],
+        service_factory: Callable[[TreeStore, int], TreeStoreService],
+    ) -> None:
+        """Initialize empty registry.
+
+        Spill files are written to a new subdirectory of spill_dir owned by
+        this process, so workers sharing spill_dir never touch each other's
+        files. It is removed by close().
+
+        Args:
+            spill_dir: Parent directory for spilled trees; created if missing.
+            max_resident_items: Item budget of resident trees.
+            build: Builds a mutable store from items.
+            service_factory: Creates a service for a store and its version.
+        """
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix=f"treestore-{os.getpid()}-", dir=spill_dir)
+        self.max_resident_items = max_resident_items
+        self._build = build
+        self._service_factory = service_factory
+        self._resident: "OrderedDict[str, _ResidentTree]" = OrderedDict()
+        self._spilled: Dict[str, int] = {}
+        # Trees being spilled or loaded; other requests for them wait.
+        self._moving: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Remove the spill directory of this registry; spilled trees are lost."""
+        with self._lock:
+            self._spilled.clear()
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _spill_path(self, name: str) -> str:
+        """Get spill file path of a tree."""
+        return os.path.join(self.spill_dir, name + SPILL_SUFFIX)
+
+    @contextmanager
+    def lease(self, name: str, create: bool = False) -> Iterator[TreeStoreService]:
+        """Use a tree for the duration of a request.
+
+        A created tree stays invisible to other requests until its first
+        version is published, and is dropped if the request ends without one.
+
+        Args:
+            name: Tree name.
+            create: Create an empty tree if it does not exist.
+
+        Yields:
+            Service of the tree, loaded back from disk if it was spilled.
+
+        Raises:
+            TreeNotFoundError: If the tree does not exist and create is False.
+            ValueError: If name is not a valid tree name.
+        """
+        if not TREE_NAME_PATTERN.match(name):
+            raise ValueError("Tree name must be 1-64 letters, digits, '_' or '-'")
+        tree = self._acquire(name, create)
+        try:
+            yield tree.service
+        finally:
+            with self._lock:
+                tree.leases -= 1
+                # A tree created for a request whose init failed was never published.
+                if not tree.leases and not tree.service.version and self._resident.get(name) is tree:
+                    del self._resident[name]
+                    logger.info("Uninitialized tree dropped", extra={"tree": name})
+            self._evict()
+
+    def _acquire(self, name: str, create: bool) -> _ResidentTree:
+        """Get resident tree with one more lease, loading or creating it."""
+        while True:
+            with self._lock:
+                tree = self._resident.get(name)
+                if tree is not None and not create and not tree.service.version:
+                    raise TreeNotFoundError(f"Tree {name} not found")
+                if tree is not None:
+                    self._resident.move_to_end(name)
+                    tree.leases += 1
+                    return tree
+                moving = self._moving.get(name)
+                if moving is None:
+                    spilled_version = self._spilled.pop(name, None)
+                    if spilled_version is None:
+                        if not create:
+                            raise TreeNotFoundError(f"Tree {name} not found")
+                        tree = _ResidentTree(self._service_factory(self._build([]), 0))
+                        tree.leases = 1
+                        self._resident[name] = tree
+                        logger.info("Tree created", extra={"tree": name})
+                        return tree
+                    moving = self._moving[name] = threading.Event()
+                    break
+            moving.wait()
+
+        try:
+            tree_store = self._build(open_snapshot(self._spill_path(name)).get_all())
+            tree = _ResidentTree(self._service_factory(tree_store, spilled_version), spilled_version)
+        except Exception:
+            with self._lock:
+                self._spilled[name] = spilled_version
+                self._moving.pop(name).set()
+            raise
+        with self._lock:
+            tree.leases = 1
+            self._resident[name] = tree
+            self._moving.pop(name).set()
+        logger.info("Tree loaded", extra={"tree": name, "version": spilled_version})
+        self._evict()
+        return tree
+
+    def _evict(self) -> None:
+        """Spill least recently used idle trees until resident trees fit the budget."""
+        with self._lock:
+            total = sum(len(tree.service.tree_store) for tree in self._resident.values())
+            victims = []
+            for name, tree in self._resident.items():
+                if total <= self.max_resident_items:
+                    break
+                if tree.leases == 0:
+                    victims.append((name, tree))
+                    total -= len(tree.service.tree_store)
+            for name, _ in victims:
+                del self._resident[name]
+                self._moving[name] = threading.Event()
+
+        for name, tree in victims:
+            snapshot = tree.service.snapshot
+            try:
+                if tree.spilled_version != snapshot.version:
+                    items = snapshot.tree_store.get_all()
+                    write_snapshot(CompactTreeStore(items), self._spill_path(name), meta={"version": snapshot.version})
+            except Exception:
+                logger.error("Failed to spill tree", extra={"tree": name}, exc_info=True)
+                with self._lock:
+                    self._resident[name] = tree
+                    self._resident.move_to_end(name, last=False)
+                    self._moving.pop(name).set()
+                continue
+            with self._lock:
+                self._spilled[name] = snapshot.version
+                self._moving.pop(name).set()
+            logger.info("Tree spilled", extra={"tree": name, "version": snapshot.version})
+
+    def delete(self, name: str) -> None:
+        """Delete a tree from memory and disk.
+
+        Requests already using the tree finish on the detached instance.
+
+        Args:
+            name: Tree name.
+
+        Raises:
+            TreeNotFoundError: If the tree does not exist.
+        """
+        while True:
+            with self._lock:
+                moving = self._moving.get(name)
+                if moving is None:
+                    if self._resident.pop(name, None) is None and self._spilled.pop(name, None) is None:
+                        raise TreeNotFoundError(f"Tree {name} not found")
+                    break
+            moving.wait()
+        if os.path.exists(self._spill_path(name)):
+            os.remove(self._spill_path(name))
+        logger.info("Tree deleted", extra={"tree": name})
+
+    def list_trees(self) -> List[Dict[str, object]]:
+        """Describe all trees.
+
+        Returns:
+            Name, residency, version and (for resident trees) items count of
+            every tree, sorted by name.
+        """
+        with self._lock:
+            trees = [
+                {
+                    "name": name,
+                    "resident": True,
+                    "version": tree.service.version,
+                    "items_count": len(tree.service.tree_store),
+                }
+                for name, tree in self._resident.items()
+                if tree.service.version
+            ]
+            trees += [
+                {"name": name, "resident": False, "version": version}
+                for name, version in self._spilled.items()
+            ]
+        return sorted(trees, key=lambda tree: tree["name"])
+
+    @property
+    def resident_items(self) -> int:
+        """Get number of items held by resident trees."""
+        with self._lock:
+            return sum(len(tree.service.tree_store) for tree in self._resident.values())
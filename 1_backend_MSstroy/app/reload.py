@@ -0,0 +1,179 @@
+"""Hot reload of the default tree from its source file.
+
+A daemon thread polls the file's modification time, size and inode; when
+they change (or a reload is requested explicitly), the new store is built
+and validated on that thread and then installed with a single atomic swap.
+Readers keep serving the previous tree until the swap, and a file that fails
+to load leaves the previous tree in place.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+FileSignature = Optional[Tuple[int, int, int]]
+
+
+def _timestamp() -> str:
+    """Get current UTC time in ISO 8601."""
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class TreeReloader:
+    """Rebuilds the default tree when its source file changes."""
+
+    def __init__(
+        self,
+        path: str,
+        load: Callable[[], object],
+        install: Callable[[object], object],
+        poll_seconds: float = 2.0,
+    ) -> None:
+        """Initialize reloader; nothing is watched until start().
+
+        Args:
+            path: Source file of the tree.
+            load: Builds and validates a store from the file.
+            install: Atomically publishes a built store.
+            poll_seconds: Interval between file checks.
+        """
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self._load = load
+        self._install = install
+        self._signature = self._stat()
+        self._requested = threading.Event()
+        self._requested_trigger = "request"
+        self._stopped = threading.Event()
+        self._reload_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._watching = False
+        self._running_since: Optional[str] = None
+        self._reloads = 0
+        self._failures = 0
+        self._last_reload: Optional[Dict[str, object]] = None
+        self._last_error: Optional[Dict[str, object]] = None
+
+    def _stat(self) -> FileSignature:
+        """Get (mtime, size, inode) of the file, or None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def start(self, watch: bool = True) -> None:
+        """Start the background thread.
+
+        Args:
+            watch: Poll the file for changes; otherwise only explicit requests reload.
+        """
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._requested.clear()
+        self._watching = watch
+        self._thread = threading.Thread(target=self._run, args=(watch,), name="tree-reload", daemon=True)
+        self._thread.start()
+        logger.info("Tree reloader started", extra={"path": self.path, "watch": watch})
+
+    def stop(self) -> None:
+        """Stop the background thread, letting a reload in progress finish."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._requested.set()
+        self._thread.join()
+        self._thread = None
+        self._watching = False
+
+    def request_reload(self, trigger: str = "request") -> None:
+        """Ask the background thread to reload without waiting for it.
+
+        Args:
+            trigger: What asked for the reload, reported in the status.
+        """
+        self._requested_trigger = trigger
+        self._requested.set()
+
+    def _run(self, watch: bool) -> None:
+        """Reload on request or file change until stopped."""
+        while not self._stopped.is_set():
+            requested = self._requested.wait(self.poll_seconds if watch else None)
+            if self._stopped.is_set():
+                return
+            if requested:
+                self._requested.clear()
+                trigger = self._requested_trigger
+            elif self._stat() != self._signature:
+                trigger = "file"
+            else:
+                continue
+            try:
+                self.reload(trigger)
+            except Exception:
+                # Already logged and recorded in the status.
+                pass
+
+    def reload(self, trigger: str = "request") -> Dict[str, object]:
+        """Build the tree from the file and swap it in; reloads run one at a time.
+
+        Args:
+            trigger: What caused the reload ("request", "signal", "file").
+
+        Returns:
+            Description of the completed reload.
+
+        Raises:
+            FileNotFoundError: If the file is missing.
+            Exception: Whatever load or install raised; the previous tree stays.
+        """
+        with self._reload_lock:
+            self._signature = self._stat()
+            self._running_since = _timestamp()
+            started = time.perf_counter()
+            logger.info("Tree reload started", extra={"path": self.path, "trigger": trigger})
+            try:
+                if self._signature is None:
+                    raise FileNotFoundError(f"Tree file not found: {self.path}")
+                tree_store = self._load()
+                self._install(tree_store)
+            except Exception as e:
+                self._failures += 1
+                self._last_error = {"at": _timestamp(), "trigger": trigger, "error": str(e)}
+                logger.error("Tree reload failed", extra={"path": self.path, "error": str(e)}, exc_info=True)
+                raise
+            finally:
+                self._running_since = None
+            self._reloads += 1
+            self._last_reload = {
+                "finished_at": _timestamp(),
+                "trigger": trigger,
+                "duration_seconds": round(time.perf_counter() - started, 3),
+                "items_count": len(tree_store),
+            }
+            logger.info("Tree reloaded", extra={"path": self.path, **self._last_reload})
+            return self._last_reload
+
+    def status(self) -> Dict[str, object]:
+        """Describe reload state for health checks.
+
+        Returns:
+            Watched path, whether a reload is running (and since when),
+            success and failure counts, and the last reload and error.
+        """
+        return {
+            "path": self.path,
+            "watching": self._watching,
+            "running_since": self._running_since,
+            "reloads": self._reloads,
+            "failures": self._failures,
+            "last_reload": self._last_reload,
+            "last_error": self._last_error,
+        }
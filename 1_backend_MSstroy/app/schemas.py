@@ -1,8 +1,31 @@
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, field_validator
 
 
+def validate_item(item: object) -> Dict[str, object]:
+    """Validate structure of a single item.
+
+    Args:
+        item: Decoded JSON value.
+
+    Returns:
+        The item.
+
+    Raises:
+        ValueError: If item is not an object with a positive integer 'id'.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Each item must be an object")
+    if "id" not in item:
+        raise ValueError("Each item must have 'id' field")
+    if not isinstance(item["id"], int):
+        raise ValueError("Item 'id' must be an integer")
+    if item["id"] <= 0:
+        raise ValueError("Item 'id' must be positive")
+    return item
+
+
 class ItemIdRequest(BaseModel):
     """Request schema for item ID operations."""
 
@@ -21,15 +44,165 @@ class TreeStoreRequest(BaseModel):
         if not v:
             raise ValueError("Items list cannot be empty")
         for item in v:
-            if "id" not in item:
-                raise ValueError("Each item must have 'id' field")
-            if not isinstance(item["id"], int):
-                raise ValueError("Item 'id' must be an integer")
-            if item["id"] <= 0:
-                raise ValueError("Item 'id' must be positive")
+            validate_item(item)
+        return v
+
+
+class ItemIdsRequest(BaseModel):
+    """Request schema for batch operations on several item IDs."""
+
+    ids: List[int] = Field(..., min_length=1, max_length=1000, description="Item IDs")
+
+    @field_validator("ids")
+    @classmethod
+    def validate_ids(cls, v: List[int]) -> List[int]:
+        """Validate all IDs are positive."""
+        if any(item_id <= 0 for item_id in v):
+            raise ValueError("Item IDs must be positive")
+        return v
+
+
+class AddItemsRequest(TreeStoreRequest):
+    """Request schema for adding a node or a subtree."""
+
+
+class RemoveItemRequest(ItemIdRequest):
+    """Request schema for item removal."""
+
+    recursive: bool = Field(False, description="Remove the whole subtree of the item")
+
+
+class MoveItemRequest(ItemIdRequest):
+    """Request schema for moving an item with its subtree."""
+
+    parent: Union[int, Literal["root"]] = Field(..., description="New parent ID or 'root'")
+
+
+class UpdateItemRequest(ItemIdRequest):
+    """Request schema for item attributes update."""
+
+    attributes: Dict[str, object] = Field(..., min_length=1, description="Attributes to set")
+    recursive: bool = Field(False, description="Apply attributes to the whole subtree")
+
+    @field_validator("attributes")
+    @classmethod
+    def validate_attributes(cls, v: Dict[str, object]) -> Dict[str, object]:
+        """Validate that structural fields are not updated."""
+        if "id" in v or "parent" in v:
+            raise ValueError("Attributes cannot contain 'id' or 'parent'")
+        return v
+
+
+class PatchTreeRequest(BaseModel):
+    """Request schema for applying a diff to the current tree."""
+
+    base_version: int = Field(..., ge=0, description="Tree version the diff was computed against")
+    added: List[Dict[str, object]] = Field(default_factory=list, description="New items")
+    removed: List[int] = Field(default_factory=list, description="IDs of items to remove with their subtrees")
+    changed: List[Dict[str, object]] = Field(
+        default_factory=list, description="New versions of existing items, replacing them (with 'parent')"
+    )
+
+    @field_validator("added", "changed")
+    @classmethod
+    def validate_items(cls, v: List[Dict[str, object]]) -> List[Dict[str, object]]:
+        """Validate items structure."""
+        for item in v:
+            validate_item(item)
+        return v
+
+    @field_validator("changed")
+    @classmethod
+    def validate_changed_parents(cls, v: List[Dict[str, object]]) -> List[Dict[str, object]]:
+        """Validate that changed items state their parent instead of implying a move to root."""
+        for item in v:
+            if "parent" not in item:
+                raise ValueError(f"Changed item {item['id']} must have 'parent'")
         return v
 
 
+class KthAncestorRequest(ItemIdRequest):
+    """Request schema for k-th ancestor lookup."""
+
+    k: int = Field(..., ge=0, description="Number of levels to go up")
+
+
+class IsAncestorRequest(ItemIdRequest):
+    """Request schema for ancestor check."""
+
+    ancestor_id: int = Field(..., gt=0, description="ID of the candidate ancestor")
+
+
+class ChildrenRequest(ItemIdRequest):
+    """Request schema for children lookup with optional pagination."""
+
+    cursor: Optional[str] = Field(None, description="Cursor returned by the previous page")
+    limit: Optional[int] = Field(
+        None, ge=1, le=1000, description="Maximum number of children per page; enables pagination"
+    )
+
+
+class LowestCommonAncestorRequest(ItemIdRequest):
+    """Request schema for lowest common ancestor lookup."""
+
+    other_id: int = Field(..., gt=0, description="ID of the second item")
+
+
+class DescendantsRequest(ItemIdRequest):
+    """Request schema for paginated descendants lookup."""
+
+    cursor: Optional[str] = Field(None, description="Cursor returned by the previous page")
+    limit: int = Field(100, ge=1, le=1000, description="Maximum number of items per page")
+    max_depth: Optional[int] = Field(None, ge=1, description="Maximum depth below the item")
+
+
+class LevelRequest(ItemIdRequest):
+    """Request schema for paginated level lookup."""
+
+    depth: int = Field(..., ge=1, description="Number of levels below the item")
+    cursor: Optional[str] = Field(None, description="Cursor returned by the previous page")
+    limit: int = Field(100, ge=1, le=1000, description="Maximum number of items per page")
+
+
+class SubtreeRequest(ItemIdRequest):
+    """Request schema for nested subtree export."""
+
+    max_depth: Optional[int] = Field(None, ge=0, description="Number of levels below the item to include")
+
+
+class FindByAttributeRequest(BaseModel):
+    """Request schema for attribute lookup."""
+
+    key: str = Field(..., min_length=1, description="Attribute key")
+    value: Union[str, int, float, bool, None] = Field(..., description="Attribute value to match")
+    root_id: Optional[int] = Field(None, gt=0, description="Limit search to the subtree of this item")
+
+
+Scalar = Union[str, int, float, bool, None]
+
+
+class QueryCondition(BaseModel):
+    """Single filter condition of a query."""
+
+    key: str = Field(..., min_length=1, description="Attribute key")
+    op: Literal["eq", "ne", "in", "lt", "le", "gt", "ge", "between"] = Field(..., description="Operator")
+    value: Union[Scalar, List[Scalar]] = Field(
+        ..., description="Scalar; list of values for 'in'; [low, high] for 'between'"
+    )
+
+
+class QueryRequest(BaseModel):
+    """Request schema for filtered, paginated query."""
+
+    conditions: List[QueryCondition] = Field(
+        ..., min_length=1, max_length=32, description="Conditions combined with AND"
+    )
+    root_id: Optional[int] = Field(None, gt=0, description="Limit search to the subtree of this item")
+    cursor: Optional[str] = Field(None, description="Cursor returned by the previous page")
+    limit: int = Field(100, ge=1, le=1000, description="Maximum number of matches per page")
+    fields: Literal["items", "ids"] = Field("items", description="Return full items or only their IDs")
+
+
 class TreeStoreResponse(BaseModel):
     """Response schema for tree operations."""
 
@@ -1,24 +1,369 @@
 """Business logic layer for TreeStore operations."""
 
-from typing import Dict, List
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
-from app.exceptions import ItemNotFoundError
+from app.cache import ResponseCache, etag_matches, make_etag
+from app.changes import ChangeEvent, ChangeFeed, describe_ids
+from app.encoding import JSON_MEDIA_TYPE, encode
+from app.exceptions import ItemNotFoundError, UnsupportedOperationError, VersionConflictError
+from app.export import CHILDREN_KEY, SubtreeCopy, iter_subtree_json
+from app.locking import ReadWriteLock
 from app.logger import get_logger
 from app.models import TreeStore
+from app.pagination import decode_versioned_cursor, encode_cursor
+from app.persistence import INIT_OPERATION, TreePersistence, encode_arguments
+from app.query import Condition
 
 logger = get_logger(__name__)
 
 
+def _require(tree_store: object, operation: str) -> Callable:
+    """Get bound operation of a store, failing if its engine lacks it.
+
+    Args:
+        tree_store: Store of the current snapshot.
+        operation: Method name.
+
+    Returns:
+        Bound method.
+
+    Raises:
+        UnsupportedOperationError: If the store does not implement the operation.
+    """
+    method = getattr(tree_store, operation, None)
+    if method is None:
+        raise UnsupportedOperationError(f"{type(tree_store).__name__} does not support {operation}")
+    return method
+
+
+class TreeSnapshot(NamedTuple):
+    """Immutable pairing of a published TreeStore with its version."""
+
+    tree_store: TreeStore
+    version: int
+
+
+def _page_offset(cursor: Optional[str], snapshot: TreeSnapshot) -> int:
+    """Decode the cursor of a paginated read against a pinned snapshot.
+
+    Cursors are positions in one tree version, so a cursor issued before
+    any change is rejected instead of silently skipping or repeating items.
+
+    Args:
+        cursor: Cursor of the page to fetch; None for the first page.
+        snapshot: Snapshot the page is read from.
+
+    Returns:
+        Position to continue from.
+
+    Raises:
+        ValueError: If cursor is malformed.
+        VersionConflictError: If cursor belongs to another tree version.
+    """
+    if not cursor:
+        return 0
+    offset, version = decode_versioned_cursor(cursor)
+    if version != snapshot.version:
+        raise VersionConflictError(f"Cursor is for tree version {version}, current version is {snapshot.version}")
+    return offset
+
+
+class _ReadGuard:
+    """Context manager pinning the snapshot of a service for one read.
+
+    A TreeStore is changed in place, so it is read under the service's read
+    lock until exit. Other engines are never modified and take no lock.
+    """
+
+    __slots__ = ("_service", "_locked")
+
+    def __init__(self, service: "TreeStoreService") -> None:
+        """Initialize guard.
+
+        Args:
+            service: Service to read from.
+        """
+        self._service = service
+        self._locked = False
+
+    def __enter__(self) -> TreeSnapshot:
+        """Take the read lock if needed and return the current snapshot."""
+        snapshot = self._service._snapshot
+        if isinstance(snapshot.tree_store, TreeStore):
+            self._service._lock.acquire_read()
+            self._locked = True
+            snapshot = self._service._snapshot
+        return snapshot
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Release the read lock if it was taken."""
+        if self._locked:
+            self._service._lock.release_read()
+
+
 class TreeStoreService:
-    """Service for TreeStore business logic."""
+    """Service for TreeStore business logic.
 
-    def __init__(self, tree_store: TreeStore) -> None:
+    Every read operation pins the current snapshot and works on it to the
+    end. Incremental mutations change the published TreeStore in place
+    (copying it would cost O(n)), so they hold the write side of a
+    readers-writer lock, and reads of a TreeStore hold the read side for one
+    operation: a reader sees a store either before or after a change, never
+    in between. Stored item dicts are replaced rather than modified and
+    lists the store keeps updating are copied before they leave the lock,
+    so results stay consistent after it is released. A full
+    re-initialization builds the new TreeStore before taking the lock and
+    then swaps the snapshot reference. CompactTreeStore snapshots are never
+    modified and are read without locking.
+
+    Operations beyond the core read API raise UnsupportedOperationError when
+    the current store is a read-only CompactTreeStore.
+
+    With persistence, every change is appended to the write-ahead log under
+    the write lock before it is applied, and the call returns once the log is
+    on disk. The fsync itself runs after the lock is released, so concurrent
+    writers share it; readers may therefore see a change whose fsync is still
+    in progress.
+    """
+
+    def __init__(
+        self,
+        tree_store: TreeStore,
+        cache_size: int = 1024,
+        version: int = 0,
+        change_feed_size: int = 1024,
+        persistence: Optional[TreePersistence] = None,
+    ) -> None:
         """Initialize service with TreeStore instance.
 
         Args:
             tree_store: TreeStore instance to operate on.
+            cache_size: Maximum number of cached encoded responses.
+            version: Initial tree version.
+            change_feed_size: Number of recent changes kept for watchers.
+            persistence: Started persistence to log changes to; None keeps
+                the tree in memory only.
+        """
+        self._snapshot = TreeSnapshot(tree_store, version)
+        self._lock = ReadWriteLock()
+        self._cache = ResponseCache(cache_size)
+        self._epoch = uuid.uuid4().hex[:12]
+        self._changes = ChangeFeed(change_feed_size, version)
+        self._persistence = persistence
+        self._log_ticket: Optional[object] = None
+        self._log_version = 0
+        self._compaction_lock = threading.Lock()
+
+    @contextmanager
+    def _mutating(self) -> Iterator[None]:
+        """Hold the write lock for a mutation, then wait until its log record is durable.
+
+        A logged operation that raises is followed by an abort record.
+        """
+        with self._lock.write():
+            self._log_ticket = None
+            try:
+                yield
+            except BaseException:
+                if self._log_ticket is not None:
+                    self._persistence.abort(self._log_version)
+                raise
+            ticket = self._log_ticket
+        if ticket is None:
+            return
+        self._persistence.commit(ticket)
+        if self._persistence.needs_snapshot and not self._compaction_lock.locked():
+            threading.Thread(target=self.compact, name="tree-compaction", daemon=True).start()
+
+    def _log_ahead(
+        self,
+        operation: Tuple[str, Union[Dict[str, object], bytes]],
+        version: Optional[int] = None,
+    ) -> None:
+        """Log operation before it is applied. Caller holds the write lock.
+
+        Args:
+            operation: Name and keyword arguments that replay the change.
+            version: Version the operation will produce; defaults to current + 1.
+        """
+        if self._persistence is None:
+            return
+        if version is None:
+            version = self._snapshot.version + 1
+        self._log_ticket = self._persistence.log(version, *operation)
+        self._log_version = version
+
+    def _reading(self) -> "_ReadGuard":
+        """Pin the current snapshot, holding the read lock if its store is mutable."""
+        return _ReadGuard(self)
+
+    def _publish(
+        self,
+        tree_store: TreeStore,
+        change: Dict[str, object],
+        version: Optional[int] = None,
+    ) -> TreeSnapshot:
+        """Publish tree_store as the next version. Caller holds the write lock.
+
+        The change must already be logged with _log_ahead().
+
+        Args:
+            tree_store: Store to publish (new or mutated in place).
+            change: Compact description of the change for watchers.
+            version: Explicit version to publish under; defaults to current + 1.
+
+        Returns:
+            Published snapshot.
+        """
+        if version is None:
+            version = self._snapshot.version + 1
+        self._snapshot = TreeSnapshot(tree_store, version)
+        self._cache.clear()
+        self._changes.append(version, change)
+        return self._snapshot
+
+    def compact(self) -> Optional[int]:
+        """Write a snapshot of the current tree and drop the log it supersedes.
+
+        Items are copied under the write lock; encoding and writing the
+        snapshot happen outside it, so writers are blocked only for the copy.
+
+        Returns:
+            Version of the written snapshot, or None without persistence.
+        """
+        if self._persistence is None:
+            return None
+        with self._compaction_lock:
+            with self._lock.write():
+                snapshot = self._snapshot
+                items = [dict(item) for item in snapshot.tree_store.get_all()]
+                self._persistence.start(snapshot.version)
+            self._persistence.write_snapshot(items, snapshot.version)
+        return snapshot.version
+
+    def get_changes(self, since: int) -> Optional[List[ChangeEvent]]:
+        """Get retained changes newer than a version.
+
+        Args:
+            since: Last version the consumer has seen.
+
+        Returns:
+            Change events, or None if changes after since are no longer
+            retained and the consumer must reread the tree.
+        """
+        return self._changes.since(since)
+
+    async def wait_for_changes(self, since: int, timeout: float) -> Optional[List[ChangeEvent]]:
+        """Wait for changes newer than a version without holding a thread.
+
+        Args:
+            since: Last version the consumer has seen.
+            timeout: Maximum seconds to wait.
+
+        Returns:
+            Same as get_changes(); an empty list on timeout.
+        """
+        return await self._changes.wait(since, timeout)
+
+    @property
+    def snapshot(self) -> TreeSnapshot:
+        """Get current snapshot; pin it to get a consistent view across calls."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Get current tree version (incremented on every change)."""
+        return self._snapshot.version
+
+    def get_cached_result(
+        self,
+        key: Hashable,
+        producer: Callable[[TreeStore], object],
+        if_none_match: Optional[str] = None,
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Tuple[Optional[bytes], str]:
+        """Get encoded response body for a read operation from the cache.
+
+        Args:
+            key: Resource key, e.g. ("getChildren", 4).
+            producer: Computes the result from the pinned store on cache miss.
+            if_none_match: Value of the If-None-Match request header.
+            media_type: Encoding of the body (see app.encoding).
+
+        Returns:
+            Tuple of (body, etag); body is None if the client's copy is current.
+        """
+        with self._reading() as snapshot:
+            return self._get_cached(snapshot, key, producer, if_none_match, media_type)
+
+    def get_cached_page(
+        self,
+        key: Tuple[Hashable, ...],
+        producer: Callable[[TreeStore, int, int], Tuple[List[Dict[str, object]], Optional[int]]],
+        cursor: Optional[str],
+        limit: int,
+        if_none_match: Optional[str] = None,
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Tuple[Optional[bytes], str]:
+        """Get encoded page of a paginated read operation from the cache.
+
+        Cursors are only valid for the tree version they were issued for.
+
+        Args:
+            key: Resource key, e.g. ("getChildren", 4).
+            producer: Returns (items, next_offset) for an offset and limit.
+            cursor: Cursor of the page to fetch; None for the first page.
+            limit: Maximum number of items per page.
+            if_none_match: Value of the If-None-Match request header.
+            media_type: Encoding of the body (see app.encoding).
+
+        Returns:
+            Tuple of (body, etag); body encodes page items and next cursor and
+            is None if the client's copy is current.
+
+        Raises:
+            ValueError: If cursor is malformed.
+            VersionConflictError: If cursor belongs to another tree version.
         """
-        self._tree_store = tree_store
+        with self._reading() as snapshot:
+            offset = _page_offset(cursor, snapshot)
+
+            def produce_page(tree_store: TreeStore) -> Dict[str, object]:
+                items, next_offset = producer(tree_store, offset, limit)
+                return {
+                    "items": items,
+                    "next_cursor": None if next_offset is None else encode_cursor(next_offset, snapshot.version),
+                }
+
+            return self._get_cached(snapshot, (*key, offset, limit), produce_page, if_none_match, media_type)
+
+    def _get_cached(
+        self,
+        snapshot: TreeSnapshot,
+        key: Hashable,
+        producer: Callable[[TreeStore], object],
+        if_none_match: Optional[str],
+        media_type: str,
+    ) -> Tuple[Optional[bytes], str]:
+        """Get encoded result for key in a pinned snapshot, computing it on miss.
+
+        The caller holds the read lock, so the result is encoded before a
+        writer can change the store. Every encoding is a separate
+        representation with its own cache entry and ETag.
+        """
+        if media_type != JSON_MEDIA_TYPE:
+            key = (key, media_type)
+        etag = make_etag(self._epoch, snapshot.version, key)
+        if etag_matches(if_none_match, etag):
+            return None, etag
+        body = self._cache.get(snapshot.version, key)
+        if body is None:
+            body = encode(producer(snapshot.tree_store), media_type)
+            self._cache.put(snapshot.version, key, body)
+        return body, etag
 
     def initialize_tree(self, items: List[Dict[str, object]]) -> Dict[str, object]:
         """Initialize tree with new items.
@@ -33,9 +378,175 @@ class TreeStoreService:
             ValueError: If items structure is invalid.
         """
         logger.debug("Initializing tree", extra={"items_count": len(items)})
-        self._tree_store = TreeStore(items)
-        logger.info("Tree initialized", extra={"items_count": len(items)})
-        return {"status": "initialized", "items_count": len(items)}
+        return self.replace_tree(TreeStore(items))
+
+    def replace_tree(self, tree_store: TreeStore, version: Optional[int] = None) -> Dict[str, object]:
+        """Atomically publish an already built store as the current tree.
+
+        Args:
+            tree_store: New TreeStore instance.
+            version: Externally assigned version (e.g. a shared memory
+                generation). Stores with a version not newer than the current
+                one are ignored.
+
+        Returns:
+            Dictionary with initialization status and items count.
+        """
+        # The new store is not shared yet, so its log record is encoded
+        # before readers are blocked.
+        arguments = encode_arguments({"items": tree_store.get_all()}) if self._persistence is not None else b""
+        with self._mutating():
+            if version is not None and version <= self._snapshot.version:
+                return {"status": "initialized", "items_count": len(self._snapshot.tree_store)}
+            change = {"type": "initialized", "items_count": len(tree_store)}
+            self._log_ahead((INIT_OPERATION, arguments), version)
+            snapshot = self._publish(tree_store, change, version)
+        logger.info("Tree initialized", extra={"items_count": len(tree_store), "version": snapshot.version})
+        return {"status": "initialized", "items_count": len(tree_store)}
+
+    def add_items(self, items: List[Dict[str, object]]) -> Dict[str, object]:
+        """Add a node or a subtree to the current tree.
+
+        Args:
+            items: Items to add.
+
+        Returns:
+            Dictionary with operation status and added items count.
+
+        Raises:
+            ValueError: If items conflict with the tree.
+        """
+        with self._mutating():
+            add_items = _require(self._snapshot.tree_store, "add_items")
+            self._log_ahead(("add_items", {"items": items}))
+            count = add_items(items)
+            self._publish(self._snapshot.tree_store, {"type": "added", **describe_ids(item["id"] for item in items)})
+        logger.info("Items added", extra={"items_count": count})
+        return {"status": "added", "items_count": count}
+
+    def remove_item(self, item_id: int, recursive: bool = False) -> Dict[str, object]:
+        """Remove item, optionally with its subtree.
+
+        Args:
+            item_id: ID of the item to remove.
+            recursive: Remove all descendants too.
+
+        Returns:
+            Dictionary with operation status and removed items count.
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+            ValueError: If item has children and recursive is False.
+        """
+        with self._mutating():
+            remove_item = _require(self._snapshot.tree_store, "remove_item")
+            self._log_ahead(("remove_item", {"item_id": item_id, "recursive": recursive}))
+            try:
+                removed_ids = remove_item(item_id, recursive)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+            self._publish(self._snapshot.tree_store, {"type": "removed", **describe_ids(removed_ids)})
+        logger.info("Items removed", extra={"item_id": item_id, "items_count": len(removed_ids)})
+        return {"status": "removed", "items_count": len(removed_ids)}
+
+    def move_item(self, item_id: int, parent: object) -> Dict[str, object]:
+        """Move item with its subtree under a new parent.
+
+        Args:
+            item_id: ID of the item to move.
+            parent: New parent ID or 'root'.
+
+        Returns:
+            Dictionary with operation status and the moved item.
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+            ValueError: If the move is invalid.
+        """
+        with self._mutating():
+            move_item = _require(self._snapshot.tree_store, "move_item")
+            self._log_ahead(("move_item", {"item_id": item_id, "parent": parent}))
+            try:
+                move_item(item_id, parent)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+            item = self._snapshot.tree_store.get_item(item_id)
+            self._publish(self._snapshot.tree_store, {"type": "moved", "id": item_id, "parent": item["parent"]})
+        logger.info("Item moved", extra={"item_id": item_id, "parent": parent})
+        return {"status": "moved", "item": item}
+
+    def update_item(
+        self,
+        item_id: int,
+        attributes: Dict[str, object],
+        recursive: bool = False,
+    ) -> Dict[str, object]:
+        """Update attributes of item, optionally of its whole subtree.
+
+        Args:
+            item_id: ID of the item to update.
+            attributes: Attributes to set.
+            recursive: Apply attributes to all descendants too.
+
+        Returns:
+            Dictionary with operation status and updated items count.
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+            ValueError: If attributes are invalid.
+        """
+        with self._mutating():
+            update_item = _require(self._snapshot.tree_store, "update_item")
+            self._log_ahead(("update_item", {"item_id": item_id, "attributes": attributes, "recursive": recursive}))
+            try:
+                updated_ids = update_item(item_id, attributes, recursive)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+            change = {"type": "updated", **describe_ids(updated_ids), "attributes": sorted(attributes)}
+            self._publish(self._snapshot.tree_store, change)
+        logger.info("Items updated", extra={"item_id": item_id, "items_count": len(updated_ids)})
+        return {"status": "updated", "items_count": len(updated_ids)}
+
+    def patch_tree(
+        self,
+        base_version: int,
+        added: List[Dict[str, object]],
+        removed: List[int],
+        changed: List[Dict[str, object]],
+    ) -> Dict[str, object]:
+        """Apply a diff to the current tree instead of rebuilding it.
+
+        Args:
+            base_version: Version the diff was computed against.
+            added: New items.
+            removed: IDs of items to remove with their subtrees.
+            changed: New versions of existing items.
+
+        Returns:
+            Dictionary with operation status, item counts and the new version.
+
+        Raises:
+            VersionConflictError: If the tree version differs from base_version.
+            ValueError: If the diff does not apply to the current tree.
+        """
+        with self._mutating():
+            current_version = self._snapshot.version
+            if base_version != current_version:
+                raise VersionConflictError(
+                    f"Patch is based on version {base_version}, current version is {current_version}"
+                )
+            apply_patch = _require(self._snapshot.tree_store, "apply_patch")
+            self._log_ahead(("apply_patch", {"added": added, "removed": removed, "changed": changed}))
+            counts = apply_patch(added, removed, changed)
+            change = {
+                "type": "patched",
+                "added": describe_ids(item["id"] for item in added),
+                "removed": describe_ids(removed),
+                "changed": describe_ids(item["id"] for item in changed),
+            }
+            snapshot = self._publish(self._snapshot.tree_store, change)
+        logger.info("Tree patched", extra={**counts, "version": snapshot.version})
+        return {"status": "patched", **counts, "version": snapshot.version}
 
     def get_all_items(self) -> List[Dict[str, object]]:
         """Get all items from the tree.
@@ -43,7 +554,8 @@ class TreeStoreService:
         Returns:
             List of all items in the tree.
         """
-        return self._tree_store.get_all()
+        with self._reading() as snapshot:
+            return list(snapshot.tree_store.get_all())
 
     def get_item_by_id(self, item_id: int) -> Dict[str, object]:
         """Get item by ID.
@@ -57,11 +569,42 @@ class TreeStoreService:
         Raises:
             ItemNotFoundError: If item with given ID not found.
         """
-        result = self._tree_store.get_item(item_id)
+        with self._reading() as snapshot:
+            result = snapshot.tree_store.get_item(item_id)
         if result is None:
             raise ItemNotFoundError(f"Item with ID {item_id} not found")
         return result
 
+    def export_subtree(self, item_id: int, max_depth: Optional[int] = None) -> Iterator[bytes]:
+        """Get streamed nested JSON of item's subtree from the current snapshot.
+
+        The item is looked up eagerly, so a missing item is reported before
+        streaming starts. A TreeStore subtree is copied under the read lock
+        (list references only, O(subtree size)), so the stream shows one
+        version of it; read-only engines are streamed directly unless some
+        item has a "children" attribute, in which case they are copied too
+        so the clash is reported before streaming.
+
+        Args:
+            item_id: ID of the subtree root.
+            max_depth: Number of levels below the item to include; None for all.
+
+        Returns:
+            Iterator over encoded ``{"result": <nested item>}`` chunks.
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+            ValueError: If an exported item has a "children" attribute.
+        """
+        with self._reading() as snapshot:
+            tree_store = snapshot.tree_store
+            item = tree_store.get_item(item_id)
+            if item is None:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found")
+            if isinstance(tree_store, TreeStore) or CHILDREN_KEY in tree_store.export_columns()[1]:
+                tree_store = SubtreeCopy(tree_store, item, max_depth)
+        return iter_subtree_json(tree_store, item, max_depth)
+
     def get_children(self, item_id: int) -> List[Dict[str, object]]:
         """Get all children of an item.
 
@@ -71,7 +614,8 @@ class TreeStoreService:
         Returns:
             List of child items.
         """
-        return self._tree_store.get_children(item_id)
+        with self._reading() as snapshot:
+            return list(snapshot.tree_store.get_children(item_id))
 
     def get_all_parents(self, item_id: int) -> List[Dict[str, object]]:
         """Get all parent items up to root.
@@ -82,9 +626,300 @@ class TreeStoreService:
         Returns:
             List of parent items from direct parent to root.
         """
-        return self._tree_store.get_all_parents(item_id)
+        with self._reading() as snapshot:
+            return snapshot.tree_store.get_all_parents(item_id)
+
+    def get_items_batch(self, item_ids: List[int]) -> Dict[str, Optional[Dict[str, object]]]:
+        """Get several items by ID.
+
+        Args:
+            item_ids: IDs of items to retrieve.
+
+        Returns:
+            Mapping of item ID (as string) to item, or None for missing items.
+        """
+        with self._reading() as snapshot:
+            return {str(item_id): snapshot.tree_store.get_item(item_id) for item_id in item_ids}
+
+    def get_children_batch(self, item_ids: List[int]) -> Dict[str, List[Dict[str, object]]]:
+        """Get children of several items.
+
+        Args:
+            item_ids: IDs of parent items.
+
+        Returns:
+            Mapping of item ID (as string) to list of child items.
+        """
+        with self._reading() as snapshot:
+            return {str(item_id): list(snapshot.tree_store.get_children(item_id)) for item_id in item_ids}
+
+    def get_all_parents_batch(self, item_ids: List[int]) -> Dict[str, List[Dict[str, object]]]:
+        """Get parent chains of several items, computing shared ancestors once.
+
+        Args:
+            item_ids: IDs of items to get parents for.
+
+        Returns:
+            Mapping of item ID (as string) to parent items from direct parent to root.
+        """
+        with self._reading() as snapshot:
+            chains = _require(snapshot.tree_store, "get_all_parents_batch")(item_ids)
+        return {str(item_id): chain for item_id, chain in chains.items()}
+
+    def get_depth(self, item_id: int) -> Dict[str, object]:
+        """Get depth of item.
+
+        Args:
+            item_id: ID of the item.
+
+        Returns:
+            Dictionary with item ID and its depth (root items have depth 0).
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+        """
+        with self._reading() as snapshot:
+            try:
+                depth = _require(snapshot.tree_store, "get_depth")(item_id)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+        return {"id": item_id, "depth": depth}
+
+    def get_kth_ancestor(self, item_id: int, k: int) -> Optional[Dict[str, object]]:
+        """Get ancestor k levels above item.
+
+        Args:
+            item_id: ID of the item.
+            k: Number of levels to go up.
+
+        Returns:
+            Ancestor item or None if k exceeds item depth.
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+        """
+        with self._reading() as snapshot:
+            try:
+                return _require(snapshot.tree_store, "get_kth_ancestor")(item_id, k)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+
+    def is_ancestor(self, ancestor_id: int, item_id: int) -> Dict[str, object]:
+        """Check whether one item is a proper ancestor of another.
+
+        Args:
+            ancestor_id: ID of the candidate ancestor.
+            item_id: ID of the item.
+
+        Returns:
+            Dictionary with both IDs and the check result.
+
+        Raises:
+            ItemNotFoundError: If either item not found.
+        """
+        with self._reading() as snapshot:
+            try:
+                result = _require(snapshot.tree_store, "is_ancestor")(ancestor_id, item_id)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {e.args[0]} not found") from e
+        return {"ancestor_id": ancestor_id, "id": item_id, "is_ancestor": result}
+
+    def get_lowest_common_ancestor(self, first_id: int, second_id: int) -> Optional[Dict[str, object]]:
+        """Get lowest common ancestor of two items.
+
+        Args:
+            first_id: ID of the first item.
+            second_id: ID of the second item.
+
+        Returns:
+            Lowest common ancestor item or None if items are in different trees.
+
+        Raises:
+            ItemNotFoundError: If either item not found.
+        """
+        with self._reading() as snapshot:
+            try:
+                return _require(snapshot.tree_store, "get_lowest_common_ancestor")(first_id, second_id)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {e.args[0]} not found") from e
+
+    def get_descendants(
+        self,
+        item_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        max_depth: Optional[int] = None,
+    ) -> Dict[str, object]:
+        """Get one page of descendants of item in preorder.
+
+        Args:
+            item_id: ID of the subtree root.
+            cursor: Cursor of the page to fetch; None for the first page.
+            limit: Maximum number of items per page.
+            max_depth: Maximum depth below the item.
+
+        Returns:
+            Dictionary with page items and cursor of the next page (or None).
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+            ValueError: If cursor is malformed.
+            VersionConflictError: If cursor belongs to another tree version.
+        """
+        with self._reading() as snapshot:
+            offset = _page_offset(cursor, snapshot)
+            try:
+                get_descendants = _require(snapshot.tree_store, "get_descendants")
+                items, next_offset = get_descendants(item_id, offset, limit, max_depth)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+        return {
+            "items": items,
+            "next_cursor": None if next_offset is None else encode_cursor(next_offset, snapshot.version),
+        }
+
+    def get_level(
+        self,
+        item_id: int,
+        depth: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict[str, object]:
+        """Get one page of items exactly depth levels below item.
+
+        Args:
+            item_id: ID of the subtree root.
+            depth: Levels below the item.
+            cursor: Cursor of the page to fetch; None for the first page.
+            limit: Maximum number of items per page.
+
+        Returns:
+            Dictionary with page items, cursor of the next page and total
+            number of items at that level.
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+            ValueError: If cursor is malformed.
+            VersionConflictError: If cursor belongs to another tree version.
+        """
+        with self._reading() as snapshot:
+            offset = _page_offset(cursor, snapshot)
+            try:
+                items, next_offset, total = _require(snapshot.tree_store, "get_level")(
+                    item_id, depth, offset, limit
+                )
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+        return {
+            "items": items,
+            "next_cursor": None if next_offset is None else encode_cursor(next_offset, snapshot.version),
+            "total": total,
+        }
+
+    def get_subtree_size(self, item_id: int) -> Dict[str, object]:
+        """Get number of items in subtree of item.
+
+        Args:
+            item_id: ID of the subtree root.
+
+        Returns:
+            Dictionary with item ID and subtree size (including the item).
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+        """
+        with self._reading() as snapshot:
+            try:
+                size = _require(snapshot.tree_store, "get_subtree_size")(item_id)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+        return {"id": item_id, "subtree_size": size}
+
+    def get_subtree_stats(self, item_id: int) -> Dict[str, object]:
+        """Get aggregates over the subtree of item.
+
+        Args:
+            item_id: ID of the subtree root.
+
+        Returns:
+            Dictionary with item ID, subtree size, height and attribute sums.
+
+        Raises:
+            ItemNotFoundError: If item with given ID not found.
+        """
+        with self._reading() as snapshot:
+            try:
+                stats = _require(snapshot.tree_store, "get_subtree_stats")(item_id)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {item_id} not found") from e
+        return {"id": item_id, **stats}
+
+    def find_by_attribute(
+        self,
+        key: str,
+        value: object,
+        root_id: Optional[int] = None,
+    ) -> List[Dict[str, object]]:
+        """Find items by attribute value, optionally within a subtree.
+
+        Args:
+            key: Attribute key.
+            value: Attribute value to match.
+            root_id: ID of the subtree root; None searches the whole tree.
+
+        Returns:
+            List of matching items.
+
+        Raises:
+            ItemNotFoundError: If root item not found.
+        """
+        with self._reading() as snapshot:
+            try:
+                return _require(snapshot.tree_store, "find_by_attribute")(key, value, root_id)
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {root_id} not found") from e
+
+    def query(
+        self,
+        conditions: List[Condition],
+        root_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        fields: str = "items",
+    ) -> Dict[str, object]:
+        """Get one page of items matching all conditions, in preorder.
+
+        Args:
+            conditions: Conditions combined with AND.
+            root_id: ID of the subtree root; None searches the whole tree.
+            cursor: Cursor of the page to fetch; None for the first page.
+            limit: Maximum number of matches per page.
+            fields: "items" for full items or "ids" for IDs only.
+
+        Returns:
+            Dictionary with page items (or ids), cursor of the next page and
+            total number of matches.
+
+        Raises:
+            ItemNotFoundError: If root item not found.
+            ValueError: If a condition or the cursor is invalid.
+            VersionConflictError: If cursor belongs to another tree version.
+        """
+        with self._reading() as snapshot:
+            offset = _page_offset(cursor, snapshot)
+            try:
+                items, next_offset, total = _require(snapshot.tree_store, "query")(
+                    conditions, root_id, offset, limit
+                )
+            except KeyError as e:
+                raise ItemNotFoundError(f"Item with ID {root_id} not found") from e
+        return {
+            fields: [item["id"] for item in items] if fields == "ids" else items,
+            "next_cursor": None if next_offset is None else encode_cursor(next_offset, snapshot.version),
+            "total": total,
+        }
 
     @property
     def tree_store(self) -> TreeStore:
-        """Get current TreeStore instance."""
-        return self._tree_store
+        """Get TreeStore of the current snapshot."""
+        return self._snapshot.tree_store
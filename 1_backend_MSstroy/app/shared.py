@@ -0,0 +1,169 @@
+"""Tree shared between worker processes through POSIX shared memory.
+
+Layout:
+
+* ``<name>-control`` holds the current generation number (uint64);
+* ``<name>-<generation>`` holds a binary snapshot (see ``app.snapshot``) of
+  that generation's CompactTreeStore.
+
+A publisher writes the new generation into a fresh segment, then stores its
+number in the control block with a single 8-byte write and unlinks the
+previous segment. Workers compare the control value with the generation
+they serve on every request and attach the new segment when it changes.
+Already mapped segments stay valid after unlink, so in-flight requests keep
+reading the generation they started with; a mapping is released once the
+last store built over it is gone.
+"""
+
+import fcntl
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, Optional, Tuple
+
+from app.compact import CompactTreeStore
+from app.logger import get_logger
+from app.snapshot import load_snapshot, pack_into, snapshot_size
+
+logger = get_logger(__name__)
+
+_CONTROL = struct.Struct("<Q")
+
+
+class _Segment(SharedMemory):
+    """Shared memory segment whose mapping lives as long as views into it.
+
+    Stores loaded from a segment hold memoryviews of its buffer, so closing
+    it explicitly would fail; the mapping is released by the last view.
+    """
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except BufferError:
+            pass
+
+
+def open_segment(name: str, create: bool = False, size: int = 0) -> _Segment:
+    """Open shared memory segment that outlives the creating process.
+
+    Python's resource tracker unlinks tracked segments when the process that
+    opened them exits, which would pull the tree from under other workers,
+    so segments are untracked right after opening.
+    """
+    segment = _Segment(name=name, create=create, size=size)
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def unlink_segment(name: str) -> None:
+    """Unlink shared memory segment if it still exists."""
+    try:
+        segment = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+class SharedTree:
+    """Generation-switched CompactTreeStore in shared memory."""
+
+    def __init__(self, name: str) -> None:
+        """Attach to (or create) the shared tree control block.
+
+        Args:
+            name: Shared memory name prefix, identical in all workers.
+        """
+        self._name = name
+        self._lock = threading.Lock()
+        self._loaded_generation = 0
+        with self._publish_lock():
+            try:
+                self._control = open_segment(f"{name}-control", create=True, size=_CONTROL.size)
+                _CONTROL.pack_into(self._control.buf, 0, 0)
+            except FileExistsError:
+                self._control = open_segment(f"{name}-control")
+
+    @contextmanager
+    def _publish_lock(self) -> Iterator[None]:
+        """Serialize publishers across processes with a file lock."""
+        path = os.path.join(tempfile.gettempdir(), f"{self._name}.lock")
+        with open(path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _segment_name(self, generation: int) -> str:
+        """Get segment name of a generation."""
+        return f"{self._name}-{generation}"
+
+    @property
+    def generation(self) -> int:
+        """Get latest published generation (0 if nothing was published)."""
+        return _CONTROL.unpack_from(self._control.buf)[0]
+
+    @property
+    def loaded_generation(self) -> int:
+        """Get generation this process currently serves."""
+        return self._loaded_generation
+
+    def publish(self, store: CompactTreeStore) -> int:
+        """Publish store as the next generation for all workers.
+
+        Args:
+            store: Store to share.
+
+        Returns:
+            Published generation number.
+        """
+        with self._publish_lock():
+            previous = self.generation
+            generation = previous + 1
+            segment = open_segment(self._segment_name(generation), create=True, size=max(snapshot_size(store), 1))
+            try:
+                pack_into(store, segment.buf)
+            finally:
+                segment.close()
+            _CONTROL.pack_into(self._control.buf, 0, generation)
+            if previous:
+                unlink_segment(self._segment_name(previous))
+        logger.info("Shared tree published", extra={"generation": generation, "items_count": len(store)})
+        return generation
+
+    def load(self) -> Optional[Tuple[CompactTreeStore, int]]:
+        """Attach to the latest generation if it differs from the loaded one.
+
+        Returns:
+            Tuple of (store, generation), or None if there is nothing new.
+        """
+        if self.generation == self._loaded_generation:
+            return None
+        with self._lock:
+            generation = self.generation
+            if generation == self._loaded_generation:
+                return None
+            try:
+                segment = open_segment(self._segment_name(generation))
+            except FileNotFoundError:
+                # Superseded between reading the control block and attaching;
+                # the next call will pick up the newer generation.
+                return None
+            store, _ = load_snapshot(segment.buf)
+            self._loaded_generation = generation
+        logger.info("Shared tree attached", extra={"generation": generation, "items_count": len(store)})
+        return store, generation
+
+    def destroy(self) -> None:
+        """Unlink control block and current generation (e.g. on deployment teardown)."""
+        with self._publish_lock():
+            generation = self.generation
+            if generation:
+                unlink_segment(self._segment_name(generation))
+            unlink_segment(f"{self._name}-control")
@@ -0,0 +1,260 @@
+"""Binary snapshot format for CompactTreeStore.
+
+A snapshot holds the prebuilt arrays of a CompactTreeStore so it can be
+opened with ``mmap`` without parsing or re-indexing:
+
+    magic (8 bytes) | header length (uint32 LE) | JSON header | sections
+
+Every section starts at an 8-byte aligned offset. Index arrays and
+attribute codes are stored as raw native arrays; distinct attribute values
+are stored as JSON lists. The header records section offsets (relative to
+the first aligned byte after the header), typecodes, item sizes and byte
+order, plus free-form metadata.
+
+Usage:
+    python -m app.snapshot compile app/data/default_items.json app/data/default_items.snap
+    python -m app.snapshot compile --workers 8 items.ndjson items.snap
+    python -m app.snapshot info app/data/default_items.snap
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from app.compact import ARRAY_TYPECODES, CODE_TYPECODE, CompactTreeStore
+
+MAGIC = b"TRSNAP01"
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+_PREFIX = struct.Struct("<8sI")
+
+Section = Tuple[int, bytes]
+
+
+def _align(offset: int) -> int:
+    """Round offset up to ALIGNMENT."""
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(store: CompactTreeStore, meta: Optional[Dict[str, object]]) -> Tuple[bytes, List[Section], int]:
+    """Plan snapshot layout.
+
+    Args:
+        store: Store to serialize.
+        meta: Free-form JSON-compatible metadata.
+
+    Returns:
+        Tuple of (prefix + header bytes, [(offset, data)], total size).
+    """
+    arrays, columns = store.export_columns()
+    payloads: List[Tuple[str, object]] = []
+    for name, values in arrays.items():
+        payloads.append((f"array:{name}", values))
+    for key, (codes, values) in columns.items():
+        payloads.append((f"codes:{key}", codes))
+        payloads.append((f"values:{key}", json.dumps(values, ensure_ascii=False).encode("utf-8")))
+
+    datas = [(name, data if isinstance(data, bytes) else memoryview(data).cast("B")) for name, data in payloads]
+    header: Dict[str, object] = {
+        "format": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": len(store),
+        "itemsizes": {code: array(code).itemsize for code in set(ARRAY_TYPECODES.values()) | {CODE_TYPECODE}},
+        "arrays": {},
+        "columns": {},
+        "meta": meta or {},
+    }
+
+    relative_sections = []
+    position = 0
+    for name, data in datas:
+        position = _align(position)
+        relative_sections.append((position, data))
+        kind, key = name.split(":", 1)
+        section = [position, len(data)]
+        if kind == "array":
+            header["arrays"][key] = section + [ARRAY_TYPECODES[key]]
+        elif kind == "codes":
+            header["columns"].setdefault(key, {})["codes"] = section + [CODE_TYPECODE]
+        else:
+            header["columns"].setdefault(key, {})["values"] = section
+        position += len(data)
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix = _PREFIX.pack(MAGIC, len(header_bytes)) + header_bytes
+    data_start = _align(len(prefix))
+    sections = [(data_start + offset, data) for offset, data in relative_sections]
+    return prefix, sections, data_start + position
+
+
+def snapshot_size(store: CompactTreeStore, meta: Optional[Dict[str, object]] = None) -> int:
+    """Get size in bytes of the snapshot of store.
+
+    Args:
+        store: Store to serialize.
+        meta: Metadata to embed.
+
+    Returns:
+        Snapshot size in bytes.
+    """
+    return _layout(store, meta)[2]
+
+
+def pack_into(store: CompactTreeStore, buffer: memoryview, meta: Optional[Dict[str, object]] = None) -> int:
+    """Write snapshot of store into a preallocated writable buffer.
+
+    Args:
+        store: Store to serialize.
+        buffer: Writable buffer of at least snapshot_size() bytes.
+        meta: Metadata to embed.
+
+    Returns:
+        Number of bytes written.
+    """
+    prefix, sections, size = _layout(store, meta)
+    buffer[:len(prefix)] = prefix
+    for offset, data in sections:
+        buffer[offset:offset + len(data)] = data
+    return size
+
+
+def _write_stream(store: CompactTreeStore, stream: BinaryIO, meta: Optional[Dict[str, object]]) -> None:
+    """Write snapshot sequentially to a binary stream."""
+    prefix, sections, size = _layout(store, meta)
+    stream.write(prefix)
+    position = len(prefix)
+    for offset, data in sections:
+        stream.write(b"\0" * (offset - position))
+        stream.write(data)
+        position = offset + len(data)
+    stream.write(b"\0" * (size - position))
+
+
+def write_snapshot(store: CompactTreeStore, path: str, meta: Optional[Dict[str, object]] = None) -> None:
+    """Atomically write snapshot of store to path.
+
+    Args:
+        store: Store to serialize.
+        path: Destination file path.
+        meta: Metadata to embed.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        _write_stream(store, f, meta)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def load_snapshot(buffer: object) -> Tuple[CompactTreeStore, Dict[str, object]]:
+    """Open snapshot over any buffer (mmap, shared memory, bytes) without copying arrays.
+
+    Args:
+        buffer: Object supporting the buffer protocol.
+
+    Returns:
+        Tuple of (store, metadata).
+
+    Raises:
+        ValueError: If buffer is not a compatible snapshot.
+    """
+    view = memoryview(buffer).cast("B")
+    if len(view) < _PREFIX.size:
+        raise ValueError("Snapshot is truncated")
+    magic, header_length = _PREFIX.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a TreeStore snapshot")
+    header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + header_length]))
+    data_start = _align(_PREFIX.size + header_length)
+    if header["format"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {header['format']}")
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError("Snapshot was written on a platform with different byte order")
+    for code, itemsize in header["itemsizes"].items():
+        if array(code).itemsize != itemsize:
+            raise ValueError(f"Snapshot uses {itemsize}-byte '{code}' arrays")
+
+    def section(offset: int, length: int, typecode: str) -> memoryview:
+        return view[data_start + offset:data_start + offset + length].cast(typecode)
+
+    arrays = {name: section(*spec) for name, spec in header["arrays"].items()}
+    columns = {}
+    for key, spec in header["columns"].items():
+        offset, length = spec["values"]
+        values = json.loads(bytes(view[data_start + offset:data_start + offset + length]))
+        columns[key] = (section(*spec["codes"]), values)
+    return CompactTreeStore.from_columns(columns=columns, **arrays), header["meta"]
+
+
+def open_snapshot(path: str) -> CompactTreeStore:
+    """Open snapshot file with mmap.
+
+    Pages are loaded lazily by the OS and shared between processes that map
+    the same file.
+
+    Args:
+        path: Snapshot file path.
+
+    Returns:
+        CompactTreeStore backed by the mapped file.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return load_snapshot(mapped)[0]
+
+
+def read_snapshot_meta(path: str) -> Dict[str, object]:
+    """Read metadata of a snapshot file.
+
+    Args:
+        path: Snapshot file path.
+
+    Returns:
+        Metadata dictionary.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return load_snapshot(mapped)[1]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="TreeStore binary snapshot tool")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser("compile", help="Compile JSON items into a snapshot")
+    compile_parser.add_argument("source", help="JSON file with a list of items")
+    compile_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Read source as NDJSON (one item per line) and parse it with this many processes",
+    )
+    compile_parser.add_argument("target", help="Snapshot file to write")
+    info_parser = commands.add_parser("info", help="Show snapshot summary")
+    info_parser.add_argument("path", help="Snapshot file")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        if args.workers:
+            # Imported here: app.parallel depends on this module through app.shared.
+            from app.parallel import build_compact
+
+            store = build_compact(args.source, args.workers)
+        else:
+            with open(args.source, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            store = CompactTreeStore(items)
+        write_snapshot(store, args.target, meta={"source": os.path.basename(args.source)})
+        print(f"{args.target}: {len(store)} items, {os.path.getsize(args.target)} bytes")
+    else:
+        store = open_snapshot(args.path)
+        meta = read_snapshot_meta(args.path)
+        print(json.dumps({"items": len(store), "meta": meta}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks for TreeStore storage engines."""
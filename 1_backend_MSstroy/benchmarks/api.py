@@ -0,0 +1,220 @@
+"""In-process ASGI load test of the tree HTTP API.
+
+Requests go through the full FastAPI stack (routing, validation, middleware,
+serialization) via httpx's ASGI transport, without sockets or a server.
+
+Usage:
+    python -m benchmarks.api --shapes random --sizes 10000 100000 --requests 2000 --concurrency 32
+    python -m benchmarks.api --accept application/msgpack
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from app import main as server
+from benchmarks.generators import SHAPES, TYPES, random_tree
+from benchmarks.report import latency_summary, write_results
+
+INIT_PAYLOAD_SIZE = 1000
+
+# Endpoints that rebuild the whole (small) tree per request get 1% of the requests.
+HEAVY_ENDPOINTS = {"/api/v1/tree/init", "/api/v1/tree/initStream"}
+
+
+class Endpoint(NamedTuple):
+    """Load test target: request factory and how to issue the requests."""
+
+    method: str
+    path: str
+    body: Optional[Callable[[random.Random], object]]
+    sequential: bool = False
+    ndjson: bool = False
+
+
+def endpoints(size: int) -> List[Endpoint]:
+    """Build endpoint list for a tree with IDs 1..size, in execution order.
+
+    Reads come first, then mutations on leaves added above size (removed at
+    the end), then re-initialization with a small tree.
+    """
+    added: List[int] = []
+    moved: List[int] = []
+
+    def any_id(rng: random.Random) -> int:
+        return rng.randint(1, size)
+
+    def item_id(rng: random.Random) -> Dict[str, object]:
+        return {"id": any_id(rng)}
+
+    def add(rng: random.Random) -> Dict[str, object]:
+        new_id = size + len(added) + 1
+        added.append(new_id)
+        return {"items": [{"id": new_id, "parent": any_id(rng), "type": rng.choice(TYPES)}]}
+
+    def move(rng: random.Random) -> Dict[str, object]:
+        moved.append(added[len(moved) % len(added)])
+        return {"id": moved[-1], "parent": any_id(rng)}
+
+    def patch(rng: random.Random) -> Dict[str, object]:
+        changed_id = added[rng.randrange(len(added))]
+        changed = {"id": changed_id, "parent": server._tree_service.tree_store.get_item(changed_id)["parent"]}
+        changed["type"] = rng.choice(TYPES)
+        return {"base_version": server._tree_service.version, "changed": [changed]}
+
+    init_items = random_tree(INIT_PAYLOAD_SIZE, 0)
+    return [
+        Endpoint("GET", "/api/v1/tree/getAll", None),
+        Endpoint("POST", "/api/v1/tree/getItem", item_id),
+        Endpoint("POST", "/api/v1/tree/getChildren", item_id),
+        Endpoint("POST", "/api/v1/tree/getAllParents", item_id),
+        Endpoint("POST", "/api/v1/tree/getItemsBatch", lambda rng: {"ids": [any_id(rng) for _ in range(100)]}),
+        Endpoint("POST", "/api/v1/tree/getChildrenBatch", lambda rng: {"ids": [any_id(rng) for _ in range(100)]}),
+        Endpoint("POST", "/api/v1/tree/getAllParentsBatch", lambda rng: {"ids": [any_id(rng) for _ in range(100)]}),
+        Endpoint("POST", "/api/v1/tree/getDepth", item_id),
+        Endpoint("POST", "/api/v1/tree/getKthAncestor", lambda rng: {"id": any_id(rng), "k": rng.randint(0, 8)}),
+        Endpoint("POST", "/api/v1/tree/isAncestor", lambda rng: {"id": any_id(rng), "ancestor_id": any_id(rng)}),
+        Endpoint(
+            "POST", "/api/v1/tree/getLowestCommonAncestor",
+            lambda rng: {"id": any_id(rng), "other_id": any_id(rng)},
+        ),
+        Endpoint("POST", "/api/v1/tree/getDescendants", lambda rng: {"id": any_id(rng), "limit": 100}),
+        Endpoint("POST", "/api/v1/tree/getLevel", lambda rng: {"id": any_id(rng), "depth": 2, "limit": 100}),
+        Endpoint("POST", "/api/v1/tree/getSubtree", lambda rng: {"id": any_id(rng), "max_depth": 2}),
+        Endpoint("POST", "/api/v1/tree/getSubtreeSize", item_id),
+        Endpoint("POST", "/api/v1/tree/getStats", item_id),
+        Endpoint(
+            "POST", "/api/v1/tree/findByAttribute",
+            lambda rng: {"key": "type", "value": rng.choice(TYPES), "root_id": any_id(rng)},
+        ),
+        Endpoint(
+            "POST", "/api/v1/tree/query",
+            lambda rng: {
+                "conditions": [{"key": "type", "op": "in", "value": ["group", "product"]}],
+                "root_id": any_id(rng),
+                "fields": "ids",
+            },
+        ),
+        Endpoint("POST", "/api/v1/tree/addItems", add),
+        Endpoint("POST", "/api/v1/tree/updateItem", lambda rng: {"id": any_id(rng), "attributes": {"type": "group"}}),
+        Endpoint("POST", "/api/v1/tree/moveItem", move),
+        Endpoint("POST", "/api/v1/tree/patch", patch, sequential=True),
+        Endpoint("POST", "/api/v1/tree/removeItem", lambda rng: {"id": added.pop()} if added else {"id": size + 1}),
+        Endpoint("POST", "/api/v1/tree/init", lambda rng: {"items": init_items}),
+        Endpoint("POST", "/api/v1/tree/initStream", lambda rng: init_items, ndjson=True),
+    ]
+
+
+async def load(
+    client: httpx.AsyncClient,
+    endpoint: Endpoint,
+    rng: random.Random,
+    requests: int,
+    concurrency: int,
+) -> Dict[str, object]:
+    """Issue requests to one endpoint with bounded concurrency.
+
+    Request bodies are built lazily right before sending, so mutations see
+    the effects of earlier ones.
+
+    Returns:
+        Throughput, status code counts and latency summary.
+    """
+    samples: List[float] = []
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(1 if endpoint.sequential else concurrency)
+
+    async def send() -> None:
+        async with semaphore:
+            kwargs: Dict[str, object] = {}
+            if endpoint.ndjson:
+                lines = (json.dumps(item) for item in endpoint.body(rng))
+                kwargs["content"] = "\n".join(lines).encode()
+                kwargs["headers"] = {"Content-Type": "application/x-ndjson"}
+            elif endpoint.body is not None:
+                kwargs["json"] = endpoint.body(rng)
+            started = time.perf_counter()
+            response = await client.request(endpoint.method, endpoint.path, **kwargs)
+            samples.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": 1 if endpoint.sequential else concurrency,
+        "requests_per_second": round(requests / elapsed, 1),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "latency": latency_summary(samples),
+    }
+
+
+async def run(
+    shape: str,
+    size: int,
+    seed: int,
+    requests: int,
+    concurrency: int,
+    accept: Optional[str] = None,
+) -> Dict[str, object]:
+    """Load test every tree endpoint against one generated tree.
+
+    The tree is installed through the service directly, so setup does not
+    count as an init request. accept, if given, is sent as the Accept header
+    of every request; endpoints without binary encodings still answer JSON.
+
+    Returns:
+        Result row with per-endpoint measurements.
+    """
+    server._tree_service.replace_tree(server._build_tree_store(SHAPES[shape](size, seed)))
+    rng = random.Random(seed)
+    results = {}
+    transport = httpx.ASGITransport(app=server.app)
+    headers = {"Accept": accept} if accept else None
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", headers=headers) as client:
+        for endpoint in endpoints(size):
+            count = max(1, requests // 100) if endpoint.path in HEAVY_ENDPOINTS else requests
+            results[endpoint.path] = await load(client, endpoint, rng, count, concurrency)
+    return {"shape": shape, "size": size, "endpoints": results}
+
+
+def main() -> None:
+    """Run load test, print a summary and write JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=["random"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--accept", help="Accept header of every request, e.g. application/msgpack")
+    parser.add_argument("--log-level", default="WARNING", help="Server log level during the run")
+    parser.add_argument("--output", default="benchmarks/results/api.json")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level)
+    results = []
+    for shape in args.shapes:
+        for size in args.sizes:
+            row = asyncio.run(run(shape, size, args.seed, args.requests, args.concurrency, args.accept))
+            results.append(row)
+            print(f"{shape} x {size}:")
+            for path, summary in row["endpoints"].items():
+                print(
+                    f"  {path:<40}{summary['requests_per_second']:>10} rps"
+                    f"{summary['latency'].get('p50_us', '-'):>12} us p50  {summary['status_codes']}"
+                )
+
+    write_results(args.output, "api", vars(args), results)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Build benchmark: serial vs parallel CompactTreeStore construction from NDJSON.
+
+The serial baseline parses the file line by line and builds the store in one
+process; the parallel build (``app.parallel``) is measured for each worker
+count and checked to produce identical columns.
+
+Usage:
+    python -m benchmarks.build --sizes 1000000 10000000 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterator, List
+
+from app import parallel
+from app.compact import CompactTreeStore
+from benchmarks.generators import SHAPES
+from benchmarks.report import write_results
+
+
+def write_ndjson(path: str, shape: str, size: int, seed: int) -> None:
+    """Write generated tree as NDJSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        for item in SHAPES[shape](size, seed):
+            f.write(json.dumps(item))
+            f.write("\n")
+
+
+def read_ndjson(path: str) -> Iterator[Dict[str, object]]:
+    """Parse NDJSON file line by line."""
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def run(shape: str, size: int, seed: int, workers: List[int], min_shard_bytes: int) -> Dict[str, object]:
+    """Measure serial and parallel builds of one generated tree.
+
+    Args:
+        shape: Generator name from SHAPES.
+        size: Number of items.
+        seed: Generator seed.
+        workers: Worker counts to measure.
+        min_shard_bytes: Override of parallel.MIN_SHARD_BYTES.
+
+    Returns:
+        Result row with file size, serial time and per-worker-count time and speedup.
+
+    Raises:
+        AssertionError: If a parallel build differs from the serial one.
+    """
+    fd, path = tempfile.mkstemp(suffix=".ndjson")
+    os.close(fd)
+    default_min_shard_bytes = parallel.MIN_SHARD_BYTES
+    parallel.MIN_SHARD_BYTES = min_shard_bytes
+    try:
+        write_ndjson(path, shape, size, seed)
+        started = time.perf_counter()
+        serial = CompactTreeStore(read_ndjson(path))
+        serial_seconds = time.perf_counter() - started
+        expected = serial.export_columns()
+        del serial
+
+        measurements = []
+        for count in workers:
+            started = time.perf_counter()
+            store = parallel.build_compact(path, count)
+            seconds = time.perf_counter() - started
+            assert store.export_columns() == expected, f"parallel build with {count} workers differs"
+            del store
+            measurements.append({
+                "workers": count,
+                "seconds": round(seconds, 3),
+                "speedup": round(serial_seconds / seconds, 2) if seconds else None,
+            })
+        return {
+            "shape": shape,
+            "size": size,
+            "file_bytes": os.path.getsize(path),
+            "serial_seconds": round(serial_seconds, 3),
+            "parallel": measurements,
+        }
+    finally:
+        parallel.MIN_SHARD_BYTES = default_min_shard_bytes
+        os.remove(path)
+
+
+def main() -> None:
+    """Run benchmark, print a scaling table and write JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=["random"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--min-shard-bytes", type=int, default=parallel.MIN_SHARD_BYTES)
+    parser.add_argument("--output", default="benchmarks/results/build.json")
+    args = parser.parse_args()
+
+    workers = sorted(set(args.workers))
+    results = []
+    print(f"CPU count: {os.cpu_count()}")
+    for shape in args.shapes:
+        for size in args.sizes:
+            row = run(shape, size, args.seed, workers, args.min_shard_bytes)
+            results.append(row)
+            print(f"{shape} x {size} ({row['file_bytes'] / 2**20:.1f} MB): serial {row['serial_seconds']} s")
+            for measurement in row["parallel"]:
+                print(f"  {measurement['workers']:>3} workers{measurement['seconds']:>10} s{measurement['speedup']:>8}x")
+
+    write_results(args.output, "build", vars(args), results)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Seeded tree generators for benchmarks."""
+
+import random
+from typing import Callable, Dict, List
+
+from app.models import ROOT_PARENT
+
+TYPES = ("category", "group", "product", None)
+
+
+def random_tree(size: int, seed: int = 0) -> List[Dict[str, object]]:
+    """Generate random-shaped tree where each node attaches to an earlier one.
+
+    Args:
+        size: Number of items.
+        seed: Random seed for reproducible output.
+
+    Returns:
+        List of items in parent-before-child order.
+    """
+    rng = random.Random(seed)
+    items: List[Dict[str, object]] = [{"id": 1, "parent": ROOT_PARENT}]
+    for item_id in range(2, size + 1):
+        items.append({
+            "id": item_id,
+            "parent": rng.randint(1, item_id - 1),
+            "type": rng.choice(TYPES),
+        })
+    return items[:size]
+
+
+def wide_tree(size: int, seed: int = 0, fanout: int = 1000) -> List[Dict[str, object]]:
+    """Generate shallow tree where every node has up to fanout children.
+
+    Args:
+        size: Number of items.
+        seed: Random seed for attribute values.
+        fanout: Children per node (breadth-first fill).
+
+    Returns:
+        List of items in parent-before-child order.
+    """
+    rng = random.Random(seed)
+    items: List[Dict[str, object]] = [{"id": 1, "parent": ROOT_PARENT}]
+    for item_id in range(2, size + 1):
+        items.append({
+            "id": item_id,
+            "parent": (item_id - 2) // fanout + 1,
+            "type": rng.choice(TYPES),
+        })
+    return items[:size]
+
+
+def deep_tree(size: int, seed: int = 0, branch_probability: float = 0.01) -> List[Dict[str, object]]:
+    """Generate deep tree: a long chain with occasional short side branches.
+
+    Each node continues the chain from the previous node, except that with
+    branch_probability it attaches to a random earlier node instead.
+
+    Args:
+        size: Number of items.
+        seed: Random seed for reproducible output.
+        branch_probability: Chance of attaching off the chain.
+
+    Returns:
+        List of items in parent-before-child order.
+    """
+    rng = random.Random(seed)
+    items: List[Dict[str, object]] = [{"id": 1, "parent": ROOT_PARENT}]
+    for item_id in range(2, size + 1):
+        if rng.random() < branch_probability:
+            parent = rng.randint(1, item_id - 1)
+        else:
+            parent = item_id - 1
+        items.append({"id": item_id, "parent": parent, "type": rng.choice(TYPES)})
+    return items[:size]
+
+
+SHAPES: Dict[str, Callable[[int, int], List[Dict[str, object]]]] = {
+    "wide": wide_tree,
+    "deep": deep_tree,
+    "random": random_tree,
+}
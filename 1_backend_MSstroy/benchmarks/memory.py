@@ -0,0 +1,83 @@
+"""Memory benchmark: dict TreeStore engine vs CompactTreeStore.
+
+Usage:
+    python -m benchmarks.memory --size 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from app.compact import CompactTreeStore
+from app.models import TreeStore
+from benchmarks.generators import random_tree
+
+ENGINES: Dict[str, Callable[[List[Dict[str, object]]], object]] = {
+    "dict": TreeStore,
+    "compact": CompactTreeStore,
+}
+
+
+def measure(engine: str, size: int, seed: int) -> Dict[str, object]:
+    """Measure retained and peak memory of building one engine.
+
+    Build time is taken from a separate untraced run because tracemalloc slows
+    down allocation-heavy code. For the memory run the input items are
+    generated inside the traced region and released after the build, so
+    "retained" is what the engine keeps alive on its own (the dict engine
+    keeps the input items, the compact engine does not).
+
+    Args:
+        engine: Engine name from ENGINES.
+        size: Number of items.
+        seed: Generator seed.
+
+    Returns:
+        Dictionary with engine name, size, build time and memory in bytes.
+    """
+    items = random_tree(size, seed)
+    started = time.perf_counter()
+    ENGINES[engine](items)
+    build_seconds = time.perf_counter() - started
+    del items
+
+    gc.collect()
+    tracemalloc.start()
+    items = random_tree(size, seed)
+    store = ENGINES[engine](items)
+    del items
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return {
+        "engine": engine,
+        "size": size,
+        "build_seconds": round(build_seconds, 3),
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "bytes_per_item": round(retained / size, 1) if size else 0.0,
+    }
+
+
+def main() -> None:
+    """Run benchmark and print a comparison table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = [measure(engine, args.size, args.seed) for engine in ENGINES]
+    print(f"{'engine':<10}{'build, s':>10}{'retained, MB':>15}{'peak, MB':>12}{'B/item':>10}")
+    for row in results:
+        print(
+            f"{row['engine']:<10}{row['build_seconds']:>10}"
+            f"{row['retained_bytes'] / 2**20:>15.1f}{row['peak_bytes'] / 2**20:>12.1f}"
+            f"{row['bytes_per_item']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Shared helpers for benchmark measurements and result files."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, object]:
+    """Summarize per-call latencies.
+
+    Args:
+        samples: Durations in seconds.
+
+    Returns:
+        Dictionary with call count and mean/p50/p95/p99/max in microseconds.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {"calls": 0}
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1e6, 2)
+
+    return {
+        "calls": len(ordered),
+        "mean_us": round(sum(ordered) / len(ordered) * 1e6, 2),
+        "p50_us": percentile(0.50),
+        "p95_us": percentile(0.95),
+        "p99_us": percentile(0.99),
+        "max_us": round(ordered[-1] * 1e6, 2),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    """Get current git commit of the working tree, if available."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def write_results(path: str, suite: str, parameters: Dict[str, object], results: List[Dict[str, object]]) -> None:
+    """Write benchmark results with run metadata as JSON.
+
+    Args:
+        path: Output file path; parent directories are created.
+        suite: Benchmark suite name.
+        parameters: Command line parameters of the run.
+        results: Result rows.
+    """
+    document = {
+        "suite": suite,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,189 @@
+"""TreeStore benchmark: construction time, memory and per-operation latency.
+
+Usage:
+    python -m benchmarks.store --shapes wide deep random --sizes 1000 100000 1000000
+"""
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from app.models import ROOT_PARENT, TreeStore
+from app.query import Condition
+from benchmarks.generators import SHAPES, TYPES
+from benchmarks.report import latency_summary, write_results
+
+ArgsFactory = Callable[[random.Random], Tuple[object, ...]]
+
+
+def build_store(items: List[Dict[str, object]]) -> TreeStore:
+    """Build store with the same options as the API server defaults."""
+    return TreeStore(items, indexed_attributes=["type"], aggregated_attributes=[])
+
+
+def read_operations(size: int) -> Dict[str, ArgsFactory]:
+    """Argument factories for read operations over IDs 1..size."""
+
+    def any_id(rng: random.Random) -> int:
+        return rng.randint(1, size)
+
+    return {
+        "get_all": lambda rng: (),
+        "get_item": lambda rng: (any_id(rng),),
+        "get_all_page": lambda rng: (rng.randrange(size), 100),
+        "get_children": lambda rng: (any_id(rng),),
+        "get_children_page": lambda rng: (any_id(rng), 0, 100),
+        "get_all_parents": lambda rng: (any_id(rng),),
+        "get_all_parents_batch": lambda rng: ([any_id(rng) for _ in range(100)],),
+        "get_depth": lambda rng: (any_id(rng),),
+        "get_kth_ancestor": lambda rng: (any_id(rng), rng.randint(0, 8)),
+        "is_ancestor": lambda rng: (any_id(rng), any_id(rng)),
+        "get_lowest_common_ancestor": lambda rng: (any_id(rng), any_id(rng)),
+        "get_subtree_size": lambda rng: (any_id(rng),),
+        "get_subtree_stats": lambda rng: (any_id(rng),),
+        "get_descendants": lambda rng: (any_id(rng), 0, 100),
+        "get_level": lambda rng: (any_id(rng), 2, 0, 100),
+        "find_by_attribute": lambda rng: ("type", rng.choice(TYPES), any_id(rng)),
+        "query": lambda rng: ([Condition("type", "in", ["group", "product"])], any_id(rng), 0, 100),
+    }
+
+
+def write_operations(store: TreeStore, size: int) -> Dict[str, ArgsFactory]:
+    """Argument factories for mutations.
+
+    New leaves get IDs above size; they are added, moved, patched and finally
+    removed, so the original tree keeps its shape across runs.
+    """
+    added: List[int] = []
+    moved: List[int] = []
+
+    def new_leaf(rng: random.Random) -> Dict[str, object]:
+        item_id = size + len(added) + 1
+        added.append(item_id)
+        return {"id": item_id, "parent": rng.randint(1, size), "type": rng.choice(TYPES)}
+
+    def move(rng: random.Random) -> Tuple[object, ...]:
+        item_id = added[len(moved) % len(added)]
+        moved.append(item_id)
+        return item_id, rng.randint(1, size)
+
+    def patch(rng: random.Random) -> Tuple[object, ...]:
+        changed_id = rng.randint(2, size)
+        changed = {"id": changed_id, "parent": store.get_item(changed_id)["parent"], "type": rng.choice(TYPES)}
+        return [new_leaf(rng)], [], [changed]
+
+    return {
+        "add_items": lambda rng: ([new_leaf(rng)],),
+        "update_item": lambda rng: (rng.randint(1, size), {"type": rng.choice(TYPES)}),
+        "move_item": move,
+        "apply_patch": patch,
+        "remove_item": lambda rng: (added.pop(),),
+    }
+
+
+def time_operation(
+    store: TreeStore,
+    name: str,
+    make_args: ArgsFactory,
+    rng: random.Random,
+    calls: int,
+    budget: float,
+) -> Dict[str, object]:
+    """Time calls of one store method.
+
+    Arguments are generated outside the timed region. Sampling stops after
+    calls calls or once budget seconds were spent, whichever comes first.
+    """
+    method = getattr(store, name)
+    samples = []
+    deadline = time.perf_counter() + budget
+    for _ in range(calls):
+        args = make_args(rng)
+        started = time.perf_counter()
+        method(*args)
+        finished = time.perf_counter()
+        samples.append(finished - started)
+        if finished > deadline:
+            break
+    return latency_summary(samples)
+
+
+def measure_memory(shape: str, size: int, seed: int) -> Tuple[int, int]:
+    """Measure retained and peak traced memory of building a store.
+
+    Items are generated inside the traced region, so the result includes
+    the input dicts the store keeps alive.
+    """
+    gc.collect()
+    tracemalloc.start()
+    store = build_store(SHAPES[shape](size, seed))
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return retained, peak
+
+
+def run(shape: str, size: int, seed: int, calls: int, budget: float, memory: bool) -> Dict[str, object]:
+    """Benchmark one tree shape and size.
+
+    Returns:
+        Result row with build time, memory and latency summaries per operation.
+    """
+    items = SHAPES[shape](size, seed)
+    gc.collect()
+    started = time.perf_counter()
+    store = build_store(items)
+    build_seconds = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    operations = {}
+    for name, make_args in read_operations(size).items():
+        operations[name] = time_operation(store, name, make_args, rng, calls, budget)
+    write_args = write_operations(store, size)
+    for name in ("add_items", "update_item", "move_item", "apply_patch"):
+        operations[name] = time_operation(store, name, write_args[name], rng, calls, budget)
+    # Every leaf added above is removed, however many calls the budget allowed.
+    operations["remove_item"] = time_operation(
+        store, "remove_item", write_args["remove_item"], rng, len(store) - size, float("inf")
+    )
+    assert len(store) == size and store.get_item(1)["parent"] == ROOT_PARENT
+
+    row: Dict[str, object] = {"shape": shape, "size": size, "build_seconds": round(build_seconds, 3)}
+    del store, items
+    if memory:
+        row["retained_bytes"], row["peak_bytes"] = measure_memory(shape, size, seed)
+    row["operations"] = operations
+    return row
+
+
+def main() -> None:
+    """Run benchmark, print a summary and write JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=sorted(SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--calls", type=int, default=1000, help="Maximum calls per operation")
+    parser.add_argument("--budget", type=float, default=1.0, help="Time budget per operation, seconds")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--output", default="benchmarks/results/store.json")
+    args = parser.parse_args()
+
+    results = []
+    for shape in args.shapes:
+        for size in args.sizes:
+            row = run(shape, size, args.seed, args.calls, args.budget, not args.no_memory)
+            results.append(row)
+            print(f"{shape} x {size}: build {row['build_seconds']} s")
+            for name, summary in row["operations"].items():
+                print(f"  {name:<28}{summary.get('p50_us', '-'):>12} us p50{summary.get('p95_us', '-'):>12} us p95")
+
+    write_results(args.output, "store", vars(args), results)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
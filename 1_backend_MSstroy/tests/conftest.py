@@ -0,0 +1,27 @@
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import ROOT_PARENT
+
+API_ITEMS = [
+    {"id": 1, "parent": ROOT_PARENT},
+    {"id": 2, "parent": 1, "type": "test"},
+    {"id": 3, "parent": 1, "type": "test"},
+    {"id": 4, "parent": 2, "type": "test"},
+    {"id": 5, "parent": 2, "type": "test"},
+    {"id": 6, "parent": 2, "type": "test"},
+    {"id": 7, "parent": 4, "type": None},
+    {"id": 8, "parent": 4, "type": None},
+]
+
+
+@pytest.fixture(scope="function")
+def client() -> Generator[TestClient, None, None]:
+    """Create test client with the tree initialized from sample items."""
+    with TestClient(app) as test_client:
+        response = test_client.post("/api/v1/tree/init", json={"items": API_ITEMS})
+        assert response.status_code == 200
+        yield test_client
@@ -0,0 +1,397 @@
+import asyncio
+
+import pytest
+from fastapi import status
+
+from app import main
+from app.compact import CompactTreeStore
+from app.persistence import TreePersistence
+from app.snapshot import write_snapshot
+
+
+def test_get_all_parents(client):
+    """Test parents chain endpoint."""
+    response = client.post("/api/v1/tree/getAllParents", json={"id": 7})
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.json()["result"]] == [4, 2, 1]
+
+
+def test_mutations(client):
+    """Test add, move, update and remove endpoints."""
+    response = client.post("/api/v1/tree/addItems", json={"items": [{"id": 9, "parent": 3}]})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["result"] == {"status": "added", "items_count": 1}
+
+    response = client.post("/api/v1/tree/moveItem", json={"id": 4, "parent": 9})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.post("/api/v1/tree/getAllParents", json={"id": 7})
+    assert [item["id"] for item in response.json()["result"]] == [4, 9, 3, 1]
+
+    response = client.post("/api/v1/tree/updateItem", json={"id": 9, "attributes": {"type": "x"}})
+    assert response.status_code == status.HTTP_200_OK
+    response = client.post("/api/v1/tree/getItem", json={"id": 9})
+    assert response.json()["result"]["type"] == "x"
+
+    response = client.post("/api/v1/tree/removeItem", json={"id": 9})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.post("/api/v1/tree/removeItem", json={"id": 9, "recursive": True})
+    assert response.json()["result"] == {"status": "removed", "items_count": 4}
+    response = client.post("/api/v1/tree/removeItem", json={"id": 9})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_move_into_own_subtree(client):
+    """Test cycle-creating move is rejected."""
+    response = client.post("/api/v1/tree/moveItem", json={"id": 2, "parent": 7})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_ancestor_queries(client):
+    """Test ancestor query endpoints."""
+    response = client.post("/api/v1/tree/getDepth", json={"id": 7})
+    assert response.json()["result"] == {"id": 7, "depth": 3}
+
+    response = client.post("/api/v1/tree/getKthAncestor", json={"id": 7, "k": 2})
+    assert response.json()["result"]["id"] == 2
+
+    response = client.post("/api/v1/tree/isAncestor", json={"id": 7, "ancestor_id": 3})
+    assert response.json()["result"]["is_ancestor"] is False
+
+    response = client.post("/api/v1/tree/getLowestCommonAncestor", json={"id": 7, "other_id": 6})
+    assert response.json()["result"]["id"] == 2
+
+    response = client.post("/api/v1/tree/getDepth", json={"id": 999})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_descendants_pagination(client):
+    """Test descendants endpoint walks pages with cursors."""
+    ids = []
+    cursor = None
+    while True:
+        response = client.post("/api/v1/tree/getDescendants", json={"id": 1, "limit": 3, "cursor": cursor})
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()["result"]
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == [2, 4, 7, 8, 5, 6, 3]
+
+    response = client.post("/api/v1/tree/getDescendants", json={"id": 1, "cursor": "!!"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    page = client.post("/api/v1/tree/getDescendants", json={"id": 1, "limit": 3}).json()["result"]
+    client.post("/api/v1/tree/addItems", json={"items": [{"id": 9, "parent": 2}]})
+    response = client.post("/api/v1/tree/getDescendants", json={"id": 1, "cursor": page["next_cursor"]})
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+def test_init_stream(client):
+    """Test NDJSON initialization and line-level validation errors."""
+    body = b'{"id": 1, "parent": "root"}\n\n{"id": 2, "parent": 1, "type": "x"}\n{"id": 3, "parent": 2}'
+    response = client.post(
+        "/api/v1/tree/initStream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["result"] == {"status": "initialized", "items_count": 3}
+    response = client.post("/api/v1/tree/getAllParents", json={"id": 3})
+    assert [item["id"] for item in response.json()["result"]] == [2, 1]
+
+    response = client.post(
+        "/api/v1/tree/initStream",
+        content=b'{"id": 1, "parent": "root"}\n{"id": "x"}\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "line 2" in response.json()["detail"]
+
+
+def test_etag_revalidation(client):
+    """Test cached reads answer If-None-Match and change after mutations."""
+    response = client.get("/api/v1/tree/getAll")
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+    assert len(response.json()["result"]) == 8
+
+    response = client.get("/api/v1/tree/getAll", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.post("/api/v1/tree/getChildren", json={"id": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+
+    client.post("/api/v1/tree/updateItem", json={"id": 8, "attributes": {"type": "x"}})
+    response = client.get("/api/v1/tree/getAll", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert response.json()["result"][7]["type"] == "x"
+
+
+def test_content_negotiation(client):
+    """Test item list endpoints encode results as the Accept header asks."""
+    msgpack = pytest.importorskip("msgpack")
+    response = client.get("/api/v1/tree/getAll", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["vary"] == "Accept"
+    assert msgpack.unpackb(response.content) == client.get("/api/v1/tree/getAll").json()
+
+    headers = {"Accept": "application/vnd.treestore.columns+msgpack"}
+    response = client.post("/api/v1/tree/getChildren", json={"id": 2}, headers=headers)
+    assert msgpack.unpackb(response.content)["result"]["count"] == 3
+    etag = response.headers["ETag"]
+    response = client.post("/api/v1/tree/getChildren", json={"id": 2}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = client.post("/api/v1/tree/getChildren", json={"id": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.post("/api/v1/tree/getAllParents", json={"id": 7}, headers={"Accept": "text/csv"})
+    assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+
+
+def test_reload_default_tree(client):
+    """Test reload endpoint restores the default tree file and health reports it."""
+    response = client.post("/api/v1/reload")
+    assert response.status_code == status.HTTP_200_OK
+    items_count = response.json()["result"]["items_count"]
+    assert len(client.get("/api/v1/tree/getAll").json()["result"]) == items_count
+
+    health = client.get("/api/v1/health").json()
+    assert health["items_count"] == items_count
+    assert health["reload"]["reloads"] >= 1 and health["reload"]["last_reload"]["trigger"] == "request"
+
+
+def test_batch_lookups(client):
+    """Test batch item, children and parents endpoints."""
+    response = client.post("/api/v1/tree/getItemsBatch", json={"ids": [1, 999]})
+    assert response.json()["result"] == {"1": {"id": 1, "parent": "root"}, "999": None}
+
+    response = client.post("/api/v1/tree/getChildrenBatch", json={"ids": [4, 5]})
+    result = response.json()["result"]
+    assert [item["id"] for item in result["4"]] == [7, 8]
+    assert result["5"] == []
+
+    response = client.post("/api/v1/tree/getAllParentsBatch", json={"ids": [7, 8]})
+    result = response.json()["result"]
+    assert [item["id"] for item in result["7"]] == [4, 2, 1]
+    assert result["8"] == result["7"]
+
+    response = client.post("/api/v1/tree/getItemsBatch", json={"ids": []})
+    assert response.status_code == 422
+
+
+def test_find_by_attribute(client):
+    """Test attribute lookup endpoint with and without subtree limit."""
+    response = client.post("/api/v1/tree/findByAttribute", json={"key": "type", "value": None})
+    assert [item["id"] for item in response.json()["result"]] == [7, 8]
+
+    response = client.post("/api/v1/tree/findByAttribute", json={"key": "type", "value": "test", "root_id": 4})
+    assert [item["id"] for item in response.json()["result"]] == [4]
+
+    response = client.post("/api/v1/tree/findByAttribute", json={"key": "type", "value": "test", "root_id": 999})
+    assert response.status_code == 404
+
+
+def test_query(client):
+    """Test query endpoint pagination and validation."""
+    request = {
+        "conditions": [{"key": "type", "op": "eq", "value": "test"}],
+        "root_id": 2,
+        "limit": 2,
+        "fields": "ids",
+    }
+    response = client.post("/api/v1/tree/query", json=request)
+    first_page = response.json()["result"]
+    assert first_page["ids"] == [2, 4]
+    assert first_page["total"] == 4
+
+    response = client.post("/api/v1/tree/query", json=dict(request, cursor=first_page["next_cursor"]))
+    assert response.json()["result"] == {"ids": [5, 6], "next_cursor": None, "total": 4}
+
+    client.post("/api/v1/tree/updateItem", json={"id": 5, "attributes": {"type": "other"}})
+    response = client.post("/api/v1/tree/query", json=dict(request, cursor=first_page["next_cursor"]))
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    response = client.post(
+        "/api/v1/tree/query",
+        json={"conditions": [{"key": "price", "op": "between", "value": [1]}]},
+    )
+    assert response.status_code == 400
+
+    response = client.post("/api/v1/tree/query", json={"conditions": [{"key": "type", "op": "eq", "value": [1]}]})
+    assert response.status_code == 400
+
+
+def test_get_stats(client):
+    """Test subtree aggregates endpoint follows mutations."""
+    response = client.post("/api/v1/tree/getStats", json={"id": 2})
+    assert response.json()["result"] == {"id": 2, "subtree_size": 6, "height": 2, "sums": {}}
+
+    client.post("/api/v1/tree/removeItem", json={"id": 4, "recursive": True})
+    response = client.post("/api/v1/tree/getStats", json={"id": 2})
+    assert response.json()["result"] == {"id": 2, "subtree_size": 3, "height": 1, "sums": {}}
+
+    response = client.post("/api/v1/tree/getStats", json={"id": 999})
+    assert response.status_code == 404
+
+
+def test_patch_tree(client):
+    """Test patch endpoint applies diffs against the current version only."""
+    version = client.get("/api/v1/health").json()["version"]
+    patch = {"base_version": version, "added": [{"id": 9, "parent": 8}], "removed": [3], "changed": []}
+
+    response = client.post("/api/v1/tree/patch", json=patch)
+    result = response.json()["result"]
+    assert result == {"status": "patched", "added": 1, "removed": 1, "changed": 0, "version": version + 1}
+    assert client.post("/api/v1/tree/getItem", json={"id": 9}).status_code == 200
+
+    response = client.post("/api/v1/tree/patch", json=patch)
+    assert response.status_code == 409
+
+    patch = {"base_version": version + 1, "changed": [{"id": 4, "type": "test"}]}
+    assert client.post("/api/v1/tree/patch", json=patch).status_code == 422
+    assert client.post("/api/v1/tree/getItem", json={"id": 4}).json()["result"]["parent"] == 2
+
+
+def test_get_level(client):
+    """Test level endpoint pages through items at a depth below an item."""
+    response = client.post("/api/v1/tree/getLevel", json={"id": 1, "depth": 2, "limit": 2})
+    page = response.json()["result"]
+    assert [item["id"] for item in page["items"]] == [4, 5] and page["total"] == 3
+
+    response = client.post("/api/v1/tree/getLevel", json={"id": 1, "depth": 2, "cursor": page["next_cursor"]})
+    assert [item["id"] for item in response.json()["result"]["items"]] == [6]
+    assert client.post("/api/v1/tree/getLevel", json={"id": 999, "depth": 1}).status_code == 404
+
+    client.post("/api/v1/tree/moveItem", json={"id": 6, "parent": 3})
+    response = client.post("/api/v1/tree/getLevel", json={"id": 1, "depth": 2, "cursor": page["next_cursor"]})
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+def test_get_subtree(client):
+    """Test nested subtree export with and without depth limit."""
+    response = client.post("/api/v1/tree/getSubtree", json={"id": 2})
+    assert response.headers["content-type"] == "application/json"
+    root = response.json()["result"]
+    assert [child["id"] for child in root["children"]] == [4, 5, 6]
+    assert [child["id"] for child in root["children"][0]["children"]] == [7, 8]
+    assert root["children"][0]["children"][0]["children"] == []
+
+    response = client.post("/api/v1/tree/getSubtree", json={"id": 2, "max_depth": 1})
+    assert all("children" not in child for child in response.json()["result"]["children"])
+
+    response = client.post("/api/v1/tree/getSubtree", json={"id": 999})
+    assert response.status_code == 404
+
+    client.post("/api/v1/tree/updateItem", json={"id": 7, "attributes": {"children": "x"}})
+    response = client.post("/api/v1/tree/getSubtree", json={"id": 2})
+    assert response.status_code == 400
+    assert "Item 7" in response.json()["detail"]
+    assert client.post("/api/v1/tree/getSubtree", json={"id": 5}).status_code == 200
+
+
+def test_cursor_pagination(client):
+    """Test getAll and getChildren pages chain through cursors of one version."""
+    first = client.get("/api/v1/tree/getAll", params={"limit": 5}).json()["result"]
+    second = client.get("/api/v1/tree/getAll", params={"cursor": first["next_cursor"], "limit": 5}).json()["result"]
+    assert [item["id"] for item in first["items"] + second["items"]] == list(range(1, 9))
+    assert second["next_cursor"] is None
+
+    page = client.post("/api/v1/tree/getChildren", json={"id": 2, "limit": 2}).json()["result"]
+    assert [item["id"] for item in page["items"]] == [4, 5]
+    client.post("/api/v1/tree/updateItem", json={"id": 1, "attributes": {"type": "root"}})
+    response = client.post("/api/v1/tree/getChildren", json={"id": 2, "cursor": page["next_cursor"]})
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    response = client.get("/api/v1/tree/getAll", params={"cursor": "bogus"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_named_trees(client):
+    """Test named trees are independent of the default tree and of each other."""
+    items = [{"id": 1, "parent": "root"}, {"id": 2, "parent": 1, "type": "named"}]
+    assert client.post("/api/v1/trees/tenant-a/getItem", json={"id": 1}).status_code == 404
+    assert client.post("/api/v1/trees/tenant-a/init", json={"items": items}).status_code == 200
+    client.post("/api/v1/trees/tenant-a/addItems", json={"items": [{"id": 3, "parent": 2}]})
+
+    response = client.post("/api/v1/trees/tenant-a/getAllParents", json={"id": 3})
+    assert [item["id"] for item in response.json()["result"]] == [2, 1]
+    assert client.post("/api/v1/tree/getItem", json={"id": 3}).json()["result"]["parent"] == 1
+    listed = client.get("/api/v1/trees").json()["result"]
+    assert {"name": "tenant-a", "resident": True, "version": 2, "items_count": 3} in listed
+
+    assert client.delete("/api/v1/trees/tenant-a").status_code == 200
+    assert client.post("/api/v1/trees/tenant-a/getItem", json={"id": 1}).status_code == 404
+    assert client.post("/api/v1/trees/bad.name/init", json={"items": items}).status_code == 400
+
+    orphan = [{"id": 1, "parent": 99}]
+    assert client.post("/api/v1/trees/tenant-b/init", json={"items": orphan}).status_code == 400
+    assert "tenant-b" not in [tree["name"] for tree in client.get("/api/v1/trees").json()["result"]]
+    assert client.get("/api/v1/trees/tenant-b/getAll").status_code == 404
+
+
+def test_etag_differs_for_recreated_tree(client):
+    """Test an ETag of a deleted tree does not validate a recreated one at the same version."""
+    client.post("/api/v1/trees/tenant-e/init", json={"items": [{"id": 1, "parent": "root"}]})
+    etag = client.get("/api/v1/trees/tenant-e/getAll").headers["ETag"]
+    client.delete("/api/v1/trees/tenant-e")
+    client.post("/api/v1/trees/tenant-e/init", json={"items": [{"id": 2, "parent": "root"}]})
+
+    response = client.get("/api/v1/trees/tenant-e/getAll", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["result"] == [{"id": 2, "parent": "root"}]
+    client.delete("/api/v1/trees/tenant-e")
+
+
+def test_persistent_snapshot_seed_is_writable(tmp_path, monkeypatch):
+    """Test SNAPSHOT_PATH with DATA_DIR seeds a mutable tree, as recovery does."""
+    path = str(tmp_path / "seed.snap")
+    write_snapshot(CompactTreeStore([{"id": 1, "parent": "root"}]), path)
+    monkeypatch.setattr(main.config, "snapshot_path", path)
+    monkeypatch.setattr(main.config, "data_dir", str(tmp_path / "data"))
+
+    persistence = TreePersistence(main.config.data_dir)
+    service = main._load_persistent_tree(persistence)
+    service.add_items([{"id": 2, "parent": 1}])
+    assert len(service.get_all_items()) == 2
+    persistence.close()
+
+
+class _Watcher:
+    """Request stand-in that disconnects after reading a number of frames."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    async def is_disconnected(self):
+        return self.frames <= 0
+
+
+def _read_frames(since, frames):
+    """Collect SSE frames the watch stream produces for a version."""
+    watcher = _Watcher(frames)
+
+    async def collect():
+        received = []
+        async for frame in main._watch_events(watcher, main._tree_service, since):
+            received.append(frame)
+            watcher.frames -= 1
+        return received
+
+    return asyncio.run(collect())
+
+
+def test_watch(client):
+    """Test watch stream replays changes after a version and resets on lost history."""
+    version = client.get("/api/v1/health").json()["version"]
+    client.post("/api/v1/tree/moveItem", json={"id": 8, "parent": 3})
+
+    frames = _read_frames(version, 1)
+    assert frames == [
+        f'id: {version + 1}\nevent: change\ndata: {{"version":{version + 1},"type":"moved","id":8,"parent":3}}\n\n'
+    ]
+    assert _read_frames(version + 5, 1)[0].startswith(f"id: {version + 1}\nevent: reset\n")
+
+    response = client.get("/api/v1/tree/watch", headers={"Last-Event-ID": "abc"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,26 @@
+import pytest
+
+from app.models import TreeStore
+from benchmarks import build, store
+from benchmarks.generators import SHAPES
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_generators_are_valid_and_seeded(shape):
+    """Test generated trees build and are reproducible."""
+    items = SHAPES[shape](500, 3)
+    assert len(TreeStore(items)) == 500
+    assert SHAPES[shape](500, 3) == items
+
+
+def test_store_benchmark_covers_every_operation():
+    """Test store benchmark runs all operations and restores the tree."""
+    row = store.run("random", 200, 0, calls=20, budget=1.0, memory=False)
+    assert row["operations"]["remove_item"]["calls"] == 40
+    assert all(summary["calls"] > 0 for summary in row["operations"].values())
+
+
+def test_build_benchmark_checks_parallel_result():
+    """Test build benchmark measures every worker count on identical output."""
+    row = build.run("random", 300, 0, workers=[1, 2], min_shard_bytes=64)
+    assert [measurement["workers"] for measurement in row["parallel"]] == [1, 2]
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+from app.changes import ChangeFeed
+from app.models import ROOT_PARENT, TreeStore
+from app.service import TreeStoreService
+
+ITEMS = [
+    {"id": 1, "parent": ROOT_PARENT},
+    {"id": 2, "parent": 1, "type": "test"},
+    {"id": 3, "parent": 1, "type": "test"},
+]
+
+
+def test_feed_resume_and_eviction():
+    """Test resuming from a version and detecting evicted history."""
+    feed = ChangeFeed(capacity=2, version=5)
+    assert feed.since(5) == []
+    feed.append(6, {"type": "a"})
+    feed.append(7, {"type": "b"})
+    assert [event.version for event in feed.since(5)] == [6, 7]
+    assert [event.version for event in feed.since(6)] == [7]
+
+    feed.append(8, {"type": "c"})
+    assert feed.since(5) is None
+    assert [event.version for event in feed.since(6)] == [7, 8]
+    assert feed.since(9) is None
+
+
+def test_feed_wakes_async_waiter_from_thread():
+    """Test an append from another thread wakes a waiting consumer."""
+    feed = ChangeFeed()
+
+    async def scenario():
+        timer = threading.Timer(0.05, feed.append, args=(1, {"type": "added"}))
+        timer.start()
+        events = await feed.wait(0, timeout=5)
+        timer.join()
+        assert await feed.wait(1, timeout=0.01) == []
+        return events
+
+    events = asyncio.run(scenario())
+    assert [event.change for event in events] == [{"type": "added"}]
+
+
+def test_service_records_mutations():
+    """Test every service mutation publishes a compact change event."""
+    service = TreeStoreService(TreeStore(ITEMS))
+    service.add_items([{"id": 4, "parent": 2}])
+    service.move_item(4, 3)
+    service.update_item(4, {"type": "leaf"})
+    service.remove_item(4)
+    service.patch_tree(service.version, [{"id": 5, "parent": 1}], [], [])
+    service.initialize_tree(ITEMS)
+
+    changes = [(event.version, event.change) for event in service.get_changes(0)]
+    assert changes == [
+        (1, {"type": "added", "ids": [4], "count": 1}),
+        (2, {"type": "moved", "id": 4, "parent": 3}),
+        (3, {"type": "updated", "ids": [4], "count": 1, "attributes": ["type"]}),
+        (4, {"type": "removed", "ids": [4], "count": 1}),
+        (
+            5,
+            {
+                "type": "patched",
+                "added": {"ids": [5], "count": 1},
+                "removed": {"ids": [], "count": 0},
+                "changed": {"ids": [], "count": 0},
+            },
+        ),
+        (6, {"type": "initialized", "items_count": 3}),
+    ]
@@ -0,0 +1,74 @@
+import pytest
+
+from app.compact import CompactTreeStore
+from app.models import ROOT_PARENT, TreeStore
+
+
+@pytest.fixture
+def sample_items():
+    """Fixture providing sample items with mixed attribute sets."""
+    return [
+        {"id": 1, "parent": ROOT_PARENT},
+        {"id": 2, "parent": 1, "type": "test"},
+        {"id": 3, "parent": 1, "type": "test"},
+        {"id": 4, "parent": 2, "type": "test"},
+        {"id": 5, "parent": 2, "type": "test", "tags": ["a", "b"]},
+        {"id": 6, "parent": 2, "type": "test"},
+        {"id": 7, "parent": 4, "type": None},
+        {"id": 8, "parent": 4, "type": None, "price": 10},
+    ]
+
+
+def test_matches_dict_engine(sample_items):
+    """Test compact engine returns the same results as TreeStore."""
+    expected = TreeStore(sample_items)
+    compact = CompactTreeStore(sample_items)
+
+    assert compact.get_all() == expected.get_all()
+    for item_id in [1, 2, 4, 5, 7, 8, 999]:
+        assert compact.get_item(item_id) == expected.get_item(item_id)
+        assert compact.get_children(item_id) == expected.get_children(item_id)
+        assert compact.get_all_parents(item_id) == expected.get_all_parents(item_id)
+
+
+def test_pages_match_dict_engine(sample_items):
+    """Test paginated reads of both engines agree and cover every item once."""
+    expected = TreeStore(sample_items)
+    compact = CompactTreeStore(sample_items)
+
+    for store in (expected, compact):
+        assert store.get_all_page(0, 3) == (sample_items[:3], 3)
+        assert store.get_all_page(6, 3) == (sample_items[6:], None)
+        assert store.get_children_page(2, 1, 1) == (expected.get_children(2)[1:2], 2)
+        assert store.get_children_page(2, 2, 5) == (expected.get_children(2)[2:], None)
+        assert store.get_children_page(999, 0, 5) == ([], None)
+
+
+def test_missing_attributes_are_not_materialized(sample_items):
+    """Test attributes absent from an item stay absent."""
+    compact = CompactTreeStore(sample_items)
+    assert compact.get_item(1) == {"id": 1, "parent": ROOT_PARENT}
+    assert "price" not in compact.get_item(7)
+
+
+def test_duplicate_id():
+    """Test duplicate IDs are rejected."""
+    with pytest.raises(ValueError):
+        CompactTreeStore([{"id": 1, "parent": ROOT_PARENT}, {"id": 1, "parent": ROOT_PARENT}])
+
+
+def test_rejects_cycles_and_orphans():
+    """Test construction reports orphans and cycle members like the dict engine."""
+    items = [
+        {"id": 1, "parent": ROOT_PARENT},
+        {"id": 2, "parent": 3},
+        {"id": 3, "parent": 2},
+        {"id": 4, "parent": 3},
+        {"id": 5, "parent": 5},
+        {"id": 6, "parent": 99},
+        {"id": 7, "parent": 6},
+    ]
+    with pytest.raises(ValueError) as error:
+        CompactTreeStore(items)
+    assert "parents not found for items [6]" in str(error.value)
+    assert "parent cycle through items [2, 3, 5]" in str(error.value)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from app.encoding import COLUMNS_MEDIA_TYPE, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encode, negotiate
+from app.models import ROOT_PARENT
+
+OFFERED = [JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, COLUMNS_MEDIA_TYPE]
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("*/*", JSON_MEDIA_TYPE),
+        ("application/msgpack, */*;q=0.8", MSGPACK_MEDIA_TYPE),
+        ("application/x-msgpack", MSGPACK_MEDIA_TYPE),
+        ("application/msgpack, application/json", MSGPACK_MEDIA_TYPE),
+        ("application/json;q=0.5, application/vnd.treestore.columns+msgpack", COLUMNS_MEDIA_TYPE),
+        ("application/msgpack;q=0, application/*", JSON_MEDIA_TYPE),
+        ("text/html", None),
+    ],
+)
+def test_negotiate(accept, expected):
+    """Test quality, specificity and order decide the media type."""
+    assert negotiate(accept, OFFERED) == expected
+
+
+def test_columns_decode_with_numpy():
+    """Test columnar encoding holds items as NumPy-readable arrays."""
+    msgpack = pytest.importorskip("msgpack")
+    items = [
+        {"id": 1, "parent": ROOT_PARENT},
+        {"id": 2, "parent": 1, "type": "a", "tags": ["x"]},
+        {"id": 3, "parent": 1, "type": "a"},
+    ]
+    page = msgpack.unpackb(encode({"items": items, "next_cursor": "c"}, COLUMNS_MEDIA_TYPE))["result"]
+    assert page["next_cursor"] == "c"
+
+    columns = page["items"]
+    assert columns["count"] == 3
+    assert np.frombuffer(columns["ids"], dtype="<i8").tolist() == [1, 2, 3]
+    assert np.frombuffer(columns["parents"], dtype="<i8").tolist()[1:] == [1, 1]
+    assert np.frombuffer(columns["parent_kinds"], dtype="u1").tolist() == [1, 0, 0]
+    assert np.frombuffer(columns["columns"]["type"]["codes"], dtype="<i4").tolist() == [-1, 0, 0]
+    assert columns["columns"]["type"]["values"] == ["a"]
+    assert columns["columns"]["tags"]["values"] == [["x"]]
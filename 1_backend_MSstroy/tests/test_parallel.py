@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app import parallel
+from app.compact import CompactTreeStore
+from app.models import ROOT_PARENT
+from benchmarks.generators import random_tree
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    """Fixture splitting even tiny files into several shards."""
+    monkeypatch.setattr(parallel, "MIN_SHARD_BYTES", 64)
+
+
+def write_lines(path, lines):
+    """Write NDJSON file and return its path as string."""
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_matches_serial_build(tmp_path, small_shards):
+    """Test every column matches the serial build, including mixed and unhashable values."""
+    items = random_tree(2000, 5)
+    for index, item in enumerate(items):
+        if index % 3 == 0:
+            item["price"] = [1, 1.0, True, "1", None][index % 5]
+        if index % 7 == 0:
+            item["tags"] = ["a", index % 2]
+    path = write_lines(tmp_path / "items.ndjson", [json.dumps(item, ensure_ascii=False) for item in items])
+
+    expected = CompactTreeStore(items)
+    for workers in (1, 3, 8):
+        store = parallel.build_compact(path, workers)
+        assert store.export_columns() == expected.export_columns()
+    assert store.get_children(1) == expected.get_children(1)
+
+
+def test_reports_first_invalid_line(tmp_path, small_shards):
+    """Test errors name the first invalid line of the whole file."""
+    lines = [json.dumps({"id": 1, "parent": ROOT_PARENT}), ""]
+    lines += [json.dumps({"id": item_id, "parent": 1}) for item_id in range(2, 20)]
+    lines += [json.dumps({"id": 20, "parent": "x"}), "{broken"]
+    path = write_lines(tmp_path / "invalid.ndjson", lines)
+
+    with pytest.raises(ValueError, match="^line 21: Parent must be"):
+        parallel.build_compact(path, 4)
+
+
+def test_rejects_duplicates_across_shards(tmp_path, small_shards):
+    """Test duplicate IDs in different shards are detected."""
+    lines = [json.dumps({"id": item_id % 15, "parent": ROOT_PARENT}) for item_id in range(30)]
+    path = write_lines(tmp_path / "duplicates.ndjson", lines)
+
+    with pytest.raises(ValueError, match="Duplicate item ID: 0"):
+        parallel.build_compact(path, 4)
+
+
+def test_rejects_cycles_and_orphans(tmp_path, small_shards):
+    """Test structure errors match the serial build."""
+    items = [{"id": 1, "parent": ROOT_PARENT}, {"id": 6, "parent": 99}]
+    items += [{"id": item_id, "parent": item_id + 1} for item_id in range(2, 5)] + [{"id": 5, "parent": 2}]
+    items += [{"id": item_id, "parent": 1} for item_id in range(7, 40)]
+    path = write_lines(tmp_path / "cycle.ndjson", [json.dumps(item) for item in items])
+
+    with pytest.raises(ValueError) as expected:
+        CompactTreeStore(items)
+    with pytest.raises(ValueError) as error:
+        parallel.build_compact(path, 4)
+    assert str(error.value) == str(expected.value)
+    assert "parents not found for items [6]" in str(error.value)
@@ -0,0 +1,214 @@
+import os
+import threading
+
+import pytest
+
+from app.exceptions import ItemNotFoundError
+from app.models import ROOT_PARENT, TreeStore
+from app.persistence import TreePersistence
+from app.service import TreeStoreService
+
+ITEMS = [
+    {"id": 1, "parent": ROOT_PARENT},
+    {"id": 2, "parent": 1, "type": "test"},
+    {"id": 3, "parent": 1, "type": "test"},
+    {"id": 4, "parent": 2, "type": "test", "price": 5},
+]
+
+
+def open_service(data_dir, **options):
+    """Recover service from data_dir the way the application does."""
+    persistence = TreePersistence(str(data_dir), **options)
+    recovered = persistence.recover(TreeStore)
+    if recovered is None:
+        tree_store, version = TreeStore(ITEMS), 0
+        persistence.write_snapshot(tree_store.get_all(), version)
+    else:
+        tree_store, version = recovered
+    persistence.start(version)
+    return TreeStoreService(tree_store, version=version, persistence=persistence), persistence
+
+
+def mutate(service):
+    """Apply one change of every kind."""
+    service.add_items([{"id": 5, "parent": 4, "type": "leaf"}, {"id": 6, "parent": 5}])
+    service.move_item(5, 3)
+    service.update_item(3, {"type": "group"}, recursive=True)
+    service.remove_item(6)
+    service.patch_tree(service.version, [{"id": 7, "parent": ROOT_PARENT}], [2], [])
+
+
+def test_recovery_replays_log(tmp_path):
+    """Test restart restores the tree and version from snapshot plus log."""
+    service, persistence = open_service(tmp_path)
+    mutate(service)
+    expected = service.get_all_items()
+    persistence.close()
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 5
+    assert recovered.get_all_items() == expected
+    assert recovered.get_all_parents(5) == service.get_all_parents(5)
+    persistence.close()
+
+
+def test_compaction_bounds_replay(tmp_path):
+    """Test snapshots replace older snapshots and segments, including after init."""
+    service, persistence = open_service(tmp_path)
+    mutate(service)
+    assert service.compact() == 5
+    service.initialize_tree([{"id": 10, "parent": ROOT_PARENT, "type": "new"}])
+    service.add_items([{"id": 11, "parent": 10}])
+    persistence.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert [name.split("-")[0] for name in names] == ["snapshot", "wal"]
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 7
+    assert recovered.get_all_items() == service.get_all_items()
+    persistence.close()
+
+
+def test_log_precedes_change(tmp_path, monkeypatch):
+    """Test the record is in the log before the tree changes, and rejections replay cleanly."""
+    service, persistence = open_service(tmp_path)
+    tree_store = service._snapshot.tree_store
+    seen = []
+    log = persistence.log
+
+    def spy(version, operation, arguments):
+        seen.append(tree_store.get_item(2)["type"])
+        return log(version, operation, arguments)
+
+    monkeypatch.setattr(persistence, "log", spy)
+    service.update_item(2, {"type": "logged"})
+    assert seen == ["test"]
+    with pytest.raises(ValueError):
+        service.move_item(1, 2)
+    service.update_item(3, {"type": "after"})
+    persistence.close()
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 2
+    assert recovered.get_all_items() == service.get_all_items()
+    persistence.close()
+
+
+def test_rejected_operations_are_aborted(tmp_path):
+    """Test operations rejected with any exception are skipped on replay."""
+    service, persistence = open_service(tmp_path)
+    with pytest.raises(TypeError):
+        service.update_item(2, None)
+    with pytest.raises(ItemNotFoundError):
+        service.remove_item(99)
+    service.update_item(3, {"type": "after"})
+    persistence.close()
+    segment = max(name for name in os.listdir(tmp_path) if name.startswith("wal-"))
+    assert b'"op":"abort"' in (tmp_path / segment).read_bytes()
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 1
+    assert recovered.get_all_items() == service.get_all_items()
+    persistence.close()
+
+
+def test_unfinished_last_record_is_dropped(tmp_path):
+    """Test a failing last record without an abort does not block recovery."""
+    service, persistence = open_service(tmp_path)
+    service.update_item(2, {"type": "kept"})
+    persistence.log(2, "update_item", {"item_id": 2, "attributes": None, "recursive": False})
+    persistence.close()
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 1
+    assert recovered.get_item_by_id(2)["type"] == "kept"
+    recovered.update_item(3, {"type": "next"})
+    persistence.close()
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 2
+    assert recovered.get_item_by_id(3)["type"] == "next"
+    persistence.close()
+
+
+def test_init_is_encoded_outside_write_lock(tmp_path, monkeypatch):
+    """Test a whole-tree init reaches the log pre-encoded and replays."""
+    service, persistence = open_service(tmp_path)
+    logged = []
+    log = persistence.log
+
+    def spy(version, operation, arguments):
+        logged.append(type(arguments))
+        return log(version, operation, arguments)
+
+    monkeypatch.setattr(persistence, "log", spy)
+    service.initialize_tree([{"id": 10, "parent": ROOT_PARENT}, {"id": 11, "parent": 10}])
+    assert logged == [bytes]
+    persistence.close()
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 1
+    assert recovered.get_all_items() == service.get_all_items()
+    persistence.close()
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    """Test a partially written last record is discarded on recovery."""
+    service, persistence = open_service(tmp_path)
+    service.update_item(2, {"type": "kept"})
+    persistence.close()
+    segment = max(name for name in os.listdir(tmp_path) if name.startswith("wal-"))
+    with open(tmp_path / segment, "ab") as f:
+        f.write(b'0000abcd {"v":2,"op":"remove')
+
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 1
+    assert recovered.get_item_by_id(2)["type"] == "kept"
+    persistence.close()
+
+
+def test_concurrent_writers_share_fsync(tmp_path, monkeypatch):
+    """Test group commit: every acknowledged write is durable with fewer fsyncs than writes."""
+    service, persistence = open_service(tmp_path)
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def counting_fsync(descriptor):
+        fsyncs.append(descriptor)
+        real_fsync(descriptor)
+
+    monkeypatch.setattr(os, "fsync", counting_fsync)
+
+    def writer(offset):
+        for index in range(50):
+            service.add_items([{"id": 100 + offset * 50 + index, "parent": 1}])
+
+    threads = [threading.Thread(target=writer, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    monkeypatch.undo()
+    persistence.close()
+
+    assert 0 < len(fsyncs) < 400
+    recovered, persistence = open_service(tmp_path)
+    assert recovered.version == 400
+    assert len(recovered.get_all_items()) == len(ITEMS) + 400
+    persistence.close()
+
+
+def test_corrupted_middle_record_fails(tmp_path):
+    """Test damage before the end of the log is reported, not skipped."""
+    service, persistence = open_service(tmp_path)
+    service.update_item(2, {"type": "a"})
+    service.update_item(2, {"type": "b"})
+    persistence.close()
+    segment = tmp_path / max(name for name in os.listdir(tmp_path) if name.startswith("wal-"))
+    data = bytearray(segment.read_bytes())
+    data[12] ^= 1
+    segment.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError):
+        TreePersistence(str(tmp_path)).recover(TreeStore)
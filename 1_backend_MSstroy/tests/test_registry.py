@@ -0,0 +1,127 @@
+import os
+import threading
+
+import pytest
+
+from app.exceptions import TreeNotFoundError
+from app.models import ROOT_PARENT, TreeStore
+from app.registry import TreeRegistry
+from app.service import TreeStoreService
+
+
+def make_items(size):
+    """Build a chain of given size."""
+    return [{"id": 1, "parent": ROOT_PARENT}] + [{"id": i, "parent": i - 1} for i in range(2, size + 1)]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Fixture providing registry with room for 10 items."""
+    return TreeRegistry(
+        str(tmp_path), 10, TreeStore, lambda tree_store, version: TreeStoreService(tree_store, version=version)
+    )
+
+
+def test_lru_spill_and_reload(registry):
+    """Test cold trees are spilled in LRU order and reloaded with their version."""
+    for name in ("a", "b", "c"):
+        with registry.lease(name, create=True) as service:
+            service.initialize_tree(make_items(4))
+            service.update_item(1, {"type": name})
+    with registry.lease("a") as service:
+        pass
+
+    trees = {tree["name"]: tree for tree in registry.list_trees()}
+    assert not trees["b"]["resident"] and trees["a"]["resident"] and trees["c"]["resident"]
+    assert os.path.exists(os.path.join(registry.spill_dir, "b.snap"))
+
+    with registry.lease("b") as service:
+        assert service.version == 2
+        assert service.get_item_by_id(1)["type"] == "b"
+        assert service.get_all_parents(4)[-1]["id"] == 1
+    assert registry.resident_items <= 10
+    assert not {tree["name"]: tree for tree in registry.list_trees()}["c"]["resident"]
+
+
+def test_leased_tree_is_not_spilled(registry):
+    """Test a tree in use stays resident even over budget."""
+    with registry.lease("big", create=True) as big:
+        big.initialize_tree(make_items(20))
+        with registry.lease("small", create=True) as small:
+            small.initialize_tree(make_items(2))
+        assert registry.resident_items == 20
+    assert registry.resident_items <= 10
+
+
+def test_unknown_and_invalid_names(registry):
+    """Test missing trees and unsafe names are rejected."""
+    with pytest.raises(TreeNotFoundError):
+        with registry.lease("missing"):
+            pass
+    with pytest.raises(ValueError):
+        with registry.lease("../escape", create=True):
+            pass
+    with registry.lease("gone", create=True) as service:
+        service.initialize_tree(make_items(1))
+    registry.delete("gone")
+    with pytest.raises(TreeNotFoundError):
+        registry.delete("gone")
+
+
+def test_failed_first_init_leaves_no_tree(registry):
+    """Test a tree whose first init fails is neither listed nor served."""
+    with pytest.raises(ValueError):
+        with registry.lease("broken", create=True) as service:
+            with pytest.raises(TreeNotFoundError):
+                with registry.lease("broken"):
+                    pass
+            service.initialize_tree([{"id": 1, "parent": 99}])
+    assert registry.list_trees() == []
+    with pytest.raises(TreeNotFoundError):
+        with registry.lease("broken"):
+            pass
+
+
+def test_concurrent_access_during_spill(registry):
+    """Test readers racing with spills and reloads always see the latest version."""
+    for name in ("a", "b", "c"):
+        with registry.lease(name, create=True) as service:
+            service.initialize_tree(make_items(5))
+    errors = []
+
+    def worker(name):
+        try:
+            for _ in range(50):
+                with registry.lease(name) as service:
+                    service.update_item(1, {"count": service.version})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(name,)) for name in ("a", "b", "c")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    for name in ("a", "b", "c"):
+        with registry.lease(name) as service:
+            assert service.version == 51
+            assert service.get_item_by_id(1)["count"] == 50
+
+
+def test_registries_sharing_spill_dir(registry, tmp_path):
+    """Test registries sharing a spill directory keep separate files and clean up on close."""
+    with registry.lease("a", create=True) as service:
+        service.initialize_tree(make_items(8))
+    with registry.lease("b", create=True) as service:
+        service.initialize_tree(make_items(8))
+    other = TreeRegistry(str(tmp_path), 10, TreeStore, lambda tree_store, version: TreeStoreService(tree_store))
+
+    with registry.lease("a") as service:
+        assert len(service.get_all_items()) == 8
+    assert other.spill_dir != registry.spill_dir
+
+    registry.close()
+    assert not os.path.exists(registry.spill_dir)
+    assert os.path.isdir(other.spill_dir)
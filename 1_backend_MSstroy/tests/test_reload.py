@@ -0,0 +1,65 @@
+import json
+import os
+import time
+
+import pytest
+
+from app.models import ROOT_PARENT, TreeStore
+from app.reload import TreeReloader
+from app.service import TreeStoreService
+
+ITEMS = [{"id": 1, "parent": ROOT_PARENT}, {"id": 2, "parent": 1, "type": "test"}]
+
+
+def make_reloader(path, service, poll_seconds=0.01):
+    """Create reloader building TreeStore from a JSON file into service."""
+
+    def load():
+        with open(path, "r", encoding="utf-8") as f:
+            return TreeStore(json.load(f))
+
+    return TreeReloader(str(path), load, service.replace_tree, poll_seconds)
+
+
+def wait_until(condition, timeout=5.0):
+    """Poll condition until it holds or timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_file_change_is_reloaded(tmp_path):
+    """Test watcher swaps in the tree after the file changes."""
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(ITEMS), encoding="utf-8")
+    service = TreeStoreService(TreeStore(ITEMS))
+    reloader = make_reloader(path, service)
+    reloader.start()
+    try:
+        path.write_text(json.dumps(ITEMS + [{"id": 3, "parent": 2}]), encoding="utf-8")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        wait_until(lambda: reloader.status()["reloads"] == 1)
+    finally:
+        reloader.stop()
+    assert len(service.tree_store) == 3
+    assert reloader.status()["last_reload"]["trigger"] == "file"
+
+
+def test_invalid_file_keeps_tree(tmp_path):
+    """Test a failed reload is reported and the previous tree keeps serving."""
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(ITEMS + [{"id": 3, "parent": 99}]), encoding="utf-8")
+    service = TreeStoreService(TreeStore(ITEMS))
+    reloader = make_reloader(path, service)
+
+    with pytest.raises(ValueError):
+        reloader.reload()
+    status = reloader.status()
+    assert status["failures"] == 1 and status["reloads"] == 0
+    assert "parents not found" in status["last_error"]["error"]
+    assert len(service.tree_store) == 2 and service.version == 0
+
+    os.remove(path)
+    with pytest.raises(FileNotFoundError):
+        reloader.reload()
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from app.compact import CompactTreeStore
+from app.models import ROOT_PARENT, TreeStore
+from app.service import TreeStoreService
+
+
+def make_chain(size, item_type):
+    """Build a single-branch tree of given size."""
+    items = [{"id": 1, "parent": ROOT_PARENT, "type": item_type}]
+    items += [{"id": i, "parent": i - 1, "type": item_type} for i in range(2, size + 1)]
+    return items
+
+
+def test_pinned_snapshot_survives_init():
+    """Test a pinned snapshot keeps serving the old tree after init."""
+    service = TreeStoreService(TreeStore(make_chain(3, "old")))
+    pinned = service.snapshot
+
+    service.initialize_tree(make_chain(5, "new"))
+
+    assert service.version == pinned.version + 1
+    assert len(pinned.tree_store.get_all()) == 3
+    assert service.get_item_by_id(5)["type"] == "new"
+
+
+def test_reads_during_init_are_not_torn():
+    """Test concurrent readers see either the old or the new tree, never a mix."""
+    service = TreeStoreService(TreeStore(make_chain(50, "old")))
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            parents = service.get_all_parents(50)
+            if len(parents) != 49 or len({item["type"] for item in parents}) != 1:
+                errors.append(parents)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for index in range(20):
+        service.initialize_tree(make_chain(50, f"v{index}"))
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def test_reads_during_in_place_mutations_are_not_torn():
+    """Test readers never see a half-applied add, remove or update."""
+    service = TreeStoreService(TreeStore(make_chain(50, "old")))
+    batch = [{"id": 1000, "parent": 50, "type": "leaf"}]
+    batch += [{"id": 1000 + i, "parent": 1000, "type": "leaf"} for i in range(1, 200)]
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                if len(service.get_all_items()) not in (50, 250):
+                    errors.append("getAll")
+                page = service.get_descendants(50, limit=1000)["items"]
+                if len(page) not in (0, 200):
+                    errors.append("getDescendants")
+                if len({item["type"] for item in service.get_all_parents(50)}) != 1:
+                    errors.append("getAllParents")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for index in range(30):
+        service.add_items([dict(item) for item in batch])
+        service.update_item(1, {"type": f"v{index}"}, recursive=True)
+        service.remove_item(1000, recursive=True)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+
+def test_export_rejects_children_attribute_before_streaming():
+    """Test an item attribute clashing with nested children fails before any chunk on every engine."""
+    items = [{"id": 1, "parent": ROOT_PARENT}, {"id": 2, "parent": 1, "children": 3}, {"id": 3, "parent": 1}]
+    for tree_store in (TreeStore(items), CompactTreeStore(items)):
+        service = TreeStoreService(tree_store)
+        with pytest.raises(ValueError, match="Item 2"):
+            service.export_subtree(1)
+        assert b"".join(service.export_subtree(3)) == b'{"result":{"id":3,"parent":1,"children":[]}}'
@@ -0,0 +1,84 @@
+import multiprocessing
+import uuid
+
+import pytest
+
+from app import main
+from app.compact import CompactTreeStore
+from app.models import ROOT_PARENT
+from app.service import TreeStoreService
+from app.shared import SharedTree
+
+ITEMS = [
+    {"id": 1, "parent": ROOT_PARENT},
+    {"id": 2, "parent": 1, "type": "test"},
+    {"id": 3, "parent": 2, "type": None},
+]
+
+
+def _publish_from_worker(name: str) -> None:
+    """Publish a one-item tree from a separate process."""
+    SharedTree(name).publish(CompactTreeStore([{"id": 10, "parent": ROOT_PARENT}]))
+
+
+@pytest.fixture
+def shared_name():
+    """Fixture providing unique shared memory name, unlinked after the test."""
+    name = f"treestore-test-{uuid.uuid4().hex[:8]}"
+    yield name
+    SharedTree(name).destroy()
+
+
+def test_workers_switch_generations(shared_name):
+    """Test a worker picks up generations published by another one."""
+    publisher = SharedTree(shared_name)
+    reader = SharedTree(shared_name)
+    assert reader.load() is None
+
+    assert publisher.publish(CompactTreeStore(ITEMS)) == 1
+    first, generation = reader.load()
+    assert generation == 1
+    assert first.get_all() == ITEMS
+    assert reader.load() is None
+
+    publisher.publish(CompactTreeStore(ITEMS[:1]))
+    second, generation = reader.load()
+    assert generation == 2
+    assert second.get_all() == ITEMS[:1]
+    # The superseded generation is unlinked but stays readable while pinned.
+    assert first.get_all_parents(3) == [ITEMS[1], ITEMS[0]]
+
+
+def test_generation_survives_publishing_process(shared_name):
+    """Test a tree published by a process that exited is still attachable."""
+    reader = SharedTree(shared_name)
+    process = multiprocessing.get_context("spawn").Process(target=_publish_from_worker, args=(shared_name,))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+    store, generation = reader.load()
+    assert generation == 1
+    assert store.get_all() == [{"id": 10, "parent": ROOT_PARENT}]
+
+
+def test_service_ignores_stale_generation():
+    """Test explicitly versioned stores never roll the service back."""
+    service = TreeStoreService(CompactTreeStore(ITEMS), version=3)
+    service.replace_tree(CompactTreeStore(ITEMS[:1]), version=2)
+    assert service.version == 3
+    assert len(service.tree_store) == 3
+
+    service.replace_tree(CompactTreeStore(ITEMS[:1]), version=5)
+    assert service.version == 5
+    assert len(service.tree_store) == 1
+
+
+def test_attach_gives_up_after_timeout(shared_name, monkeypatch):
+    """Test startup fails with a clear error instead of spinning on an unattachable generation."""
+    shared_tree = SharedTree(shared_name)
+    shared_tree.publish(CompactTreeStore(ITEMS))
+    monkeypatch.setattr(shared_tree, "load", lambda: None)
+    monkeypatch.setattr(main.config, "shared_attach_timeout_seconds", 0.05)
+    with pytest.raises(RuntimeError, match="Could not attach"):
+        main._load_shared_tree(shared_tree)
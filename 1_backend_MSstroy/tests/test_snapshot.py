@@ -0,0 +1,45 @@
+import pytest
+
+from app.compact import CompactTreeStore
+from app.exceptions import UnsupportedOperationError
+from app.models import ROOT_PARENT
+from app.service import TreeStoreService
+from app.snapshot import load_snapshot, open_snapshot, read_snapshot_meta, write_snapshot
+
+
+@pytest.fixture
+def compact_store():
+    """Fixture providing compact store with mixed attributes."""
+    return CompactTreeStore([
+        {"id": 1, "parent": ROOT_PARENT},
+        {"id": 2, "parent": 1, "type": "test", "name": "Шкаф"},
+        {"id": 3, "parent": 1, "type": "test"},
+        {"id": 4, "parent": 2, "type": None, "tags": ["a"]},
+    ])
+
+
+def test_roundtrip(tmp_path, compact_store):
+    """Test snapshot opened with mmap matches the source store."""
+    path = str(tmp_path / "tree.snap")
+    write_snapshot(compact_store, path, meta={"version": 7})
+
+    store = open_snapshot(path)
+    assert store.get_all() == compact_store.get_all()
+    assert store.get_children(1) == compact_store.get_children(1)
+    assert store.get_all_parents(4) == compact_store.get_all_parents(4)
+    assert store.get_item(5) is None
+    assert read_snapshot_meta(path) == {"version": 7}
+
+
+def test_rejects_foreign_data():
+    """Test non-snapshot buffers are rejected."""
+    with pytest.raises(ValueError):
+        load_snapshot(b"not a snapshot at all")
+
+
+def test_service_reports_unsupported_operations(compact_store):
+    """Test operations missing from the compact engine raise a clear error."""
+    service = TreeStoreService(compact_store)
+    assert service.get_children(1) == compact_store.get_children(1)
+    with pytest.raises(UnsupportedOperationError):
+        service.add_items([{"id": 9, "parent": 1}])
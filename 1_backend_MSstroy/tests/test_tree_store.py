@@ -1,6 +1,11 @@
+import json
+
 import pytest
 
+from app.export import iter_subtree_json
+from app.ingest import NdjsonIngestor
 from app.models import ROOT_PARENT, TreeStore
+from app.query import Condition
 
 
 @pytest.fixture
@@ -83,3 +88,303 @@ def test_performance(tree_store):
         tree_store.get_item(7)
         tree_store.get_children(2)
         tree_store.get_all_parents(7)
+
+
+def test_add_items(tree_store):
+    """Test adding a subtree whose items reference each other."""
+    tree_store.add_items([
+        {"id": 10, "parent": 9, "type": "new"},
+        {"id": 9, "parent": 3, "type": "new"},
+    ])
+    assert tree_store.get_item(10) == {"id": 10, "parent": 9, "type": "new"}
+    assert [item["id"] for item in tree_store.get_children(3)] == [9]
+    assert [item["id"] for item in tree_store.get_all_parents(10)] == [9, 3, 1]
+    assert len(tree_store.get_all()) == 10
+
+    with pytest.raises(ValueError):
+        tree_store.add_items([{"id": 11, "parent": 999}])
+    with pytest.raises(ValueError):
+        tree_store.add_items([{"id": 7, "parent": 1}])
+    assert tree_store.get_item(11) is None
+
+
+def test_remove_item(tree_store):
+    """Test removing a leaf and a subtree."""
+    assert tree_store.remove_item(8) == [8]
+    assert [item["id"] for item in tree_store.get_children(4)] == [7]
+
+    with pytest.raises(ValueError):
+        tree_store.remove_item(2)
+    assert sorted(tree_store.remove_item(2, recursive=True)) == [2, 4, 5, 6, 7]
+    assert tree_store.get_item(7) is None
+    assert [item["id"] for item in tree_store.get_children(1)] == [3]
+    assert [item["id"] for item in tree_store.get_all()] == [1, 3]
+
+    with pytest.raises(KeyError):
+        tree_store.remove_item(2)
+
+
+def test_move_item(tree_store):
+    """Test moving a subtree and rejecting cycles."""
+    tree_store.move_item(4, 3)
+    assert tree_store.get_item(4)["parent"] == 3
+    assert [item["id"] for item in tree_store.get_children(2)] == [5, 6]
+    assert [item["id"] for item in tree_store.get_all_parents(7)] == [4, 3, 1]
+
+    with pytest.raises(ValueError):
+        tree_store.move_item(3, 7)
+
+    tree_store.move_item(4, ROOT_PARENT)
+    assert tree_store.get_all_parents(7) == [tree_store.get_item(4)]
+
+
+def test_update_item(tree_store):
+    """Test updating attributes of an item and its subtree."""
+    assert tree_store.update_item(4, {"type": "updated"}, recursive=True) == [4, 7, 8]
+    assert tree_store.get_item(8)["type"] == "updated"
+    assert tree_store.get_item(2)["type"] == "test"
+
+    with pytest.raises(ValueError):
+        tree_store.update_item(4, {"parent": 1})
+
+
+def test_changes_replace_item_dicts(tree_store):
+    """Test updates and moves leave item dicts already handed out unchanged."""
+    item = tree_store.get_item(7)
+    tree_store.update_item(7, {"type": "updated"})
+    tree_store.move_item(7, 3)
+
+    assert item == {"id": 7, "parent": 4, "type": None}
+    assert tree_store.get_item(7) == {"id": 7, "parent": 3, "type": "updated"}
+    assert tree_store.get_children(3) == [tree_store.get_item(7)]
+    assert tree_store.get_item(7) in tree_store.get_all()
+
+
+def test_ancestor_queries(tree_store):
+    """Test depth, k-th ancestor, is-ancestor and LCA queries."""
+    assert tree_store.get_depth(1) == 0
+    assert tree_store.get_depth(7) == 3
+    assert tree_store.get_kth_ancestor(7, 0)["id"] == 7
+    assert tree_store.get_kth_ancestor(7, 2)["id"] == 2
+    assert tree_store.get_kth_ancestor(7, 4) is None
+    assert tree_store.is_ancestor(2, 8)
+    assert not tree_store.is_ancestor(8, 8)
+    assert not tree_store.is_ancestor(3, 8)
+    assert tree_store.get_lowest_common_ancestor(7, 5)["id"] == 2
+    assert tree_store.get_lowest_common_ancestor(8, 3)["id"] == 1
+    assert tree_store.get_lowest_common_ancestor(4, 8)["id"] == 4
+
+    with pytest.raises(KeyError):
+        tree_store.get_depth(999)
+
+
+def test_ancestor_index_matches_parent_walk():
+    """Test jump tables agree with the plain parent walk after mutations."""
+    items = [{"id": 1, "parent": ROOT_PARENT}]
+    items += [{"id": i, "parent": i // 2} for i in range(2, 200)]
+    indexed = TreeStore(items, ancestor_index=True)
+    plain = TreeStore(items)
+    for store in (indexed, plain):
+        store.move_item(12, 5)
+        store.add_items([{"id": 200, "parent": 199}, {"id": 201, "parent": ROOT_PARENT}])
+
+    for first_id in range(1, 202, 7):
+        assert indexed.get_depth(first_id) == plain.get_depth(first_id)
+        for second_id in range(1, 202, 11):
+            assert (
+                indexed.get_lowest_common_ancestor(first_id, second_id)
+                == plain.get_lowest_common_ancestor(first_id, second_id)
+            )
+            assert indexed.is_ancestor(first_id, second_id) == plain.is_ancestor(first_id, second_id)
+    assert indexed.get_kth_ancestor(24, 2) == indexed.get_item(5)
+    assert indexed.get_lowest_common_ancestor(200, 201) is None
+
+
+def test_get_descendants(tree_store):
+    """Test descendants pagination, depth filter and subtree size."""
+    items, next_offset = tree_store.get_descendants(2)
+    assert [item["id"] for item in items] == [4, 7, 8, 5, 6]
+    assert next_offset is None
+
+    items, next_offset = tree_store.get_descendants(2, limit=2)
+    assert [item["id"] for item in items] == [4, 7]
+    items, next_offset = tree_store.get_descendants(2, offset=next_offset, limit=2)
+    assert [item["id"] for item in items] == [8, 5]
+
+    items, _ = tree_store.get_descendants(1, max_depth=1)
+    assert [item["id"] for item in items] == [2, 3]
+
+    assert tree_store.get_subtree_size(2) == 6
+    assert tree_store.get_subtree_size(8) == 1
+
+    tree_store.move_item(4, 3)
+    assert tree_store.get_subtree_size(2) == 3
+    items, _ = tree_store.get_descendants(3)
+    assert [item["id"] for item in items] == [4, 7, 8]
+
+
+def test_get_level(tree_store):
+    """Test level lookup within subtrees, pagination and index refresh after moves."""
+    items, next_offset, total = tree_store.get_level(1, 2)
+    assert [item["id"] for item in items] == [4, 5, 6]
+    assert (next_offset, total) == (None, 3)
+
+    items, next_offset, total = tree_store.get_level(1, 2, limit=2)
+    assert [item["id"] for item in items] == [4, 5] and (next_offset, total) == (2, 3)
+    items, next_offset, _ = tree_store.get_level(1, 2, offset=next_offset, limit=2)
+    assert [item["id"] for item in items] == [6] and next_offset is None
+
+    assert tree_store.get_level(3, 1) == ([], None, 0)
+    assert tree_store.get_level(2, 10) == ([], None, 0)
+    with pytest.raises(KeyError):
+        tree_store.get_level(999, 1)
+
+    tree_store.move_item(4, 3)
+    items, _, _ = tree_store.get_level(3, 2)
+    assert [item["id"] for item in items] == [7, 8]
+    items, _, _ = tree_store.get_level(1, 2)
+    assert [item["id"] for item in items] == [5, 6, 4]
+
+
+def test_ndjson_ingestor_splits_chunks(sample_items):
+    """Test items split across chunk boundaries are reassembled."""
+    body = "".join(json.dumps(item) + "\n" for item in sample_items).encode()
+    ingestor = NdjsonIngestor()
+    for start in range(0, len(body), 7):
+        ingestor.feed(body[start:start + 7])
+    store = ingestor.finish()
+    assert store.get_all() == sample_items
+    assert [item["id"] for item in store.get_all_parents(7)] == [4, 2, 1]
+
+
+def test_get_all_parents_batch(tree_store):
+    """Test batch parent chains match single lookups."""
+    result = tree_store.get_all_parents_batch([7, 8, 5, 1, 999])
+    for item_id in [7, 8, 5, 1, 999]:
+        assert result[item_id] == tree_store.get_all_parents(item_id)
+
+
+def test_find_by_attribute(sample_items):
+    """Test indexed and scanned attribute lookups stay in sync with mutations."""
+    indexed = TreeStore([dict(item) for item in sample_items], indexed_attributes=["type"])
+    scanned = TreeStore([dict(item) for item in sample_items])
+
+    for store in (indexed, scanned):
+        assert [item["id"] for item in store.find_by_attribute("type", None)] == [7, 8]
+        assert [item["id"] for item in store.find_by_attribute("type", "test", root_id=2)] == [2, 4, 5, 6]
+        assert store.find_by_attribute("type", "missing") == []
+
+        store.update_item(4, {"type": "group"})
+        store.remove_item(8)
+        assert [item["id"] for item in store.find_by_attribute("type", None)] == [7]
+        assert [item["id"] for item in store.find_by_attribute("type", "group", root_id=1)] == [4]
+
+        with pytest.raises(KeyError):
+            store.find_by_attribute("type", "test", root_id=999)
+
+
+def test_query(sample_items):
+    """Test vectorized filters match a plain Python evaluation."""
+    items = [dict(item, price=item["id"] * 10) for item in sample_items]
+    items[2]["price"] = "n/a"
+    store = TreeStore(items)
+
+    items, next_offset, total = store.query([
+        Condition("price", "between", [20, 70]),
+        Condition("type", "in", ["test", None]),
+    ])
+    assert [item["id"] for item in items] == [2, 4, 7, 5, 6]
+    assert (next_offset, total) == (None, 5)
+
+    items, next_offset, total = store.query([Condition("type", "ne", "test")], root_id=2, limit=1)
+    assert [item["id"] for item in items] == [7]
+    assert (next_offset, total) == (1, 2)
+
+    store.update_item(8, {"price": 1})
+    items, _, _ = store.query([Condition("price", "lt", 10)])
+    assert [item["id"] for item in items] == [8]
+
+    with pytest.raises(ValueError):
+        store.query([Condition("price", "gt", "10")])
+
+    store.update_item(3, {"tags": ["a"]})
+    assert store.query([Condition("tags", "eq", "b")])[2] == 0
+    for condition in (Condition("tags", "eq", ["a"]), Condition("tags", "in", [["a"]])):
+        with pytest.raises(ValueError, match="scalar"):
+            store.query([condition])
+
+
+def test_rejects_cycles_and_orphans():
+    """Test construction reports every orphan and cycle member at once."""
+    items = [
+        {"id": 1, "parent": ROOT_PARENT},
+        {"id": 2, "parent": 3},
+        {"id": 3, "parent": 2},
+        {"id": 4, "parent": 3},
+        {"id": 5, "parent": 5},
+        {"id": 6, "parent": 99},
+        {"id": 7, "parent": 6},
+    ]
+    with pytest.raises(ValueError) as error:
+        TreeStore(items)
+    assert "parents not found for items [6]" in str(error.value)
+    assert "parent cycle through items [2, 3, 5]" in str(error.value)
+
+
+def test_subtree_aggregates_follow_mutations():
+    """Test incrementally maintained aggregates match a rebuild after mutations."""
+    items = [{"id": 1, "parent": ROOT_PARENT, "price": 1}]
+    items += [{"id": i, "parent": i // 2, "price": i} for i in range(2, 100)]
+    store = TreeStore(items, aggregated_attributes=["price"])
+    store.add_items([{"id": 100, "parent": 99, "price": 5}, {"id": 101, "parent": 100}])
+    store.move_item(7, 100)
+    store.remove_item(5, recursive=True)
+    store.update_item(3, {"price": 0.5})
+    store.update_item(24, {"price": 2}, recursive=True)
+
+    rebuilt = TreeStore([dict(item) for item in store.get_all()], aggregated_attributes=["price"])
+    on_demand = TreeStore([dict(item) for item in store.get_all()])
+    assert store.get_subtree_stats(1) == {"subtree_size": 70, "height": 11, "sums": {"price": 1994.5}}
+    for item in store.get_all():
+        stats = store.get_subtree_stats(item["id"])
+        assert stats == rebuilt.get_subtree_stats(item["id"])
+        assert on_demand.get_subtree_stats(item["id"]) == dict(stats, sums={})
+
+
+def test_apply_patch(tree_store):
+    """Test diff application including swapped parents and atomic rejection."""
+    result = tree_store.apply_patch(
+        added=[{"id": 9, "parent": 3, "type": "new"}],
+        removed=[6],
+        changed=[
+            {"id": 2, "parent": 4, "type": "test"},
+            {"id": 3, "parent": 2},
+            {"id": 4, "parent": 1, "type": "moved"},
+            {"id": 7, "parent": 4, "type": None, "label": "x"},
+        ],
+    )
+    assert result == {"added": 1, "removed": 1, "changed": 4}
+    assert [item["id"] for item in tree_store.get_all_parents(9)] == [3, 2, 4, 1]
+    assert tree_store.get_item(3) == {"id": 3, "parent": 2}
+    assert tree_store.get_item(7)["label"] == "x"
+    assert tree_store.get_item(6) is None
+
+    before = tree_store.get_all()
+    with pytest.raises(ValueError):
+        tree_store.apply_patch(added=[], removed=[5], changed=[{"id": 2, "parent": 3}, {"id": 3, "parent": 2}])
+    with pytest.raises(ValueError):
+        tree_store.apply_patch(added=[{"id": 10, "parent": 2}], removed=[2], changed=[])
+    with pytest.raises(ValueError, match="must have 'parent'"):
+        tree_store.apply_patch(added=[], removed=[], changed=[{"id": 5, "type": "test"}])
+    assert tree_store.get_all() == before
+
+
+def test_subtree_export_streams_deep_chains():
+    """Test nested export of a chain far deeper than the recursion limit."""
+    items = [{"id": 1, "parent": ROOT_PARENT}] + [{"id": i, "parent": i - 1} for i in range(2, 5001)]
+    store = TreeStore(items)
+    chunks = list(iter_subtree_json(store, store.get_item(1), chunk_size=1024))
+    assert len(chunks) > 1
+    document = b"".join(chunks).decode()
+    assert document.startswith('{"result":{"id":1,"parent":"root","children":[{"id":2,')
+    assert document.endswith('"children":[]}' + "]}" * 4999 + "}")